@@ -0,0 +1,140 @@
+"""
+Чтение архива для редакторов: фильтры, keyset-пагинация и полнотекстовый поиск.
+
+Всё идёт через ReadSessionLocal — отдельный маленький пул (database.get_read_engine),
+так что редакторский UI не занимает соединения конвейера и планировщика.
+
+Пагинация — по (created_at, id) от новых к старым: курсор — последняя пара предыдущей
+страницы, следующая страница — спуск по индексу ix_news_archive_created без OFFSET.
+Поиск — websearch_to_tsquery по GIN-индексам ix_news_archive_fts_bi_{russian,simple}.
+"""
+import base64
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, literal_column, or_
+
+from .database import ReadSessionLocal, NewsArchive, FTS_CONFIGS, FTS_DOCUMENT
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 200
+SNIPPET_CHARS = 300
+
+
+def encode_cursor(created_at: datetime, news_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{news_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """ValueError — курсор битый."""
+    created_at, _, news_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition("|")
+    return datetime.fromisoformat(created_at), int(news_id)
+
+
+def _search_condition(query: str, config: str):
+    configs = FTS_CONFIGS if config == "both" else (config,)
+    if not set(configs) <= set(FTS_CONFIGS):
+        raise ValueError(f"config must be one of {FTS_CONFIGS + ('both',)}")
+    # Выражение документа — ровно как в индексе, иначе GIN не используется
+    return or_(*(
+        literal_column(FTS_DOCUMENT.format(config=c)).op("@@")(
+            func.websearch_to_tsquery(literal_column(f"'{c}'::regconfig"), query))
+        for c in configs
+    ))
+
+
+def list_archive(
+    status: Optional[str] = None,
+    source: Optional[str] = None,
+    lang: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    q: Optional[str] = None,
+    config: str = "both",
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Dict:
+    """Страница архива (новые первыми) и курсор следующей; ValueError — неверные параметры."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    db = ReadSessionLocal()
+    try:
+        # Без original_text целиком: в списке хватает начала текста
+        query = db.query(
+            NewsArchive.id, NewsArchive.title, NewsArchive.status, NewsArchive.lang,
+            NewsArchive.source_name, NewsArchive.source_url, NewsArchive.created_at,
+            NewsArchive.source_published_at, NewsArchive.published_at, NewsArchive.telegram_post_id,
+            func.substr(func.coalesce(NewsArchive.rewritten_text, NewsArchive.original_text), 1, SNIPPET_CHARS),
+        )
+        if status:
+            query = query.filter(NewsArchive.status == status)
+        if source:
+            query = query.filter(NewsArchive.source_name == source)
+        if lang:
+            query = query.filter(NewsArchive.lang == lang)
+        if date_from:
+            query = query.filter(NewsArchive.created_at >= date_from)
+        if date_to:
+            query = query.filter(NewsArchive.created_at < date_to)
+        if q:
+            query = query.filter(_search_condition(q, config))
+        if cursor:
+            created_at, news_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                NewsArchive.created_at < created_at,
+                and_(NewsArchive.created_at == created_at, NewsArchive.id < news_id),
+            ))
+        rows = query.order_by(NewsArchive.created_at.desc(), NewsArchive.id.desc()).limit(limit + 1).all()
+    finally:
+        db.close()
+
+    items: List[Dict] = [
+        {
+            "id": r[0], "title": r[1], "status": r[2], "lang": r[3],
+            "source_name": r[4], "source_url": r[5],
+            "created_at": r[6].isoformat() if r[6] else None,
+            "source_published_at": r[7].isoformat() if r[7] else None,
+            "published_at": r[8].isoformat() if r[8] else None,
+            "telegram_post_id": r[9],
+            "snippet": r[10],
+        }
+        for r in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit and rows[limit - 1][6] is not None:
+        next_cursor = encode_cursor(rows[limit - 1][6], rows[limit - 1][0])
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def get_archive_item(news_id: int) -> Optional[Dict]:
+    db = ReadSessionLocal()
+    try:
+        news = db.get(NewsArchive, news_id)
+        if news is None:
+            return None
+        return {
+            "id": news.id,
+            "title": news.title,
+            "title_kz": news.title_kz,
+            "status": news.status,
+            "lang": news.lang,
+            "source_name": news.source_name,
+            "source_url": news.source_url,
+            "source_url_kz": news.source_url_kz,
+            "original_text": news.original_text,
+            "original_text_kz": news.original_text_kz,
+            "rewritten_text": news.rewritten_text,
+            "image_url": news.image_url,
+            "topic_score": news.topic_score,
+            "rank_score": news.rank_score,
+            "error_class": news.error_class,
+            "error_log": news.error_log,
+            "attempts": news.attempts,
+            "created_at": news.created_at.isoformat() if news.created_at else None,
+            "source_published_at": news.source_published_at.isoformat() if news.source_published_at else None,
+            "published_at": news.published_at.isoformat() if news.published_at else None,
+            "telegram_post_id": news.telegram_post_id,
+        }
+    finally:
+        db.close()
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -7,6 +8,11 @@ class Settings(BaseSettings):
     # бот сразу упадет с ошибкой, а не будет пытаться подключиться к "localhost".
     DATABASE_URL: str 
 
+    # Реплика для чтения архива (пусто — та же БД) и её отдельный маленький пул
+    DATABASE_READ_URL: str = ""
+    READ_POOL_SIZE: int = 3
+    READ_STATEMENT_TIMEOUT_MS: int = 5000
+
     # --- НЕЙРОСЕТИ (Gemini Ensemble) ---
     # Мы используем один ключ для всех моделей
     GEMINI_API_KEY: str
@@ -16,24 +22,147 @@ class Settings(BaseSettings):
     GEMINI_MODEL: str = "gemini-2.0-flash"
 
     GROQ_API_KEY: str = ""
+    # Пауза между шагами "журналист → редактор" на Groq
+    GROQ_STEP_DELAY_SECONDS: float = 2.0
+
+    # --- АДРЕСА ВНЕШНИХ API ---
+    # По умолчанию — боевые; переопределяются для стенда и бенчмарков (bench/)
+    GOV_KZ_API_URL: str = "https://www.gov.kz/api/v1/public/content-manager/news"
+    GOV_KZ_STATIC_TOKENS: str = ""   # "hash:token" — не запускать Playwright
+    GROQ_BASE_URL: str = ""
+    GEMINI_BASE_URL: str = ""
+    TELEGRAM_API_BASE_URL: str = ""
+    # Языковые ленты gov.kz через запятую: "ru" или "ru,kk" (KZ-версии склеиваются с RU по id новости)
+    GOV_KZ_LANGS: str = "ru"
+
+    # --- КОРПУС ОТВЕТОВ GOV.KZ (corpus.py) ---
+    # live — как обычно; record — ещё и сохранять ответы API и страницы;
+    # replay — отдавать их из корпуса без сети и Playwright
+    SCRAPER_MODE: str = "live"
+    SCRAPER_CORPUS_DIR: str = "/tmp/govcontext-corpus"
+
+    # --- ОБОГАЩЕНИЕ СО СТРАНИЦ НОВОСТЕЙ (scraper.enrich_many) ---
+    ENRICH_CONCURRENCY: int = 8         # одновременных загрузок страниц (и соединений в пуле)
+    ENRICH_MAX_BYTES: int = 262144      # дальше этого страницу не читаем, даже если статья не закрылась
+    ENRICH_TIMEOUT_SECONDS: float = 15.0
 
     # --- TELEGRAM ---
     TELEGRAM_BOT_TOKEN: str
     TELEGRAM_CHAT_ID: str
+    # Отдельные каналы по языкам (если пусто — всё идёт в TELEGRAM_CHAT_ID)
+    TELEGRAM_CHAT_ID_RU: str = ""
+    TELEGRAM_CHAT_ID_KZ: str = ""
+    # Зеркала через запятую: "@mirror1,-100123456"
+    TELEGRAM_MIRROR_CHAT_IDS: str = ""
+    # Размер пула HTTP-соединений к Bot API
+    TELEGRAM_POOL_SIZE: int = 8
+
+    # --- КАРТИНКИ ---
+    # Локальный кэш скачанных и пережатых картинок (ключ — sha256 содержимого)
+    IMAGE_CACHE_DIR: str = "/tmp/govcontext-images"
+    IMAGE_MAX_DOWNLOAD_MB: int = 20
+    IMAGE_MAX_SIDE: int = 2560
 
     # --- РАСПИСАНИЕ ---
     # 20 минут скрапинг (чтобы не спамить базу)
     SCRAPE_INTERVAL_MINUTES: int = 20   
     # 15 минут публикация (оптимальный ритм)
     PUBLISH_INTERVAL_MINUTES: int = 15  
+    # Дневной план публикаций (planner.py): слоты считаются раз в сутки, шаг — под бэклог,
+    # от PUBLISH_INTERVAL_MINUTES до PLAN_MAX_INTERVAL_MINUTES. False — старый тик каждые 15 минут
+    PUBLISH_PLAN_ENABLED: bool = True
+    PLAN_MAX_INTERVAL_MINUTES: int = 60
+
+    # --- АДАПТИВНЫЙ ОПРОС ИСТОЧНИКОВ (polling.py) ---
+    # Каждый источник опрашивается со своим интервалом, выученным по частоте его публикаций
+    ADAPTIVE_POLLING: bool = True
+    SOURCE_POLL_MIN_MINUTES: int = 5
+    SOURCE_POLL_MAX_MINUTES: int = 240
+
+    # --- ЗДОРОВЬЕ ИСТОЧНИКОВ (source_health.py) ---
+    # После N ошибок подряд источник пропускается на cooldown, затем один пробный запрос
+    SOURCE_BREAKER_THRESHOLD: int = 3
+    SOURCE_BREAKER_COOLDOWN_SECONDS: int = 600
+
+    # --- ШАРДИРОВАНИЕ ИСТОЧНИКОВ (sharding.py) ---
+    # Реплика считается живой, пока продлевает lease; упавшая выпадает через SHARD_LEASE_SECONDS
+    SHARD_LEASE_SECONDS: int = 60
+    SHARD_HEARTBEAT_SECONDS: int = 20
+
+    # --- КОНВЕЙЕР (pipeline.py) ---
+    # Вместо интервального скрапинга новости идут потоком по стадиям; публикует по-прежнему
+    # process_news_task (слоты плана или интервал), конвейер только заранее переписывает
+    PIPELINE_ENABLED: bool = False
+    PIPELINE_QUEUE_SIZE: int = 50         # ёмкость очереди каждой стадии
+    PIPELINE_FETCH_WORKERS: int = 3
+    PIPELINE_EXTRACT_WORKERS: int = 4
+    PIPELINE_REWRITE_WORKERS: int = 1
+    PIPELINE_PREWRITE_TOP: int = 5        # заранее переписываем только столько лучших черновиков языка
+
+    # --- CPU (cpu.py) ---
+    # Процессы для BeautifulSoup/SequenceMatcher; 0 — всё в потоке, без пула
+    CPU_WORKERS: int = 2
+    CPU_CHUNK_SIZE: int = 25              # элементов на один вызов в пуле (меньше IPC)
+    CPU_INLINE_THRESHOLD: int = 20        # пачки меньше — считаем в потоке, пул дороже
+
+    # --- OUTBOX (гарантированная доставка в Telegram) ---
+    OUTBOX_POLL_SECONDS: int = 30         # как часто воркер проверяет очередь
+    OUTBOX_BATCH_SIZE: int = 5            # сколько записей забирает за раз
+    OUTBOX_MAX_ATTEMPTS: int = 8          # после этого — failed
+    OUTBOX_CLAIM_TIMEOUT_SECONDS: int = 300  # через сколько считаем захват "зависшим"
+
+    # --- ПОВТОРЫ УПАВШИХ НОВОСТЕЙ (retries.py) ---
+    # Только временные ошибки (LLM/Telegram/сеть недоступны); задержка растёт вдвое с jitter
+    NEWS_RETRY_MAX_ATTEMPTS: int = 5
+    NEWS_RETRY_BASE_SECONDS: int = 300
+    NEWS_RETRY_MAX_SECONDS: int = 6 * 3600
+
+    # --- ПЕРЕГЕНЕРАЦИЯ АРХИВА (rewrite_batch.py) ---
+    REWRITE_BATCH_CONCURRENCY: int = 3
+    REWRITE_BATCH_PER_MINUTE: int = 20   # новостей в минуту на весь прогон (0 — без ограничения)
+    # $ за 1M токенов prompt/completion: "провайдер:вход/выход,..."
+    LLM_PRICES: str = "gemini:0.30/2.50,groq:0.11/0.34"
+
+    # --- АДМИНКА ---
+    # Токен для /admin/* (заголовок X-Admin-Token). Пусто — админ-эндпоинты выключены.
+    ADMIN_TOKEN: str = ""
+    PROFILE_DIR: str = "/tmp/govcontext-profiles"
+
+    # --- СТОРОЖ EVENT LOOP (watchdog.py) ---
+    WATCHDOG_INTERVAL_MS: int = 100
+    WATCHDOG_BLOCK_THRESHOLD_MS: int = 250   # молчание loop дольше — блокировка, снимаем стек
+    WATCHDOG_WINDOW: int = 3000              # проб в окне перцентилей (~5 минут)
 
     # --- ФИЛЬТРЫ ---
     # Ставим 1 день. Всё что старше — нам не нужно.
     NEWS_MAX_AGE_DAYS: int = 1 
     
-    # Ключевые слова
+    # Ключевые слова (основы; скоринг — topics.py)
     TOPIC_KEYWORDS: str = "эконом,финанс,туриз,жаңалық,банк,инфляц,инвестиц,казахст,саяхат,валют,рынок,бюджет,салық,заң,әкім,министр,президент,үкімет,тенге,образов,наук,школ,врач,здравоохр,медиц,білім,ғылым,мектеп,денсаулық,дәрігер,колледж,студент,аурухана,емхана"
+    # Новости со скором ниже порога не сохраняются (0 — сохранять всё)
+    TOPIC_MIN_SCORE: int = 1
+
+    # --- ПРИОРИТЕТ ЧЕРНОВИКОВ (ranking.py) ---
+    # Ценность новости падает вдвое каждые N часов после публикации на сайте
+    RANK_HALF_LIFE_HOURS: float = 6.0
+    # Вес источника: "МинФин:1.5,Акимат Алматы:0.7" (по умолчанию 1.0)
+    SOURCE_WEIGHTS: str = ""
     
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
+
+
+class _LazySettings:
+    """
+    Settings читаются из окружения при первом обращении, а не при импорте:
+    CLI и бенчмарки могут импортировать модули app, не имея всех секретов.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+
+settings = _LazySettings()
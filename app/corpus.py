@@ -0,0 +1,182 @@
+"""
+Корпус сырых ответов gov.kz: ответы API content-manager и страницы новостей.
+
+SCRAPER_MODE=record — scraper сохраняет всё, что скачал; SCRAPER_MODE=replay — отдаёт
+сохранённое без сети и Playwright (разбор и дедуп можно гонять детерминированно).
+
+Хранение: blobs/<sha[:2]>/<sha>.z (zlib, ключ — sha256 содержимого) + index.jsonl
+(ключ запроса → sha). Ответ API раскладывается на отдельные новости, поэтому одна и та же
+новость из двадцати соседних опросов источника лежит на диске один раз.
+
+    python -m app.corpus --stats
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.jsonl"
+
+
+class RecordedResponse:
+    """То немногое от requests.Response, чем пользуется scraper."""
+
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class Corpus:
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, List[Dict]]] = None
+
+    # ---------- blobs ----------
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.root, "blobs", sha[:2], f"{sha}.z")
+
+    def _put_blob(self, data: bytes) -> str:
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(zlib.compress(data, 6))
+            os.replace(tmp, path)
+        return sha
+
+    def _get_blob(self, sha: str) -> bytes:
+        with open(self._blob_path(sha), "rb") as f:
+            return zlib.decompress(f.read())
+
+    # ---------- index ----------
+
+    def _load_index(self) -> Dict[str, List[Dict]]:
+        if self._index is None:
+            index: Dict[str, List[Dict]] = {}
+            path = os.path.join(self.root, INDEX_FILE)
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            index.setdefault(entry["key"], []).append(entry)
+            self._index = index
+        return self._index
+
+    def record(self, key: str, status_code: int, content: bytes) -> None:
+        """Сохраняет ответ; одинаковый с предыдущим снимком ответ не дублируется даже в индексе."""
+        entry = {"key": key, "status": status_code, "recorded_at": datetime.utcnow().isoformat()}
+        payload = None
+        if status_code == 200 and key.startswith("api/"):
+            try:
+                payload = json.loads(content)
+            except ValueError:
+                payload = None
+        if isinstance(payload, dict) and isinstance(payload.get("content"), list):
+            # Конверт отдельно, каждая новость — отдельный blob
+            items = payload.pop("content")
+            entry["items"] = [self._put_blob(json.dumps(item, ensure_ascii=False, sort_keys=True).encode())
+                              for item in items]
+            entry["sha"] = self._put_blob(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode())
+        else:
+            entry["sha"] = self._put_blob(content)
+
+        with self._lock:
+            index = self._load_index()
+            last = index.get(key, [])[-1:] or [None]
+            if last[0] and last[0]["sha"] == entry["sha"] and last[0].get("items") == entry.get("items") \
+                    and last[0]["status"] == status_code:
+                return
+            os.makedirs(self.root, exist_ok=True)
+            with open(os.path.join(self.root, INDEX_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            index.setdefault(key, []).append(entry)
+
+    def replay(self, key: str, snapshot: int = -1) -> Optional[RecordedResponse]:
+        """Снимок ответа по ключу (по умолчанию последний); None — такого запроса не записывали."""
+        with self._lock:
+            snapshots = self._load_index().get(key)
+        if not snapshots:
+            return None
+        entry = snapshots[snapshot]
+        if "items" in entry:
+            payload = json.loads(self._get_blob(entry["sha"]))
+            payload["content"] = [json.loads(self._get_blob(sha)) for sha in entry["items"]]
+            return RecordedResponse(entry["status"], json.dumps(payload, ensure_ascii=False).encode())
+        return RecordedResponse(entry["status"], self._get_blob(entry["sha"]))
+
+    def keys(self, prefix: str = "") -> List[str]:
+        with self._lock:
+            return sorted(k for k in self._load_index() if k.startswith(prefix))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            index = self._load_index()
+            entries = [e for snapshots in index.values() for e in snapshots]
+        referenced = {e["sha"] for e in entries} | {sha for e in entries for sha in e.get("items", [])}
+        stored = raw = 0
+        for sha in referenced:
+            path = self._blob_path(sha)
+            if os.path.exists(path):
+                stored += os.path.getsize(path)
+                raw += len(self._get_blob(sha))
+        logical = sum(1 + len(e.get("items", [])) for e in entries)
+        return {
+            "keys": len(index),
+            "api_keys": sum(1 for k in index if k.startswith("api/")),
+            "page_keys": sum(1 for k in index if k.startswith("page/")),
+            "snapshots": len(entries),
+            "blobs": len(referenced),
+            "blob_references": logical,
+            "raw_mb": round(raw / 1024 / 1024, 2),
+            "stored_mb": round(stored / 1024 / 1024, 2),
+            "compression_ratio": round(raw / stored, 2) if stored else None,
+        }
+
+
+def api_key(project: str, lang: str = "ru") -> str:
+    return f"api/{project}" if lang == "ru" else f"api/{project}?lang={lang}"
+
+
+def page_key(url: str) -> str:
+    return f"page/{url}"
+
+
+_corpus: Optional[Corpus] = None
+
+
+def get_corpus() -> Corpus:
+    global _corpus
+    if _corpus is None or _corpus.root != settings.SCRAPER_CORPUS_DIR:
+        _corpus = Corpus(settings.SCRAPER_CORPUS_DIR)
+    return _corpus
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Корпус записанных ответов gov.kz")
+    parser.add_argument("--dir", default=None, help="по умолчанию SCRAPER_CORPUS_DIR")
+    parser.add_argument("--stats", action="store_true")
+    parser.add_argument("--keys", default=None, help="вывести ключи с префиксом (api/, page/)")
+    args = parser.parse_args()
+
+    corpus = Corpus(args.dir) if args.dir else get_corpus()
+    if args.keys is not None:
+        print("\n".join(corpus.keys(args.keys)))
+    else:
+        print(json.dumps(corpus.stats(), ensure_ascii=False, indent=2))
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from typing import Callable, List, Optional, Sequence
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Пул создаётся при первом обращении. forkserver, а не fork: к этому моменту
+    в процессе уже крутятся потоки APScheduler/asyncio, форкать их небезопасно.
+    """
+    global _pool
+    if settings.CPU_WORKERS <= 0:
+        return None
+    if _pool is None:
+        ctx = multiprocessing.get_context("forkserver")
+        _pool = ProcessPoolExecutor(max_workers=settings.CPU_WORKERS, mp_context=ctx)
+        logger.info(f"🧮 CPU pool started: {settings.CPU_WORKERS} processes")
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _chunks(items: Sequence, size: int) -> List[Sequence]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+async def map_chunked(func: Callable[[Sequence], List], items: Sequence, *args) -> List:
+    """
+    Выполняет func(chunk, *args) -> list над items и склеивает результаты по порядку.
+
+    Маленькие пачки (< CPU_INLINE_THRESHOLD) или CPU_WORKERS=0 — в потоке,
+    без накладных расходов на IPC. Большие — чанками по CPU_CHUNK_SIZE в пуле
+    процессов: один pickle на чанк, а не на элемент. func должна быть
+    функцией уровня модуля (её передаём по имени в дочерний процесс).
+    """
+    if not items:
+        return []
+
+    pool = _get_pool()
+    if pool is None or len(items) < settings.CPU_INLINE_THRESHOLD:
+        return await asyncio.to_thread(func, items, *args)
+
+    loop = asyncio.get_running_loop()
+    try:
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(pool, func, chunk, *args)
+            for chunk in _chunks(list(items), settings.CPU_CHUNK_SIZE)
+        ))
+    except Exception as e:
+        # Пул сломался (BrokenProcessPool и т.п.) — не теряем цикл, считаем в потоке
+        logger.error(f"CPU pool error, fallback to inline: {e}")
+        shutdown_pool()
+        return await asyncio.to_thread(func, items, *args)
+    return [x for part in parts for x in part]
+
+
+def fuzzy_duplicate_flags(titles: Sequence[str], existing_titles: Sequence[str], threshold: float = 0.65) -> List[bool]:
+    """
+    Для каждого заголовка: похож ли он на один из existing_titles (та же логика,
+    что is_fuzzy_duplicate в scheduler.py). Работает пачкой, чтобы SequenceMatcher
+    можно было вынести в пул процессов.
+    """
+    existing = [t.lower() for t in existing_titles if t]
+    flags = []
+    for title in titles:
+        if not title:
+            flags.append(False)
+            continue
+        matcher = SequenceMatcher(None, title.lower())
+        dup = False
+        for old in existing:
+            # Порядок a=new, b=old как в is_fuzzy_duplicate; дешёвые верхние оценки отсекают заранее
+            matcher.set_seq2(old)
+            if matcher.real_quick_ratio() > threshold and matcher.quick_ratio() > threshold and matcher.ratio() > threshold:
+                dup = True
+                break
+        flags.append(dup)
+    return flags
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, text
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, Boolean, Enum, ForeignKey, Index, UniqueConstraint, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine
@@ -13,9 +13,19 @@ Base = declarative_base()
 
 class NewsStatus(enum.Enum):
     draft = "draft"
+    queued = "queued"        # переписана и стоит в outbox, ждёт отправки
+    retry = "retry"          # временная ошибка, ждёт next_attempt_at (retries.py)
     published = "published"
     error = "error"
 
+class OutboxStatus(enum.Enum):
+    pending = "pending"      # ждёт отправки (или повтора после backoff)
+    claimed = "claimed"      # взята воркером, отправка ещё НЕ начиналась
+    sending = "sending"      # ключ идемпотентности записан, идёт вызов Telegram
+    sent = "sent"
+    failed = "failed"        # постоянная ошибка или исчерпаны попытки
+    unknown = "unknown"      # упали во время отправки — не повторяем, чтобы не задвоить пост
+
 class NewsArchive(Base):
     __tablename__ = "news_archive"
 
@@ -29,23 +39,160 @@ class NewsArchive(Base):
     source_published_at = Column(DateTime, nullable=True)  # дата/время публикации на сайте источника
     telegram_post_id = Column(String(100), nullable=True)
     image_url = Column(String(1000), nullable=True) # or image_prompt
+    image_hash = Column(String(64), nullable=True)  # картинка в локальном кэше (см. images.py)
     status = Column(String(20), default="draft")
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     published_at = Column(DateTime, nullable=True)
     error_log = Column(Text, nullable=True)
+    error_class = Column(String(40), nullable=True)         # класс последней ошибки (retries.py)
+    attempts = Column(Integer, default=0)                   # неудачных попыток переписать/опубликовать
+    next_attempt_at = Column(DateTime, nullable=True)       # когда повторить (status=retry)
+    topic_score = Column(Integer, nullable=True)            # совпадения с TOPIC_KEYWORDS (topics.py)
+    lang = Column(String(2), nullable=True)                 # RU / KZ — для чередования
+    rank_score = Column(Float, nullable=True)               # статичный ключ приоритета (ranking.py)
+    # --- Двуязычная история gov.kz: KZ-версия той же новости (lang = BI, пока не выбран язык поста) ---
+    gov_id = Column(String(64), nullable=True, index=True)
+    title_kz = Column(String(500), nullable=True)
+    original_text_kz = Column(Text, nullable=True)
+    source_url_kz = Column(String(1000), nullable=True)
+    # --- Таймлайн новости (trace.py): где ушло время от публикации на сайте до поста ---
+    fetched_at = Column(DateTime, nullable=True)            # получили из API источника
+    rewrite_started_at = Column(DateTime, nullable=True)
+    rewrite_finished_at = Column(DateTime, nullable=True)
+    queued_at = Column(DateTime, nullable=True)             # положили в outbox
+
+    # Выбор следующего поста: верх индекса по (status, lang) — см. ranking.next_draft
+    __table_args__ = (Index("ix_news_archive_rank", "status", "lang", "rank_score"),)
+
+class PublishOutbox(Base):
+    """Очередь отправки в Telegram (transactional outbox)."""
+    __tablename__ = "publish_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    news_id = Column(Integer, ForeignKey("news_archive.id"), index=True)
+    chat_id = Column(String(100))
+    is_primary = Column(Boolean, default=True)  # основной канал языка; зеркала не влияют на статус новости
+    idempotency_key = Column(String(200), unique=True)  # news:<id>:chat:<chat_id>
+    text = Column(Text)
+    image_url = Column(String(1000), nullable=True)
+    image_hash = Column(String(64), nullable=True)
+    status = Column(String(20), default=OutboxStatus.pending.value, index=True)
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    claimed_by = Column(String(100), nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    telegram_message_id = Column(String(100), nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+class ImageAsset(Base):
+    """Скачанная и проверенная картинка + её file_id в Telegram после первой загрузки."""
+    __tablename__ = "image_assets"
+
+    content_hash = Column(String(64), primary_key=True)  # sha256 исходных байтов
+    source_url = Column(String(1000), index=True, nullable=True)
+    size_bytes = Column(Integer, nullable=True)
+    telegram_file_id = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    uploaded_at = Column(DateTime, nullable=True)
+
+class ScraperLease(Base):
+    """Lease живой реплики: по списку живых источники делятся между репликами (sharding.py)."""
+    __tablename__ = "scraper_leases"
+
+    instance_id = Column(String(100), primary_key=True)
+    started_at = Column(DateTime, default=datetime.datetime.utcnow)
+    heartbeat_at = Column(DateTime, default=datetime.datetime.utcnow)
+    expires_at = Column(DateTime, index=True)
+
+class RewriteVariant(Base):
+    """Перегенерированный текст архивной новости под версию промптов (rewrite_batch.py); в канал не идёт."""
+    __tablename__ = "rewrite_variants"
+
+    id = Column(Integer, primary_key=True)
+    news_id = Column(Integer, ForeignKey("news_archive.id"), index=True)
+    prompt_version = Column(String(40), index=True)   # rewriter.prompt_version() или своя метка
+    provider = Column(String(20), nullable=True)      # gemini (KZ) / groq (RU)
+    rewritten_text = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)               # LLM упал — следующий запуск повторит
+    seconds = Column(Float, nullable=True)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    cost_usd = Column(Float, default=0.0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (UniqueConstraint("news_id", "prompt_version", name="uq_rewrite_variant"),)
+
+_engine = None
+
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,  # Проверяет соединение перед каждым запросом
-    pool_recycle=300,    # Пересоздает соединение каждые 5 минут
-    pool_size=10,        # Размер пула
-    max_overflow=20      # Максимальное количество дополнительных соединений
+def get_engine():
+    """Engine (и пул соединений) создаётся при первом обращении к БД, а не при импорте."""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(
+            settings.DATABASE_URL,
+            pool_pre_ping=True,  # Проверяет соединение перед каждым запросом
+            pool_recycle=300,    # Пересоздает соединение каждые 5 минут
+            pool_size=10,        # Размер пула
+            max_overflow=20      # Максимальное количество дополнительных соединений
+        )
+    return _engine
+
+
+_read_engine = None
+
+
+def get_read_engine():
+    """
+    Отдельный маленький пул для чтения архива (archive.py): редакторский UI не занимает
+    соединения конвейера. На PostgreSQL сессии read-only и с таймаутом запроса.
+    """
+    global _read_engine
+    if _read_engine is None:
+        url = settings.DATABASE_READ_URL or settings.DATABASE_URL
+        connect_args = {}
+        if url.startswith("postgres"):
+            connect_args["options"] = (f"-c default_transaction_read_only=on "
+                                       f"-c statement_timeout={settings.READ_STATEMENT_TIMEOUT_MS}")
+        _read_engine = create_engine(
+            url,
+            pool_pre_ping=True,
+            pool_recycle=300,
+            pool_size=settings.READ_POOL_SIZE,
+            max_overflow=0,      # пул исчерпан — запрос ждёт pool_timeout, а не открывает новые
+            pool_timeout=5,
+            connect_args=connect_args,
+        )
+    return _read_engine
+
+
+class _LazySessionMaker(sessionmaker):
+    def __init__(self, engine_factory=get_engine, **kw):
+        super().__init__(**kw)
+        self._engine_factory = engine_factory
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=self._engine_factory())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionMaker(autocommit=False, autoflush=False)
+ReadSessionLocal = _LazySessionMaker(get_read_engine, autocommit=False, autoflush=False)
+
+# Документ полнотекстового поиска: один шаблон и для индекса, и для запроса (archive.py),
+# иначе планировщик не узнает выражение индекса. Двуязычная история ищется и по KZ-версии
+FTS_CONFIGS = ("russian", "simple")
+FTS_DOCUMENT = (
+    "to_tsvector('{config}'::regconfig, coalesce(title, '') || ' ' || coalesce(original_text, '')"
+    " || ' ' || coalesce(title_kz, '') || ' ' || coalesce(original_text_kz, ''))"
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def ensure_migrations():
     """Добавляет колонки, которых нет в уже существующей таблице (например после деплоя на Koyeb)."""
-    with engine.connect() as conn:
+    with get_engine().connect() as conn:
         try:
             # PostgreSQL: добавить колонку normalized_title, если её нет
             conn.execute(text("""
@@ -77,9 +224,140 @@ def ensure_migrations():
         except Exception as e:
             conn.rollback()
             _log.warning("Migration index normalized_title skipped: %s", e)
+        try:
+            conn.execute(text("""
+                ALTER TABLE publish_outbox
+                ADD COLUMN IF NOT EXISTS is_primary BOOLEAN DEFAULT TRUE
+            """))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            _log.warning("Migration publish_outbox.is_primary skipped: %s", e)
+        for table in ("news_archive", "publish_outbox"):
+            try:
+                conn.execute(text(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN IF NOT EXISTS image_hash VARCHAR(64)
+                """))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                _log.warning("Migration %s.image_hash skipped: %s", table, e)
+        for column in ("fetched_at", "rewrite_started_at", "rewrite_finished_at", "queued_at"):
+            try:
+                conn.execute(text(f"""
+                    ALTER TABLE news_archive
+                    ADD COLUMN IF NOT EXISTS {column} TIMESTAMP
+                """))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                _log.warning("Migration news_archive.%s skipped: %s", column, e)
+        try:
+            conn.execute(text("""
+                ALTER TABLE news_archive
+                ADD COLUMN IF NOT EXISTS topic_score INTEGER
+            """))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            _log.warning("Migration news_archive.topic_score skipped: %s", e)
+        for column, ddl in (("lang", "VARCHAR(2)"), ("rank_score", "DOUBLE PRECISION")):
+            try:
+                conn.execute(text(f"""
+                    ALTER TABLE news_archive
+                    ADD COLUMN IF NOT EXISTS {column} {ddl}
+                """))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                _log.warning("Migration news_archive.%s skipped: %s", column, e)
+        try:
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_news_archive_rank
+                ON news_archive(status, lang, rank_score)
+            """))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            _log.warning("Migration index news_archive_rank skipped: %s", e)
+        for column, ddl in (("error_class", "VARCHAR(40)"), ("attempts", "INTEGER DEFAULT 0"),
+                            ("next_attempt_at", "TIMESTAMP")):
+            try:
+                conn.execute(text(f"""
+                    ALTER TABLE news_archive
+                    ADD COLUMN IF NOT EXISTS {column} {ddl}
+                """))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                _log.warning("Migration news_archive.%s skipped: %s", column, e)
+        try:
+            # Частичный индекс под выбор созревших повторов (retries.next_due_retry)
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_news_archive_retry_due
+                ON news_archive(next_attempt_at) WHERE status = 'retry'
+            """))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            _log.warning("Migration index news_archive_retry_due skipped: %s", e)
+        for column, ddl in (("gov_id", "VARCHAR(64)"), ("title_kz", "VARCHAR(500)"),
+                            ("original_text_kz", "TEXT"), ("source_url_kz", "VARCHAR(1000)")):
+            try:
+                conn.execute(text(f"""
+                    ALTER TABLE news_archive
+                    ADD COLUMN IF NOT EXISTS {column} {ddl}
+                """))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                _log.warning("Migration news_archive.%s skipped: %s", column, e)
+        try:
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_news_archive_gov_id
+                ON news_archive(gov_id)
+            """))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            _log.warning("Migration index news_archive_gov_id skipped: %s", e)
+        try:
+            # Keyset-пагинация архива по (created_at, id)
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_news_archive_created
+                ON news_archive(created_at DESC, id DESC)
+            """))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            _log.warning("Migration index news_archive_created skipped: %s", e)
+        for config in FTS_CONFIGS:
+            try:
+                # russian — со стеммингом; simple — для казахского (стеммера нет) и точных форм.
+                # Индекс по старому выражению (без KZ-колонок) запросам больше не подходит
+                conn.execute(text(f"DROP INDEX IF EXISTS ix_news_archive_fts_{config}"))
+                conn.execute(text(f"""
+                    CREATE INDEX IF NOT EXISTS ix_news_archive_fts_bi_{config}
+                    ON news_archive USING GIN ({FTS_DOCUMENT.format(config=config)})
+                """))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                _log.warning("Migration index news_archive_fts_bi_%s skipped: %s", config, e)
+        try:
+            # Частичный индекс под выборку воркера outbox (pending + срок подошёл)
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_publish_outbox_due
+                ON publish_outbox(next_attempt_at) WHERE status = 'pending'
+            """))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            _log.warning("Migration index publish_outbox_due skipped: %s", e)
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     ensure_migrations()
 
 def cleanup_old_tourism_news():
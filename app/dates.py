@@ -0,0 +1,97 @@
+"""
+Дата и время публикации из видимого текста страницы (RU и KZ).
+
+Заранее скомпилированные шаблоны, один проход по началу текста: дешёвый поиск начала
+числа, и только с этих позиций — полный шаблон даты. Первое по порядку совпадение,
+которое складывается в настоящую дату, и есть дата новости. Понимает:
+- "16 февраля 2026 19:16", "16 февраля, 2026 г. в 19:16"
+- "16 ақпан 2026", "2026 жылғы 16 ақпанда сағ. 19:16"
+- "16.02.2026 / 19:16", "16-02-2026", "19:16 16.02.2026"
+- "2026-02-16", "2026-02-16T19:16"
+
+Время на сайтах госорганов — местное (Asia/Almaty). extract_datetime отдаёт aware-время
+в Алматы, extract_published_at — наивное UTC, как всё остальное в БД.
+"""
+import re
+from datetime import datetime
+from typing import Optional
+
+import pytz
+
+ALMATY = pytz.timezone("Asia/Almaty")
+
+# Дата новости стоит в шапке — дальше начала страницы не ищем
+SEARCH_LIMIT = 5000
+
+# Месяц по первым трём буквам: падежи ("февраля") и казахские окончания ("ақпанда") сводятся к одному ключу
+_MONTHS = {
+    "янв": 1, "фев": 2, "мар": 3, "апр": 4, "мая": 5, "май": 5, "июн": 6,
+    "июл": 7, "авг": 8, "сен": 9, "окт": 10, "ноя": 11, "дек": 12,
+    "қаң": 1, "ақп": 2, "нау": 3, "сәу": 4, "мам": 5, "мау": 6,
+    "шіл": 7, "там": 8, "қыр": 9, "қаз": 10, "қар": 11, "жел": 12,
+}
+_MONTH_WORDS = (
+    "январ|феврал|март|апрел|ма[йя]|июн|июл|август|сентябр|октябр|ноябр|декабр|"
+    "қаңтар|ақпан|наурыз|сәуір|мамыр|маусым|шілде|тамыз|қыркүйек|қазан|қараша|желтоқсан"
+)
+_TIME = r"(?:[01]?\d|2[0-3]):[0-5]\d"
+_YEAR_SUFFIX = r"(?:\s*(?:г\.|года|г\b|жылғы|жылы|ж\.))?"
+
+_DATE_RE = re.compile(
+    rf"""
+    (?<!\d)
+    (?:(?P<t0>{_TIME})[\s,/|–—-]*)?                                            # время перед датой
+    (?:
+        (?P<d1>\d{{1,2}})[\s,.-]+(?P<m1>{_MONTH_WORDS})\w*[\s,]+(?P<y1>\d{{4}}){_YEAR_SUFFIX}
+      | (?P<y2>\d{{4}}){_YEAR_SUFFIX}\s*(?P<d2>\d{{1,2}})[\s-]+(?P<m2>{_MONTH_WORDS})\w*
+      | (?P<d3>\d{{1,2}})[./-](?P<m3>\d{{1,2}})[./-](?P<y3>\d{{4}}){_YEAR_SUFFIX}
+      | (?P<y4>\d{{4}})-(?P<m4>\d{{2}})-(?P<d4>\d{{2}})
+    )
+    (?:[\s,/|–—-]*(?:в|сағ\.?|T)?\s*(?P<t1>{_TIME}))?                           # время после даты
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Любая дата начинается с цифры: сначала ищем только начала чисел
+_NUMBER_START = re.compile(r"(?<!\d)\d")
+
+
+def _month(value: str) -> Optional[int]:
+    if value.isdigit():
+        return int(value)
+    return _MONTHS.get(value[:3].lower())
+
+
+def extract_datetime(text: str, limit: int = SEARCH_LIMIT) -> Optional[datetime]:
+    """Первая правдоподобная дата в первых limit символах; aware, Asia/Almaty. Без времени — полночь."""
+    if not text:
+        return None
+    pos = 0
+    while True:
+        # Дешёвый поиск начала числа, полный шаблон — только с этих позиций
+        start = _NUMBER_START.search(text, pos, limit)
+        if start is None:
+            return None
+        pos = start.start() + 1
+        match = _DATE_RE.match(text, start.start(), limit)
+        if match is None:
+            continue
+        g = match.groupdict()
+        for i in "1234":
+            if g[f"y{i}"]:
+                year, month, day = int(g[f"y{i}"]), _month(g[f"m{i}"]), int(g[f"d{i}"])
+                break
+        if not month or not 2000 <= year <= 2100:
+            continue
+        clock = g["t1"] or g["t0"]
+        hour, minute = map(int, clock.split(":")) if clock else (0, 0)
+        try:
+            return ALMATY.localize(datetime(year, month, day, hour, minute))
+        except ValueError:
+            continue  # 31.02, 00.13 и т.п. — ищем дальше
+
+
+def extract_published_at(text: str, limit: int = SEARCH_LIMIT) -> Optional[datetime]:
+    """То же, но наивное UTC — для published_at/source_published_at."""
+    found = extract_datetime(text, limit)
+    return found.astimezone(pytz.utc).replace(tzinfo=None) if found else None
@@ -0,0 +1,180 @@
+import hashlib
+import io
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+import requests
+
+from .database import SessionLocal, ImageAsset
+from .config import settings
+
+# Pillow — для проверки и пережатия картинок. Без него работаем в режиме "как есть".
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Лимиты Telegram для send_photo
+TG_PHOTO_MAX_BYTES = 10 * 1024 * 1024
+TG_PHOTO_MAX_DIMENSIONS_SUM = 10000
+TG_PHOTO_MAX_RATIO = 20
+
+_MAGIC = {
+    b"\xff\xd8\xff": "jpeg",
+    b"\x89PNG": "png",
+    b"RIFF": "webp",
+    b"GIF8": "gif",
+}
+
+
+def _cache_path(content_hash: str) -> str:
+    return os.path.join(settings.IMAGE_CACHE_DIR, content_hash[:2], f"{content_hash}.jpg")
+
+
+def _download(url: str) -> Optional[bytes]:
+    """Качает картинку потоково и обрывает загрузку, если она больше лимита."""
+    max_bytes = settings.IMAGE_MAX_DOWNLOAD_MB * 1024 * 1024
+    headers = {"User-Agent": "Mozilla/5.0"}
+    with requests.get(url, headers=headers, timeout=15, verify=False, stream=True) as resp:
+        if resp.status_code != 200:
+            logger.warning(f"🖼 Картинка недоступна ({resp.status_code}): {url}")
+            return None
+        chunks, size = [], 0
+        for chunk in resp.iter_content(64 * 1024):
+            size += len(chunk)
+            if size > max_bytes:
+                logger.warning(f"🖼 Картинка больше {settings.IMAGE_MAX_DOWNLOAD_MB} МБ, пропускаем: {url}")
+                return None
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _normalize(raw: bytes) -> Optional[bytes]:
+    """
+    Проверяет, что это картинка, и приводит её к лимитам Telegram:
+    уменьшает по большей стороне до IMAGE_MAX_SIDE и пережимает в JPEG.
+    """
+    if not any(raw.startswith(m) for m in _MAGIC):
+        return None
+
+    if not PIL_AVAILABLE:
+        return raw if len(raw) <= TG_PHOTO_MAX_BYTES else None
+
+    try:
+        with Image.open(io.BytesIO(raw)) as probe:
+            probe.verify()
+        img = Image.open(io.BytesIO(raw))
+        img.load()
+    except Exception as e:
+        logger.warning(f"🖼 Битая картинка: {e}")
+        return None
+
+    w, h = img.size
+    if not w or not h or max(w, h) / min(w, h) > TG_PHOTO_MAX_RATIO:
+        return None
+
+    if max(w, h) > settings.IMAGE_MAX_SIDE or w + h > TG_PHOTO_MAX_DIMENSIONS_SUM:
+        img.thumbnail((settings.IMAGE_MAX_SIDE, settings.IMAGE_MAX_SIDE))
+
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+
+    for quality in (85, 75, 60):
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=quality, optimize=True)
+        data = buf.getvalue()
+        if len(data) <= TG_PHOTO_MAX_BYTES:
+            return data
+    return None
+
+
+def prepare_image(url: Optional[str]) -> Optional[str]:
+    """
+    Скачивает и проверяет картинку на этапе сбора (а не в момент публикации).
+    Возвращает content hash, по которому картинка лежит в локальном кэше,
+    или None, если картинку использовать нельзя (тогда пост уйдёт без фото).
+    Синхронная — из async-кода вызывать через asyncio.to_thread.
+    """
+    if not url:
+        return None
+
+    db = SessionLocal()
+    try:
+        known = db.query(ImageAsset).filter(ImageAsset.source_url == url).first()
+        if known and (known.telegram_file_id or os.path.exists(_cache_path(known.content_hash))):
+            return known.content_hash
+
+        raw = _download(url)
+        if not raw:
+            return None
+
+        content_hash = hashlib.sha256(raw).hexdigest()
+        asset = db.get(ImageAsset, content_hash)
+        path = _cache_path(content_hash)
+
+        if not os.path.exists(path):
+            data = _normalize(raw)
+            if not data:
+                logger.warning(f"🖼 Картинка не прошла проверку: {url}")
+                return None
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+            size = len(data)
+        else:
+            size = os.path.getsize(path)
+
+        if asset is None:
+            # Тот же логотип министерства по другому URL — запись одна, file_id общий
+            db.add(ImageAsset(content_hash=content_hash, source_url=url, size_bytes=size))
+            db.commit()
+        return content_hash
+    except Exception as e:
+        db.rollback()
+        logger.error(f"🖼 Ошибка подготовки картинки {url}: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def get_photo(content_hash: str):
+    """
+    Что передать в send_photo: file_id (если уже загружали) или байты из кэша.
+    Возвращает (photo, is_file_id) или (None, False), если ничего нет.
+    """
+    db = SessionLocal()
+    try:
+        asset = db.get(ImageAsset, content_hash)
+        if asset and asset.telegram_file_id:
+            return asset.telegram_file_id, True
+    finally:
+        db.close()
+
+    path = _cache_path(content_hash)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read(), False
+    return None, False
+
+
+def remember_file_id(content_hash: str, file_id: str) -> None:
+    """Сохраняет file_id после первой загрузки — дальше картинку не грузим повторно."""
+    db = SessionLocal()
+    try:
+        asset = db.get(ImageAsset, content_hash)
+        if asset is None:
+            asset = ImageAsset(content_hash=content_hash)
+            db.add(asset)
+        asset.telegram_file_id = file_id
+        asset.uploaded_at = datetime.utcnow()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"🖼 Не удалось сохранить file_id: {e}")
+    finally:
+        db.close()
@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+# lang истории, у которой есть и RU, и KZ версия (одна новость gov.kz на двух языках)
+LANG_BOTH = "BI"
+
+
+@dataclass(slots=True)
+class NewsItem:
+    """
+    Новость между скрапером и БД. slots — без __dict__ на каждый элемент;
+    original_text (самая тяжёлая часть) живёт, только пока элемент не сохранён.
+    """
+    title: str
+    source_name: str
+    source_url: str
+    original_text: str = ""
+    image_url: Optional[str] = None
+    published_at: Optional[datetime] = None
+    fetched_at: Optional[datetime] = None
+    topic_score: Optional[int] = None
+    # gov.kz: id новости общий для языковых версий; lang — RU/KZ ленты или LANG_BOTH после склейки
+    gov_id: Optional[str] = None
+    lang: Optional[str] = None
+    title_kz: Optional[str] = None
+    original_text_kz: str = ""
+    source_url_kz: Optional[str] = None
+
+    def release_body(self) -> None:
+        """Отпускает текст после сохранения: в БД он уже есть, в памяти больше не нужен."""
+        self.original_text = ""
+        self.original_text_kz = ""
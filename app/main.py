@@ -1,10 +1,29 @@
 import asyncio
 import logging
 import os
-from fastapi import FastAPI, BackgroundTasks
-from sqlalchemy import text
-from .database import init_db, cleanup_old_tourism_news, engine
-from .scheduler import start_scheduler, process_news_task, scrape_news_task
+import secrets
+from datetime import datetime
+from typing import Optional
+from fastapi import FastAPI, BackgroundTasks, Depends, Header, HTTPException, Response
+from fastapi.responses import FileResponse
+from .database import init_db, cleanup_old_tourism_news
+from .scheduler import start_scheduler, process_news_task, scrape_news_task, poll_due_sources
+from .outbox import reconcile_outbox
+from .ranking import backfill_ranks
+from .retries import retry_report
+from .archive import list_archive, get_archive_item
+from .sharding import INSTANCE_ID, heartbeat, release, my_sources, status as sharding_status
+from .polling import poller
+from .scraper import scraper
+from .source_health import breakers
+from .trace import freshness_report, item_trace
+from .profiling import profile_cycle, profile_path
+from .metrics import PIPELINE_QUEUE_DEPTH, CONTENT_TYPE_LATEST as METRICS_CONTENT_TYPE, render as render_metrics
+from .publisher import publisher
+from .pipeline import pipeline
+from .cpu import shutdown_pool
+from .watchdog import watchdog
+from .config import settings
 
 # Setup logging
 logging.basicConfig(
@@ -13,92 +32,52 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Фиксированный ID блокировки (Advisory Lock)
-SCHEDULER_LOCK_ID = 1234567890 
-
 app = FastAPI(title="GovContext AI Editorial System")
 
-def _try_acquire_scheduler_lock():
-    """
-    Пытается захватить advisory lock. 
-    Возвращает (connection, True) если успешно, иначе (None, False).
-    """
-    try:
-        conn = engine.connect()
-        # Проверяем, не занят ли замок
-        # Используем session-level lock (pg_try_advisory_lock)
-        result = conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": SCHEDULER_LOCK_ID})
-        got_lock = result.scalar()
-        
-        if got_lock:
-            return conn, True
-        else:
-            conn.close()
-            return None, False
-    except Exception as e:
-        logger.warning(f"Ошибка блокировки: {e}. Игнорируем и запускаемся.", exc_info=True)
-        # Если база лежит или глючит - лучше запуститься, чем молчать
-        return None, True 
-
 @app.on_event("startup")
 async def startup_event():
     logger.info("Initializing database...")
+    watchdog.start()
     init_db()
     logger.info("Cleaning up old news...")
     cleanup_old_tourism_news()
+    logger.info("Reconciling publish outbox...")
+    reconcile_outbox()
+    backfill_ranks()
+    await publisher.start()
 
-    # --- ЦИКЛ ОЖИДАНИЯ (Решает проблему Rolling Update) ---
-    logger.info("🔐 Попытка захватить лидерство...")
+    # --- ШАРДИРОВАНИЕ ---
+    # Вместо одного лидера: каждая реплика держит lease и скрапит свою долю источников.
+    # Новая реплика забирает часть источников со следующего цикла, упавшая — отдаёт через lease.
+    live = heartbeat()
+    logger.info(f"🪪 Реплика {INSTANCE_ID}. Живые реплики: {live}")
+
+    start_scheduler()
     
-    lock_conn = None
-    is_leader = False
-
-    # Пробуем 15 раз по 2 секунды (30 секунд на пересменку контейнеров)
-    for i in range(15):
-        lock_conn, is_leader = _try_acquire_scheduler_lock()
-        
-        if is_leader:
-            break
-        
-        logger.warning(f"⏳ Замок занят (старый бот еще жив). Ждем... ({i+1}/15)")
-        await asyncio.sleep(2)
-
-    # Если спустя 30 секунд замок всё еще занят — запускаемся принудительно (на всякий случай)
-    if not is_leader:
-        logger.error("⚠️ Не удалось получить замок по-хорошему. ЗАПУСКАЕМСЯ ПРИНУДИТЕЛЬНО (Force Start).")
-        is_leader = True
-
-    if is_leader:
-        if lock_conn:
-            app.state.scheduler_lock_connection = lock_conn
-        
-        logger.info("✅ ЭТОТ ПРОЦЕСС — ЛИДЕР. Запуск планировщика...")
-        start_scheduler()
-        
-        # Запускаем начальный сбор в фоне
-        asyncio.create_task(scrape_news_task())
+    # Запускаем начальный сбор в фоне (конвейер стартует сбор сам).
+    # При адаптивном опросе — через poll_due_sources: он отмечает источники опрошенными,
+    # и первый тик интервального job не запустит второй скрапинг тех же источников
+    if not settings.PIPELINE_ENABLED:
+        asyncio.create_task(poll_due_sources() if settings.ADAPTIVE_POLLING else scrape_news_task())
         logger.info("🚀 Начальный скрапинг запущен.")
-    else:
-        # Сюда код попасть не должен из-за Force Start выше, но оставим для структуры
-        logger.warning("⚠️ ЗАМОК ЗАНЯТ. Планировщик в режиме ожидания.")
 
 @app.on_event("shutdown")
-def shutdown_event():
-    if getattr(app.state, "scheduler_lock_connection", None) is not None:
-        try:
-            # Принудительно отпускаем замок при выключении
-            app.state.scheduler_lock_connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": SCHEDULER_LOCK_ID})
-            app.state.scheduler_lock_connection.close()
-            logger.info("🔓 Замок освобожден.")
-        except Exception as e:
-            logger.error(f"Ошибка при освобождении замка: {e}")
+async def shutdown_event():
+    await watchdog.stop()
+    await pipeline.stop()
+    await publisher.shutdown()
+    await scraper.aclose()
+    shutdown_pool()
+    release()
+    logger.info("🔓 Lease освобожден.")
 
 @app.get("/")
 async def root():
-    lock_status = "Leader" if getattr(app.state, "scheduler_lock_connection", None) else "Force/Follower"
+    shard = sharding_status()
     return {
         "status": "ok", 
-        "mode": lock_status,
+        "mode": "Coordinator" if shard["coordinator"] else "Worker",
+        "instance": shard,
         "message": "GovContext System is active"
     }
 
@@ -109,9 +88,104 @@ async def trigger_scrape(background_tasks: BackgroundTasks):
     background_tasks.add_task(scrape_news_task)
     return {"message": "Scrape task triggered manually in background"}
 
+def _require_admin(x_admin_token: str = Header(default="")):
+    if not settings.ADMIN_TOKEN or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+@app.post("/admin/profile", dependencies=[Depends(_require_admin)])
+async def admin_profile(task: str = "scrape", top: int = 40):
+    """Один цикл scrape_news_task / process_news_task под cProfile + время блокировки event loop."""
+    tasks = {"scrape": scrape_news_task, "process": process_news_task}
+    if task not in tasks:
+        raise HTTPException(status_code=400, detail=f"task must be one of {list(tasks)}")
+    try:
+        return await profile_cycle(task, tasks[task], top)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/admin/profile/{filename}", dependencies=[Depends(_require_admin)])
+async def admin_profile_download(filename: str):
+    path = profile_path(filename)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=filename)
+
+@app.get("/publisher/stats")
+async def publisher_stats():
+    """Задержка отправки в Telegram по каждому чату."""
+    return {
+        "chats": {"RU": publisher.target_chats("RU"), "KZ": publisher.target_chats("KZ")},
+        "latency": publisher.latency_stats(),
+    }
+
+@app.get("/sources/schedule")
+async def sources_schedule():
+    """Интервал и следующий срок опроса по каждому источнику шарда этой реплики."""
+    shard = my_sources(scraper.direct_sources)
+    return {"adaptive": settings.ADAPTIVE_POLLING, "sources": poller.snapshot(shard)}
+
+@app.get("/sources/health")
+async def sources_health():
+    """Успешность, задержки и состояние circuit breaker по каждому источнику."""
+    return {"sources": breakers.snapshot()}
+
+@app.get("/pipeline")
+async def pipeline_stats():
+    """Глубина очереди и счётчики по каждой стадии конвейера."""
+    return pipeline.stats()
+
+@app.get("/trace/freshness")
+async def trace_freshness(days: int = 7, slowest: int = 10):
+    """Перцентили свежести (сайт → пост) и самая медленная стадия по каждой новости."""
+    return await asyncio.to_thread(freshness_report, days, slowest)
+
+@app.get("/plan")
+async def publish_plan():
+    """Дневной план публикаций: слоты, язык каждого и входные данные расчёта."""
+    from .planner import planner
+    return planner.snapshot()
+
+@app.get("/retries")
+async def retries_status(days: int = 7):
+    """Повторы: сколько ждёт, сколько созрело, сколько спасено и на чём сдались."""
+    return await asyncio.to_thread(retry_report, days)
+
+@app.get("/archive")
+async def archive(status: Optional[str] = None, source: Optional[str] = None, lang: Optional[str] = None,
+                  date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                  q: Optional[str] = None, config: str = "both", cursor: Optional[str] = None, limit: int = 50):
+    """Архив новыми первыми: фильтры, полнотекстовый поиск (q) и keyset-курсор next_cursor."""
+    try:
+        return await asyncio.to_thread(list_archive, status, source, lang, date_from, date_to,
+                                       q, config, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/archive/{news_id}")
+async def archive_item(news_id: int):
+    item = await asyncio.to_thread(get_archive_item, news_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="News not found")
+    return item
+
+@app.get("/trace/{news_id}")
+async def trace_item(news_id: int):
+    trace = await asyncio.to_thread(item_trace, news_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="News not found")
+    return trace
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus: счётчики и гистограммы по scraper/scheduler/rewriter/publisher."""
+    for stage, stats in pipeline.stats()["stages"].items():
+        PIPELINE_QUEUE_DEPTH.labels(stage).set(stats["depth"])
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/health")
 async def health():
-    return {"status": "healthy"}
+    """Жив ли сервис и насколько отзывчив event loop: перцентили задержки и последние блокировки."""
+    return {"status": "healthy", "event_loop": watchdog.snapshot()}
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", "8000"))
@@ -0,0 +1,110 @@
+import logging
+
+# prometheus_client — опционально: без него метрики превращаются в no-op,
+# а /metrics отвечает пустым телом. Горячие пути от этого не меняются.
+try:
+    from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+if not PROMETHEUS_AVAILABLE:
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+    class _NoopMetric:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def labels(self, *args, **kwargs):
+            return self
+
+        def inc(self, amount=1):
+            pass
+
+        def dec(self, amount=1):
+            pass
+
+        def set(self, value):
+            pass
+
+        def observe(self, value):
+            pass
+
+    Counter = Gauge = Histogram = _NoopMetric
+
+    def generate_latest(*args, **kwargs) -> bytes:
+        return b""
+
+
+# Бакеты под реальные масштабы: API gov.kz — доли секунды, Playwright и LLM — секунды
+_FAST = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 15, 30)
+_SLOW = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+
+# --- SCRAPER ---
+SCRAPE_CYCLE_SECONDS = Histogram(
+    "govcontext_scrape_cycle_seconds", "Full scrape_news_task cycle duration", buckets=_SLOW)
+TOKEN_HARVEST_SECONDS = Histogram(
+    "govcontext_token_harvest_seconds", "Playwright gov.kz token harvest duration", buckets=_SLOW)
+TOKEN_HARVEST_FAILURES = Counter(
+    "govcontext_token_harvest_failures_total", "Failed Playwright token harvests")
+SOURCE_API_SECONDS = Histogram(
+    "govcontext_source_api_seconds", "gov.kz content-manager API latency", ["source"], buckets=_FAST)
+SOURCE_API_ERRORS = Counter(
+    "govcontext_source_api_errors_total", "gov.kz API errors", ["source", "kind"])
+SOURCE_SKIPPED = Counter(
+    "govcontext_source_skipped_total", "Source polls skipped by open circuit breaker", ["source"])
+ITEMS_SCRAPED = Counter(
+    "govcontext_items_scraped_total", "Items returned by sources before dedup")
+DEDUP_REJECTED = Counter(
+    "govcontext_dedup_rejected_total", "Items rejected before persistence", ["reason"])
+DRAFTS_ADDED = Counter(
+    "govcontext_drafts_added_total", "New drafts persisted")
+ENRICH_PAGES = Counter(
+    "govcontext_enrich_pages_total", "Detail-page enrichment by outcome", ["outcome"])
+ENRICH_BYTES = Counter(
+    "govcontext_enrich_bytes_total", "Detail-page bytes read before stopping the stream")
+
+# --- SCHEDULER ---
+DRAFT_BACKLOG = Gauge(
+    "govcontext_draft_backlog", "Drafts waiting to be rewritten/published")
+PROCESS_CYCLE_SECONDS = Histogram(
+    "govcontext_process_cycle_seconds", "process_news_task duration", buckets=_SLOW)
+PIPELINE_QUEUE_DEPTH = Gauge(
+    "govcontext_pipeline_queue_depth", "Items waiting in a pipeline stage queue", ["stage"])
+
+RETRIES_SCHEDULED = Counter(
+    "govcontext_retries_scheduled_total", "News items rescheduled after a transient error", ["error_class"])
+RETRY_GIVE_UPS = Counter(
+    "govcontext_retry_give_ups_total", "News items that exhausted retries", ["error_class"])
+ITEM_FAILURES = Counter(
+    "govcontext_item_failures_total", "News items failed with a permanent error", ["error_class"])
+
+# --- REWRITER ---
+LLM_SECONDS = Histogram(
+    "govcontext_llm_request_seconds", "LLM request latency", ["provider"], buckets=_SLOW)
+LLM_TOKENS = Counter(
+    "govcontext_llm_tokens_total", "LLM tokens used", ["provider", "kind"])
+LLM_ERRORS = Counter(
+    "govcontext_llm_errors_total", "LLM request errors", ["provider"])
+
+# --- PUBLISHER ---
+TELEGRAM_SEND_SECONDS = Histogram(
+    "govcontext_telegram_send_seconds", "Telegram send latency", ["chat"], buckets=_FAST)
+TELEGRAM_ERRORS = Counter(
+    "govcontext_telegram_errors_total", "Telegram send errors", ["chat", "kind"])
+TELEGRAM_RATE_WAIT_SECONDS = Histogram(
+    "govcontext_telegram_rate_wait_seconds", "Time spent waiting for Telegram rate limits", buckets=_FAST)
+
+# --- EVENT LOOP (watchdog.py) ---
+LOOP_LAG_SECONDS = Histogram(
+    "govcontext_event_loop_lag_seconds", "Event loop wake-up lag",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+LOOP_BLOCKS = Counter(
+    "govcontext_event_loop_blocks_total", "Event loop stalls above WATCHDOG_BLOCK_THRESHOLD_MS")
+
+
+def render() -> bytes:
+    return generate_latest()
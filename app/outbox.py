@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from .database import SessionLocal, NewsArchive, NewsStatus, PublishOutbox, OutboxStatus
+from .publisher import publisher
+from .retries import TELEGRAM_REJECTED, TELEGRAM_UNAVAILABLE, classify, record_failure
+from .sharding import INSTANCE_ID
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 30 * 60
+
+_worker_lock = asyncio.Lock()
+
+
+def make_idempotency_key(news_id: int, chat_id: str) -> str:
+    return f"news:{news_id}:chat:{chat_id}"
+
+
+def enqueue_post(db, news: NewsArchive, text: str, image_url: Optional[str] = None,
+                 chat_id: Optional[str] = None, is_primary: bool = True,
+                 image_hash: Optional[str] = None) -> PublishOutbox:
+    """
+    Кладёт пост в outbox. НЕ делает commit — вызывающий код коммитит
+    вместе со сменой статуса новости, чтобы это была одна транзакция.
+    """
+    chat_id = chat_id or settings.TELEGRAM_CHAT_ID
+    row = PublishOutbox(
+        news_id=news.id,
+        chat_id=str(chat_id),
+        is_primary=is_primary,
+        idempotency_key=make_idempotency_key(news.id, chat_id),
+        text=text,
+        image_url=image_url,
+        image_hash=image_hash,
+        status=OutboxStatus.pending.value,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(row)
+    return row
+
+
+def enqueue_or_skip(db, news: NewsArchive, text: str, image_url: Optional[str] = None,
+                    chat_ids: Optional[List[str]] = None) -> bool:
+    """
+    Коммитит новость в статусе queued вместе с записями outbox (по одной на чат,
+    первый чат — основной). Если ключ уже есть (другая реплика успела раньше) — откатываемся.
+    """
+    news.status = NewsStatus.queued.value
+    news.queued_at = datetime.utcnow()
+    for i, chat_id in enumerate(chat_ids or [settings.TELEGRAM_CHAT_ID]):
+        enqueue_post(db, news, text, image_url, chat_id=chat_id, is_primary=(i == 0),
+                     image_hash=news.image_hash)
+    try:
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        logger.info(f"⏭ Outbox: новость {news.id} уже в очереди")
+        return False
+
+
+def _backoff(attempts: int) -> timedelta:
+    """Экспоненциальная задержка с jitter: 30с, 60с, 120с ... до 30 минут."""
+    delay = min(BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def reconcile_outbox() -> None:
+    """
+    Разбор "хвостов" после рестарта:
+    - claimed, но отправка не начиналась → обратно в pending (безопасно);
+    - sending без message_id → unknown: Telegram мог уже принять пост,
+      повтор дал бы дубль, поэтому оставляем на ручную проверку;
+    - sent, но новость не помечена published → дописываем статус.
+    """
+    db = SessionLocal()
+    try:
+        stale = datetime.utcnow() - timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT_SECONDS)
+
+        released = db.query(PublishOutbox).filter(
+            PublishOutbox.status == OutboxStatus.claimed.value,
+            PublishOutbox.claimed_at < stale,
+        ).update({
+            PublishOutbox.status: OutboxStatus.pending.value,
+            PublishOutbox.claimed_by: None,
+        }, synchronize_session=False)
+
+        ambiguous = db.query(PublishOutbox).filter(
+            PublishOutbox.status == OutboxStatus.sending.value,
+            PublishOutbox.claimed_at < stale,
+        ).all()
+        for row in ambiguous:
+            row.status = OutboxStatus.unknown.value
+            row.last_error = f"Process died during send (claimed by {row.claimed_by})"
+            logger.error(f"❓ Outbox {row.idempotency_key}: статус отправки неизвестен, требуется проверка канала")
+
+        orphaned = db.query(PublishOutbox, NewsArchive).join(
+            NewsArchive, NewsArchive.id == PublishOutbox.news_id
+        ).filter(
+            PublishOutbox.status == OutboxStatus.sent.value,
+            NewsArchive.status != NewsStatus.published.value,
+        ).all()
+        for row, news in orphaned:
+            _mark_news_published(news, row)
+
+        db.commit()
+        if released or ambiguous or orphaned:
+            logger.info(f"🔧 Outbox reconcile: released={released}, unknown={len(ambiguous)}, fixed={len(orphaned)}")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Outbox reconcile error: {e}", exc_info=True)
+    finally:
+        db.close()
+
+
+def _claim_batch(limit: int) -> list:
+    """Забирает пачку due-записей. SKIP LOCKED — реплики не мешают друг другу."""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        rows = db.query(PublishOutbox).filter(
+            PublishOutbox.status == OutboxStatus.pending.value,
+            PublishOutbox.next_attempt_at <= now,
+        ).order_by(PublishOutbox.next_attempt_at).limit(limit).with_for_update(skip_locked=True).all()
+
+        for row in rows:
+            row.status = OutboxStatus.claimed.value
+            row.claimed_by = INSTANCE_ID  # видно, какая реплика что отправляла
+            row.claimed_at = now
+        db.commit()
+        return [row.id for row in rows]
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _mark_news_published(news: NewsArchive, row: PublishOutbox) -> None:
+    # Новость считается опубликованной по основному каналу
+    if not row.is_primary or news.status == NewsStatus.published.value:
+        return
+    news.status = NewsStatus.published.value
+    news.telegram_post_id = row.telegram_message_id
+    news.published_at = row.sent_at
+
+
+async def _deliver(outbox_id: int) -> None:
+    from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+    db = SessionLocal()
+    try:
+        row = db.get(PublishOutbox, outbox_id)
+        if row is None or row.status != OutboxStatus.claimed.value:
+            return
+
+        # Фиксируем факт начала отправки ДО вызова Telegram
+        row.status = OutboxStatus.sending.value
+        row.attempts = (row.attempts or 0) + 1
+        db.commit()
+
+        try:
+            message_id = await publisher.publish(row.text, row.image_url, chat_id=row.chat_id,
+                                                 image_hash=row.image_hash)
+        except RetryAfter as e:
+            _schedule_retry(db, row, f"RetryAfter: {e}", timedelta(seconds=float(e.retry_after) + 1))
+            return
+        except (BadRequest, Forbidden) as e:
+            _fail(db, row, f"{type(e).__name__}: {e}", TELEGRAM_REJECTED)
+            return
+        except NetworkError as e:
+            # TimedOut тоже сюда: PTB кидает его в основном до доставки (connect/pool)
+            _schedule_retry(db, row, f"{type(e).__name__}: {e}", _backoff(row.attempts))
+            return
+        except Exception as e:
+            _fail(db, row, f"{type(e).__name__}: {e}", classify(e))
+            return
+
+        row.status = OutboxStatus.sent.value
+        row.telegram_message_id = str(message_id)
+        row.sent_at = datetime.utcnow()
+        row.last_error = None
+        news = db.get(NewsArchive, row.news_id)
+        if news is not None:
+            _mark_news_published(news, row)
+        db.commit()
+        logger.info(f"✅ Published: {message_id} ({row.idempotency_key})")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Outbox delivery error ({outbox_id}): {e}", exc_info=True)
+    finally:
+        db.close()
+
+
+def _schedule_retry(db, row: PublishOutbox, error: str, delay: timedelta) -> None:
+    if row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        _fail(db, row, f"Max attempts reached. Last error: {error}", TELEGRAM_UNAVAILABLE)
+        return
+    row.status = OutboxStatus.pending.value
+    row.claimed_by = None
+    row.next_attempt_at = datetime.utcnow() + delay
+    row.last_error = error
+    db.commit()
+    logger.warning(f"🔁 Outbox {row.idempotency_key}: попытка {row.attempts}, повтор через {delay.total_seconds():.0f} сек ({error})")
+
+
+def _fail(db, row: PublishOutbox, error: str, error_class: str) -> None:
+    row.status = OutboxStatus.failed.value
+    row.last_error = error
+    news = db.get(NewsArchive, row.news_id)
+    if news is not None and row.is_primary:
+        # Временный класс → новость уйдёт в retry, и retries.requeue_publish вернёт запись в очередь
+        record_failure(news, error_class, error)
+    db.commit()
+    logger.error(f"❌ Outbox {row.idempotency_key}: {error}")
+
+
+async def publish_outbox_task():
+    """Воркер outbox: забирает due-записи и отправляет их в Telegram."""
+    if _worker_lock.locked():
+        return
+    async with _worker_lock:
+        try:
+            claimed = _claim_batch(settings.OUTBOX_BATCH_SIZE)
+        except Exception as e:
+            logger.error(f"Outbox claim error: {e}", exc_info=True)
+            return
+        # Параллельно: один пост уходит во все чаты сразу, лимиты держит очередь publisher
+        await asyncio.gather(*(_deliver(outbox_id) for outbox_id in claimed))
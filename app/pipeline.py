@@ -0,0 +1,309 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .database import SessionLocal, NewsArchive, NewsStatus
+from .scraper import scraper, parse_gov_kz_items, gov_kz_langs, pair_languages
+from .cpu import map_chunked, fuzzy_duplicate_flags
+from .topics import topic_scores
+from .items import NewsItem, LANG_BOTH
+from .ranking import rank_score, is_top_draft
+from .metrics import DEDUP_REJECTED
+from .rewriter import rewriter
+from .images import prepare_image
+from .sharding import my_sources
+from .polling import poller
+from .config import settings
+from .scheduler import is_fuzzy_duplicate, is_text_kazakh, known_story, story_variant
+
+logger = logging.getLogger(__name__)
+
+# Окно нечёткой проверки дублей заголовков — как в scrape_news_task
+DUP_WINDOW_DAYS = 3
+
+
+class Stage:
+    """
+    Одна стадия конвейера: очередь с ограничением + N воркеров.
+    Воркер ждёт место в очереди следующей стадии (await put) — так медленная
+    стадия притормаживает предыдущие (backpressure).
+    """
+
+    def __init__(self, name: str, handler: Callable[[object], Awaitable[List]], workers: int, maxsize: int):
+        self.name = name
+        self.handler = handler
+        self.workers = max(workers, 1)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.next: Optional["Stage"] = None
+        # После persist потеря элемента не страшна: он уже лежит черновиком в БД
+        self.spill_when_full = False
+        self.processed = 0
+        self.errors = 0
+        self.spilled = 0
+        self.busy = 0
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, idx: int):
+        while True:
+            item = await self.queue.get()
+            self.busy += 1
+            try:
+                results = await self.handler(item)
+                self.processed += 1
+                if self.next is not None:
+                    for res in results or []:
+                        await self._forward(res)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Pipeline [{self.name}#{idx}] error: {e}", exc_info=True)
+            finally:
+                self.busy -= 1
+                self.queue.task_done()
+
+    async def _forward(self, res):
+        if self.spill_when_full and self.next.queue.full():
+            self.spilled += 1
+            return
+        await self.next.queue.put(res)
+
+    def stats(self) -> Dict:
+        return {
+            "depth": self.queue.qsize(),
+            "maxsize": self.queue.maxsize,
+            "workers": self.workers,
+            "busy": self.busy,
+            "processed": self.processed,
+            "errors": self.errors,
+            "spilled": self.spilled,
+        }
+
+
+class NewsPipeline:
+    """
+    fetch → extract → dedup → persist → rewrite.
+    Новость идёт дальше сразу после скачивания источника, без ожидания
+    следующего тика планировщика. Публикует только process_news_task (слот плана
+    или интервал): конвейер лишь заранее переписывает лучшие черновики, чтобы
+    слоту не ждать LLM.
+    """
+
+    def __init__(self):
+        self._stages: Optional[List[Stage]] = None
+        self._feeder: Optional[asyncio.Task] = None
+        # (created_at, title) по возрастанию времени: старые отрезаются слева перед каждой пачкой
+        self._recent_titles: deque = deque()
+
+    @property
+    def stages(self) -> List[Stage]:
+        """Стадии (и их очереди) создаются при первом обращении — размеры берутся из settings."""
+        if self._stages is None:
+            size = settings.PIPELINE_QUEUE_SIZE
+            stages = [
+                Stage("fetch", self._fetch, settings.PIPELINE_FETCH_WORKERS, size),
+                Stage("extract", self._extract, settings.PIPELINE_EXTRACT_WORKERS, size),
+                Stage("dedup", self._dedup, 1, size),  # один воркер — без гонок по recent_titles
+                Stage("persist", self._persist, 1, size),
+                Stage("rewrite", self._rewrite, settings.PIPELINE_REWRITE_WORKERS, size),
+            ]
+            for cur, nxt in zip(stages, stages[1:]):
+                cur.next = nxt
+            stages[3].spill_when_full = True
+            self._stages = stages
+        return self._stages
+
+    @property
+    def running(self) -> bool:
+        return self._feeder is not None and not self._feeder.done()
+
+    def start(self):
+        if self.running:
+            return
+        check_date = datetime.utcnow() - timedelta(days=DUP_WINDOW_DAYS)
+        db = SessionLocal()
+        try:
+            self._recent_titles = deque(
+                (r[1], r[0]) for r in db.query(NewsArchive.title, NewsArchive.created_at)
+                .filter(NewsArchive.created_at >= check_date)
+                .order_by(NewsArchive.created_at).all()
+            )
+        finally:
+            db.close()
+        for stage in self.stages:
+            stage.start()
+        self._feeder = asyncio.create_task(self._feed())
+        logger.info(f"🧵 Pipeline started: {[(s.name, s.workers) for s in self.stages]}")
+
+    async def stop(self):
+        if self._feeder:
+            self._feeder.cancel()
+            await asyncio.gather(self._feeder, return_exceptions=True)
+            self._feeder = None
+        for stage in self.stages:
+            await stage.stop()
+
+    async def _feed(self):
+        """
+        Ставит источники своего шарда в очередь fetch: по адаптивному расписанию
+        (раз в минуту — те, у кого подошёл срок) или все раз в SCRAPE_INTERVAL_MINUTES.
+        """
+        fetch = self.stages[0]
+        while True:
+            shard = [s for s in my_sources(scraper.direct_sources) if s.get("gov_kz")]
+            if settings.ADAPTIVE_POLLING:
+                shard = poller.due(shard)
+            for source in shard:
+                poller.mark_polled(source["name"])
+                await fetch.queue.put(source)
+            await asyncio.sleep(60 if settings.ADAPTIVE_POLLING else settings.SCRAPE_INTERVAL_MINUTES * 60)
+
+    def stats(self) -> Dict:
+        return {"running": self.running, "stages": {s.name: s.stats() for s in self.stages}}
+
+    # --- СТАДИИ ---
+
+    async def _fetch(self, source: Dict) -> List[List[NewsItem]]:
+        tokens = await scraper.get_tokens()
+        if not tokens:
+            logger.error(f"❌ Pipeline: нет токенов gov.kz, пропускаем {source['name']}")
+            return []
+        raw_items = []
+        for lang in gov_kz_langs():
+            raw_items.extend(await asyncio.to_thread(scraper._fetch_gov_kz_items, source, tokens, lang))
+        items = pair_languages(await map_chunked(parse_gov_kz_items, [(source, item) for item in raw_items]))
+        if not items:
+            poller.record_result(source["name"], 0)
+            return []
+        # Дальше до dedup источник идёт одной пачкой: там новые считаются разом для poller
+        return [items]
+
+    async def _extract(self, batch: List[NewsItem]) -> List[List[NewsItem]]:
+        # Страницу качаем, только если API не дал текст, картинку или дату
+        return [await scraper.enrich_many(batch)]
+
+    async def _dedup(self, batch: List[NewsItem]) -> List[NewsItem]:
+        """Пачка одного источника; новые идут в persist по одной, в poller — одним итогом."""
+        # Тематика и SequenceMatcher — одним вызовом на всю пачку источника, не в event loop
+        scores = await map_chunked(topic_scores, [(item.title, item.original_text) for item in batch],
+                                   settings.TOPIC_KEYWORDS)
+        check_date = datetime.utcnow() - timedelta(days=DUP_WINDOW_DAYS)
+        while self._recent_titles and self._recent_titles[0][0] < check_date:
+            self._recent_titles.popleft()
+        recent = [title for _, title in self._recent_titles]
+        dup_flags = await map_chunked(fuzzy_duplicate_flags, [item.title for item in batch], recent)
+        fresh: List[NewsItem] = []
+        for item, score, is_dup in zip(batch, scores, dup_flags):
+            title = item.title
+            if score < settings.TOPIC_MIN_SCORE:
+                DEDUP_REJECTED.labels("off_topic").inc()
+                continue
+            item.topic_score = score
+            db = SessionLocal()
+            try:
+                if known_story(db, item):
+                    DEDUP_REJECTED.labels("url").inc()
+                    continue
+            finally:
+                db.close()
+            # Флаги посчитаны до пачки — дубли внутри неё сверяем с уже принятыми
+            if is_dup or is_fuzzy_duplicate(title, [news.title for news in fresh]):
+                DEDUP_REJECTED.labels("fuzzy_title").inc()
+                continue
+
+            pub = item.published_at or datetime.utcnow()
+            if getattr(pub, "tzinfo", None):
+                pub = pub.replace(tzinfo=None)
+            if pub < datetime.utcnow() - timedelta(days=settings.NEWS_MAX_AGE_DAYS):
+                DEDUP_REJECTED.labels("too_old").inc()
+                continue
+            item.published_at = pub
+            self._recent_titles.append((datetime.utcnow(), title))
+            fresh.append(item)
+        poller.record_result(batch[0].source_name, len(fresh))
+        return fresh
+
+    async def _persist(self, item: NewsItem) -> List[int]:
+        title = item.title
+        original_content = item.original_text
+        if not original_content or len(original_content) < 50:
+            original_content = title
+
+        image_url = item.image_url
+        image_hash = await asyncio.to_thread(prepare_image, image_url)
+        if image_url and not image_hash:
+            image_url = None
+
+        db = SessionLocal()
+        try:
+            news = NewsArchive(
+                title=title[:490],
+                original_text=original_content,
+                source_name=item.source_name,
+                source_url=item.source_url,
+                source_published_at=item.published_at,
+                image_url=image_url,
+                image_hash=image_hash,
+                fetched_at=item.fetched_at,
+                topic_score=item.topic_score,
+                lang=LANG_BOTH if item.lang == LANG_BOTH else ("KZ" if is_text_kazakh(original_content) else "RU"),
+                rank_score=rank_score(item.published_at, item.topic_score, item.source_name),
+                gov_id=item.gov_id,
+                title_kz=item.title_kz[:490] if item.title_kz else None,
+                original_text_kz=item.original_text_kz or None,
+                source_url_kz=item.source_url_kz,
+                status=NewsStatus.draft.value,
+            )
+            db.add(news)
+            db.commit()
+            item.release_body()
+            logger.info(f"💾 Pipeline: draft {news.id} ({item.source_name})")
+            return [news.id]
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _rewrite(self, news_id: int) -> List:
+        """Последняя стадия: переписанный черновик ждёт своего слота в process_news_task."""
+        db = SessionLocal()
+        try:
+            news = db.get(NewsArchive, news_id)
+            if news is None or news.status != NewsStatus.draft.value:
+                return []
+            # Двуязычную историю не трогаем: язык выберет слот публикации по ротации. Здесь вся
+            # пачка получила бы один и тот же язык — ротация на момент пачки одна.
+            if news.lang == LANG_BOTH:
+                return []
+            # Черновики из хвоста рейтинга могут не дойти до публикации — LLM на них не тратим
+            if not news.rewritten_text and is_top_draft(db, news, settings.PIPELINE_PREWRITE_TOP):
+                source_text, _, _ = story_variant(news)
+                started = datetime.utcnow()
+                rewritten, usage = await rewriter.rewrite_with_usage(source_text)
+                if usage.get("errors") or not rewritten:
+                    # LLM недоступен (rewriter отдал обрезанный оригинал) — останется черновиком,
+                    # process_news_task попробует позже
+                    return []
+                news.rewritten_text = rewritten
+                news.rewrite_started_at = started
+                news.rewrite_finished_at = datetime.utcnow()
+                db.commit()
+                logger.info(f"✍️ Pipeline: draft {news_id} rewritten ahead of its slot")
+            return []
+        finally:
+            db.close()
+
+
+pipeline = NewsPipeline()
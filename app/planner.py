@@ -0,0 +1,112 @@
+"""
+Дневной план публикаций: слоты на весь день считаются один раз (в начале суток и при старте),
+и APScheduler будит process_news_task только в эти моменты — ночью ни одного тика и запроса в БД.
+
+Каждый слот несёт язык (чередование 2 RU / 1 KZ продолжается с последних постов),
+а шаг между слотами подбирается под объём очереди: бэклог (или суточный приток, если он
+больше) распределяется по рабочему окну, но не чаще PUBLISH_INTERVAL_MINUTES
+и не реже PLAN_MAX_INTERVAL_MINUTES.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+
+from .config import settings
+from .database import SessionLocal, NewsArchive, NewsStatus
+from .scheduler import TIMEZONE, WORK_START, WORK_END, process_news_task, recent_published_langs, rotation_next
+
+logger = logging.getLogger(__name__)
+
+SLOT_JOB_PREFIX = "publish-slot-"
+
+
+@dataclass(slots=True)
+class Slot:
+    at: datetime   # aware, Asia/Almaty
+    lang: str
+
+
+def plan_day(day: date, now: datetime, backlog: int, expected_inflow: int, history: List[str]) -> List[Slot]:
+    """Чистая функция: слоты на day начиная с now (оба — в TIMEZONE)."""
+    window_start = TIMEZONE.localize(datetime.combine(day, WORK_START))
+    window_end = TIMEZONE.localize(datetime.combine(day, WORK_END))
+    start = max(window_start, now)
+    if start >= window_end:
+        return []
+
+    window_minutes = (window_end - start).total_seconds() / 60
+    wanted = max(backlog, expected_inflow, 1)
+    interval = window_minutes / wanted
+    interval = min(max(interval, settings.PUBLISH_INTERVAL_MINUTES), settings.PLAN_MAX_INTERVAL_MINUTES)
+
+    slots: List[Slot] = []
+    history = list(history)
+    at = start if start == window_start else start + timedelta(minutes=1)
+    while at <= window_end:
+        lang = rotation_next(history)
+        slots.append(Slot(at=at.replace(second=0, microsecond=0), lang=lang))
+        history.insert(0, lang)
+        at += timedelta(minutes=interval)
+    return slots
+
+
+class PublishPlanner:
+    def __init__(self):
+        self._scheduler = None
+        self.slots: List[Slot] = []
+        self.built_at: Optional[datetime] = None
+        self.inputs: Dict = {}
+
+    def attach(self, scheduler) -> None:
+        self._scheduler = scheduler
+        # Новый план — в начале каждых суток по Алматы
+        scheduler.add_job(self.replan, "cron", hour=0, minute=5, timezone=TIMEZONE, id="publish-plan",
+                          replace_existing=True)
+        self.replan()
+
+    def _inputs(self) -> Dict:
+        db = SessionLocal()
+        try:
+            backlog = db.query(func.count(NewsArchive.id)).filter(
+                NewsArchive.status.in_([NewsStatus.draft.value, NewsStatus.retry.value])
+            ).scalar() or 0
+            inflow = db.query(func.count(NewsArchive.id)).filter(
+                NewsArchive.created_at >= datetime.utcnow() - timedelta(days=1)
+            ).scalar() or 0
+            history = recent_published_langs(db)
+        finally:
+            db.close()
+        return {"backlog": backlog, "expected_inflow": inflow, "history": history}
+
+    def replan(self) -> None:
+        inputs = self._inputs()
+        now = datetime.now(TIMEZONE)
+        self.slots = plan_day(now.date(), now, inputs["backlog"], inputs["expected_inflow"], inputs["history"])
+        self.built_at = now
+        self.inputs = inputs
+
+        if self._scheduler is not None:
+            for job in self._scheduler.get_jobs():
+                if job.id.startswith(SLOT_JOB_PREFIX):
+                    job.remove()
+            for i, slot in enumerate(self.slots):
+                self._scheduler.add_job(
+                    process_news_task, "date", run_date=slot.at, kwargs={"lang": slot.lang},
+                    id=f"{SLOT_JOB_PREFIX}{i}", misfire_grace_time=300,
+                )
+        first = self.slots[0].at.strftime("%H:%M") if self.slots else "-"
+        logger.info(f"🗓 Publish plan: {len(self.slots)} slots from {first}, inputs={inputs}")
+
+    def snapshot(self) -> Dict:
+        now = datetime.now(TIMEZONE)
+        return {
+            "built_at": self.built_at.isoformat() if self.built_at else None,
+            "inputs": self.inputs,
+            "slots": [{"at": s.at.isoformat(), "lang": s.lang, "done": s.at <= now} for s in self.slots],
+        }
+
+
+planner = PublishPlanner()
@@ -0,0 +1,145 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+
+from .database import SessionLocal, NewsArchive
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Сколько раз опрашиваем источник за средний интервал между его публикациями
+POLLS_PER_ITEM = 3
+# Окно истории для оценки частоты публикаций
+HISTORY_DAYS = 14
+# Множитель отката для "тихих" опросов и ускорения после свежей публикации
+BACKOFF_FACTOR = 1.5
+SPEEDUP_FACTOR = 0.5
+# Дальше, чем в 4 раза от выученного интервала, не откатываемся
+MAX_BACKOFF_MULTIPLIER = 4
+
+
+class SourceSchedule:
+    __slots__ = ("name", "base_interval", "interval", "next_due", "last_polled", "last_new_at", "rate_per_day")
+
+    def __init__(self, name: str, interval: float):
+        self.name = name
+        self.base_interval = interval   # выученный из истории, минуты
+        self.interval = interval        # текущий, с учётом ускорения/отката
+        self.next_due = datetime.utcnow()
+        self.last_polled: Optional[datetime] = None
+        self.last_new_at: Optional[datetime] = None
+        self.rate_per_day: Optional[float] = None
+
+
+class AdaptivePoller:
+    """
+    Свой интервал опроса для каждого источника: Акимат Алматы с десятками
+    новостей в день опрашиваем часто, министерство с парой новостей в неделю — редко.
+    Интервал учится по истории source_published_at и держится в
+    [SOURCE_POLL_MIN_MINUTES, SOURCE_POLL_MAX_MINUTES].
+    """
+
+    def __init__(self):
+        self._sources: Dict[str, SourceSchedule] = {}
+        self._learned_at: Optional[datetime] = None
+
+    def _clamp(self, minutes: float) -> float:
+        return max(settings.SOURCE_POLL_MIN_MINUTES, min(settings.SOURCE_POLL_MAX_MINUTES, minutes))
+
+    def _get(self, name: str) -> SourceSchedule:
+        if name not in self._sources:
+            self._sources[name] = SourceSchedule(name, float(settings.SCRAPE_INTERVAL_MINUTES))
+        return self._sources[name]
+
+    def learn(self, names: List[str] = ()) -> None:
+        """Пересчитывает базовые интервалы одним GROUP BY по news_archive."""
+        db = SessionLocal()
+        try:
+            since = datetime.utcnow() - timedelta(days=HISTORY_DAYS)
+            rows = db.query(
+                NewsArchive.source_name,
+                func.count(NewsArchive.id),
+                func.min(NewsArchive.source_published_at),
+                func.max(NewsArchive.source_published_at),
+            ).filter(
+                NewsArchive.source_published_at >= since
+            ).group_by(NewsArchive.source_name).all()
+        except Exception as e:
+            logger.error(f"Polling learn error: {e}")
+            return
+        finally:
+            db.close()
+
+        seen = set()
+        for name, count, first, last in rows:
+            if not name:
+                continue
+            seen.add(name)
+            sched = self._get(name)
+            if count >= 2 and first and last and last > first:
+                gap_minutes = (last - first).total_seconds() / 60 / (count - 1)
+            else:
+                # 0-1 публикация за две недели — почти молчит
+                gap_minutes = settings.SOURCE_POLL_MAX_MINUTES * POLLS_PER_ITEM
+            sched.rate_per_day = round(count / HISTORY_DAYS, 2)
+            sched.base_interval = self._clamp(gap_minutes / POLLS_PER_ITEM)
+            if sched.last_polled is None:
+                sched.interval = sched.base_interval
+        # Источник молчал всё окно (если история вообще есть — на пустой базе не трогаем)
+        if rows:
+            for name in names:
+                if name not in seen:
+                    sched = self._get(name)
+                    sched.rate_per_day = 0.0
+                    sched.base_interval = float(settings.SOURCE_POLL_MAX_MINUTES)
+                    if sched.last_polled is None:
+                        sched.interval = sched.base_interval
+        self._learned_at = datetime.utcnow()
+        logger.info(f"📈 Polling intervals learned for {len(rows)} sources")
+
+    def due(self, sources: List[Dict]) -> List[Dict]:
+        """Источники, которым пора на опрос."""
+        if self._learned_at is None or datetime.utcnow() - self._learned_at > timedelta(hours=1):
+            self.learn([s["name"] for s in sources])
+        now = datetime.utcnow()
+        return [s for s in sources if self._get(s["name"]).next_due <= now]
+
+    def mark_polled(self, name: str) -> None:
+        sched = self._get(name)
+        sched.last_polled = datetime.utcnow()
+        sched.next_due = sched.last_polled + timedelta(minutes=sched.interval)
+
+    def record_result(self, name: str, new_items: int) -> None:
+        """
+        Источник только что опубликовал — переопрашиваем быстрее (следующая новость
+        часто идёт пачкой). Пусто — откатываемся к выученному интервалу и дальше.
+        """
+        sched = self._get(name)
+        if new_items > 0:
+            sched.last_new_at = datetime.utcnow()
+            sched.interval = self._clamp(min(sched.interval, sched.base_interval) * SPEEDUP_FACTOR)
+        else:
+            sched.interval = self._clamp(min(sched.interval * BACKOFF_FACTOR,
+                                             sched.base_interval * MAX_BACKOFF_MULTIPLIER))
+        if sched.last_polled:
+            sched.next_due = sched.last_polled + timedelta(minutes=sched.interval)
+
+    def snapshot(self, sources: List[Dict]) -> List[Dict]:
+        result = []
+        for s in sources:
+            sched = self._get(s["name"])
+            result.append({
+                "source": sched.name,
+                "interval_minutes": round(sched.interval, 1),
+                "learned_interval_minutes": round(sched.base_interval, 1),
+                "published_per_day": sched.rate_per_day,
+                "last_polled": sched.last_polled.isoformat() if sched.last_polled else None,
+                "last_new_at": sched.last_new_at.isoformat() if sched.last_new_at else None,
+                "next_due": sched.next_due.isoformat(),
+            })
+        return sorted(result, key=lambda r: r["next_due"])
+
+
+poller = AdaptivePoller()
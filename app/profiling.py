@@ -0,0 +1,87 @@
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Шаг сэмплера задержки event loop во время профилирования
+LAG_PROBE_INTERVAL = 0.05
+# Задержка больше этого считается блокировкой loop
+LAG_BLOCKING_THRESHOLD = 0.02
+
+_profile_lock = asyncio.Lock()
+
+
+async def _measure_loop_lag(stop: asyncio.Event, stats: Dict) -> None:
+    """Спит по LAG_PROBE_INTERVAL и считает, насколько loop опоздал разбудить."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + LAG_PROBE_INTERVAL
+        await asyncio.sleep(LAG_PROBE_INTERVAL)
+        lag = loop.time() - expected
+        stats["samples"] += 1
+        stats["max_lag_ms"] = max(stats["max_lag_ms"], lag * 1000)
+        if lag > LAG_BLOCKING_THRESHOLD:
+            stats["blocked_ms"] += lag * 1000
+            stats["blocking_events"] += 1
+
+
+async def profile_cycle(name: str, task: Callable[[], Awaitable], top: int = 40) -> Dict:
+    """
+    Прогоняет один цикл задачи под cProfile и параллельно меряет блокировки event loop.
+    cProfile видит только поток event loop — именно то, что тормозит API и publisher;
+    работа в asyncio.to_thread/пуле процессов попадает сюда как ожидание.
+    Профиль сохраняется в PROFILE_DIR (.prof, открывается snakeviz/pstats).
+    """
+    if _profile_lock.locked():
+        raise RuntimeError("Another profiling run is in progress")
+
+    async with _profile_lock:
+        lag = {"samples": 0, "max_lag_ms": 0.0, "blocked_ms": 0.0, "blocking_events": 0}
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(_measure_loop_lag(stop, lag))
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await task()
+        finally:
+            profiler.disable()
+            wall = time.perf_counter() - started
+            stop.set()
+            await sampler
+
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        filename = f"{name}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.prof"
+        profiler.dump_stats(os.path.join(settings.PROFILE_DIR, filename))
+
+        buf = io.StringIO()
+        pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(top)
+        logger.info(f"🔬 Profile {name}: {wall:.1f}s wall, loop blocked {lag['blocked_ms']:.0f} ms → {filename}")
+
+        return {
+            "task": name,
+            "wall_seconds": round(wall, 3),
+            "loop_blocked_ms": round(lag["blocked_ms"]),
+            "loop_blocking_events": lag["blocking_events"],
+            "loop_max_lag_ms": round(lag["max_lag_ms"]),
+            "profile_file": filename,
+            "top_cumulative": buf.getvalue(),
+        }
+
+
+def profile_path(filename: str) -> Optional[str]:
+    """Путь к сохранённому профилю; None, если имя кривое или файла нет."""
+    if os.path.basename(filename) != filename or not filename.endswith(".prof"):
+        return None
+    path = os.path.join(settings.PROFILE_DIR, filename)
+    return path if os.path.exists(path) else None
@@ -1,14 +1,26 @@
+import asyncio
 import logging
 import re
-from telegram import Bot
-from telegram.constants import ParseMode
+import time
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
 from .config import settings
+from . import images
+from .metrics import TELEGRAM_SEND_SECONDS, TELEGRAM_ERRORS, TELEGRAM_RATE_WAIT_SECONDS
 
 logger = logging.getLogger(__name__)
 
 # Лимит подписи к фото в Telegram (1024), обрезаем до 1000 с запасом
 TELEGRAM_CAPTION_MAX_LEN = 1000
 
+# Лимиты Bot API: ~1 сообщение/сек в один чат, 20/мин в канал/группу, ~30/сек всего
+PER_CHAT_MIN_INTERVAL = 1.0
+PER_CHAT_PER_MINUTE = 20
+GLOBAL_PER_SECOND = 30
+# RetryAfter короче этого ждём внутри очереди, длиннее — отдаём наверх (outbox перепланирует)
+MAX_INLINE_RETRY_AFTER = 30
+LATENCY_WINDOW = 200
+
 
 def truncate_caption(text: str, max_len: int = TELEGRAM_CAPTION_MAX_LEN) -> str:
     """
@@ -35,34 +47,204 @@ def truncate_caption(text: str, max_len: int = TELEGRAM_CAPTION_MAX_LEN) -> str:
     
     return clean_text
 
+
+def _split_ids(value: str) -> List[str]:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+class _RateWindow:
+    """Скользящее окно отправок: минимальный интервал + лимит на период."""
+
+    def __init__(self, limit: int, period: float, min_interval: float = 0.0):
+        self.limit = limit
+        self.period = period
+        self.min_interval = min_interval
+        self.sent = deque()
+        self.blocked_until = 0.0  # выставляется из RetryAfter
+
+    def delay(self, now: float) -> float:
+        while self.sent and now - self.sent[0] >= self.period:
+            self.sent.popleft()
+        wait = max(self.blocked_until - now, 0.0)
+        if self.sent:
+            wait = max(wait, self.sent[-1] + self.min_interval - now)
+        if len(self.sent) >= self.limit:
+            wait = max(wait, self.sent[0] + self.period - now)
+        return wait
+
+
 class TelegramPublisher:
     def __init__(self):
-        self.bot = Bot(token=settings.TELEGRAM_BOT_TOKEN)
-        self.chat_id = settings.TELEGRAM_CHAT_ID
+        # Bot (и сам python-telegram-bot) создаётся при первом обращении — см. свойство bot
+        self._bot = None
+
+        self._global = _RateWindow(GLOBAL_PER_SECOND, 1.0)
+        self._chats: Dict[str, _RateWindow] = {}
+        self._chat_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._global_lock = asyncio.Lock()
+        self._latency: Dict[str, deque] = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        # Одна картинка грузится в Telegram один раз, остальные чаты ждут file_id
+        self._upload_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._initialized = False
+
+    @property
+    def bot(self):
+        if self._bot is None:
+            from telegram import Bot
+            from telegram.request import HTTPXRequest
+            # Один долгоживущий пул соединений вместо настроек httpx по умолчанию (пул на 1 соединение)
+            request = HTTPXRequest(
+                connection_pool_size=settings.TELEGRAM_POOL_SIZE,
+                connect_timeout=5.0,
+                read_timeout=20.0,
+                write_timeout=30.0,
+                pool_timeout=10.0,
+            )
+            bot_kwargs = {}
+            if settings.TELEGRAM_API_BASE_URL:
+                bot_kwargs["base_url"] = f"{settings.TELEGRAM_API_BASE_URL.rstrip('/')}/bot"
+                bot_kwargs["base_file_url"] = f"{settings.TELEGRAM_API_BASE_URL.rstrip('/')}/file/bot"
+            self._bot = Bot(token=settings.TELEGRAM_BOT_TOKEN, request=request, **bot_kwargs)
+        return self._bot
+
+    @property
+    def chat_id(self) -> str:
+        return settings.TELEGRAM_CHAT_ID
+
+    async def start(self):
+        """Поднимает HTTP-клиент один раз и держит его живым до shutdown."""
+        if not self._initialized:
+            await self.bot.initialize()
+            self._initialized = True
 
-    async def publish(self, text: str, image_url: str = None) -> int:
+    async def shutdown(self):
+        if self._initialized:
+            await self.bot.shutdown()
+            self._initialized = False
+
+    def target_chats(self, lang: str = "RU") -> List[str]:
+        """
+        Куда публикуем пост: основной канал языка (первым) + зеркала.
+        Если отдельные RU/KZ каналы не заданы — используем TELEGRAM_CHAT_ID.
+        """
+        primary = settings.TELEGRAM_CHAT_ID_KZ if lang == "KZ" else settings.TELEGRAM_CHAT_ID_RU
+        chats = [primary or self.chat_id]
+        for mirror in _split_ids(settings.TELEGRAM_MIRROR_CHAT_IDS):
+            if mirror not in chats:
+                chats.append(mirror)
+        return [str(c) for c in chats]
+
+    async def _acquire(self, chat_id: str):
+        """Ждёт, пока отправка в чат уложится и в лимит чата, и в глобальный."""
+        window = self._chats.setdefault(chat_id, _RateWindow(PER_CHAT_PER_MINUTE, 60.0, PER_CHAT_MIN_INTERVAL))
+        while True:
+            wait = window.delay(time.monotonic())
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+        async with self._global_lock:
+            while True:
+                now = time.monotonic()
+                wait = self._global.delay(now)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            self._global.sent.append(now)
+        window.sent.append(now)
+
+    def _record_latency(self, chat_id: str, seconds: float):
+        self._latency[chat_id].append(seconds)
+        TELEGRAM_SEND_SECONDS.labels(chat_id).observe(seconds)
+        logger.info(f"📨 Telegram send to {chat_id}: {seconds * 1000:.0f} ms")
+
+    def latency_stats(self) -> Dict[str, Dict]:
+        """Задержки отправки по чатам (последние LATENCY_WINDOW отправок)."""
+        stats = {}
+        for chat_id, samples in self._latency.items():
+            ordered = sorted(samples)
+            if not ordered:
+                continue
+            stats[chat_id] = {
+                "count": len(ordered),
+                "p50_ms": round(ordered[len(ordered) // 2] * 1000),
+                "p95_ms": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000),
+                "last_ms": round(samples[-1] * 1000),
+            }
+        return stats
+
+    async def publish(self, text: str, image_url: str = None, chat_id: str = None,
+                      image_hash: str = None) -> int:
         """
         Publishes the news to the Telegram channel.
         Returns the message_id of the published post.
         """
+        from telegram.error import RetryAfter
+
         text = truncate_caption(text)
-        try:
-            if image_url:
-                message = await self.bot.send_photo(
-                    chat_id=self.chat_id,
-                    photo=image_url,
+        chat_id = str(chat_id or self.chat_id)
+        # Отправки в один чат идут строго по очереди — так сохраняется порядок постов
+        async with self._chat_locks[chat_id]:
+            while True:
+                wait_started = time.perf_counter()
+                await self._acquire(chat_id)
+                TELEGRAM_RATE_WAIT_SECONDS.observe(time.perf_counter() - wait_started)
+                started = time.perf_counter()
+                try:
+                    message = await self._send(chat_id, text, image_url, image_hash)
+                    self._record_latency(chat_id, time.perf_counter() - started)
+                    return message.message_id
+                except RetryAfter as e:
+                    TELEGRAM_ERRORS.labels(chat_id, "RetryAfter").inc()
+                    retry_after = float(e.retry_after)
+                    self._chats[chat_id].blocked_until = time.monotonic() + retry_after
+                    if retry_after > MAX_INLINE_RETRY_AFTER:
+                        logger.warning(f"Flood control for {chat_id}: retry after {retry_after:.0f}s")
+                        raise
+                    logger.warning(f"⏳ Flood control for {chat_id}: waiting {retry_after:.0f}s")
+                except Exception as e:
+                    TELEGRAM_ERRORS.labels(chat_id, type(e).__name__).inc()
+                    logger.error(f"Error publishing to Telegram ({chat_id}): {str(e)}")
+                    raise e
+
+    async def _send(self, chat_id: str, text: str, image_url: Optional[str], image_hash: Optional[str] = None):
+        from telegram.constants import ParseMode
+
+        if image_hash:
+            photo, is_file_id = await asyncio.to_thread(images.get_photo, image_hash)
+            if photo is not None and not is_file_id:
+                # Сырой файл грузим один раз: остальные ждут, пока первая загрузка не
+                # запомнит file_id, и дальше шлют уже по нему — без lock
+                async with self._upload_locks[image_hash]:
+                    photo, is_file_id = await asyncio.to_thread(images.get_photo, image_hash)
+                    if photo is not None and not is_file_id:
+                        message = await self.bot.send_photo(
+                            chat_id=chat_id,
+                            photo=photo,
+                            caption=text,
+                            parse_mode=ParseMode.HTML
+                        )
+                        if message.photo:
+                            await asyncio.to_thread(images.remember_file_id, image_hash, message.photo[-1].file_id)
+                        return message
+            if photo is not None:
+                return await self.bot.send_photo(
+                    chat_id=chat_id,
+                    photo=photo,
                     caption=text,
                     parse_mode=ParseMode.HTML
                 )
-            else:
-                message = await self.bot.send_message(
-                    chat_id=self.chat_id,
-                    text=text,
-                    parse_mode=ParseMode.HTML
-                )
-            return message.message_id
-        except Exception as e:
-            logger.error(f"Error publishing to Telegram: {str(e)}")
-            raise e
+            # Кэша на этой реплике нет — отдаём Telegram исходный URL
+        if image_url:
+            return await self.bot.send_photo(
+                chat_id=chat_id,
+                photo=image_url,
+                caption=text,
+                parse_mode=ParseMode.HTML
+            )
+        return await self.bot.send_message(
+            chat_id=chat_id,
+            text=text,
+            parse_mode=ParseMode.HTML
+        )
 
 publisher = TelegramPublisher()
@@ -0,0 +1,103 @@
+"""
+Приоритет черновиков: ценность новости, затухающая со временем.
+
+    приоритет(now) = ценность · exp(-λ · (now - t_публикации))
+
+Порядок черновиков от now не зависит, поэтому хранить можно статичный ключ в лог-шкале:
+
+    rank_score = ln(ценность) + λ · t_публикации        (t — в часах от эпохи)
+
+Он считается один раз при сохранении; выбор следующего поста — верх индекса
+(status, lang, rank_score), O(log n), без перебора всех черновиков.
+"""
+import logging
+import math
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal, NewsArchive, NewsStatus
+from .items import LANG_BOTH
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+@lru_cache(maxsize=4)
+def _parse_weights(raw: str) -> Dict[str, float]:
+    weights = {}
+    for pair in raw.split(","):
+        name, _, value = pair.rpartition(":")
+        try:
+            weights[name.strip()] = float(value)
+        except ValueError:
+            continue
+    return weights
+
+
+def source_weight(source_name: Optional[str]) -> float:
+    return _parse_weights(settings.SOURCE_WEIGHTS).get(source_name or "", 1.0)
+
+
+def rank_score(published_at: Optional[datetime], topic_score: Optional[int], source_name: Optional[str]) -> float:
+    """Статичный ключ сортировки (больше — важнее). Ценность = вес источника · (1 + тематический скор)."""
+    value = max(source_weight(source_name), 1e-6) * (1 + max(topic_score or 0, 0))
+    published = published_at or datetime.utcnow()
+    hours = (published - _EPOCH).total_seconds() / 3600
+    decay = math.log(2) / settings.RANK_HALF_LIFE_HOURS
+    return math.log(value) + decay * hours
+
+
+def next_draft(db: Session, lang: str) -> Optional[NewsArchive]:
+    """
+    Самый ценный черновик нужного языка; двуязычные истории (LANG_BOTH) годятся для любого.
+    Если таких нет — самый ценный любой.
+    """
+    query = db.query(NewsArchive).filter(NewsArchive.status == NewsStatus.draft.value)
+    # Два спуска по индексу (status, lang, rank_score) вместо OR, который индекс не использует
+    tops = [query.filter(NewsArchive.lang == value).order_by(NewsArchive.rank_score.desc()).first()
+            for value in (lang, LANG_BOTH)]
+    best = max((news for news in tops if news is not None), key=lambda news: news.rank_score or 0, default=None)
+    if best is None:
+        best = query.order_by(NewsArchive.rank_score.desc()).first()
+        if best is not None:
+            logger.info(f"Fallback: No {lang} drafts. Taking best available.")
+    return best
+
+
+def is_top_draft(db: Session, news: NewsArchive, top: int) -> bool:
+    """Черновик среди top лучших своего языка — его, скорее всего, и возьмёт ближайший слот."""
+    if news.rank_score is None:
+        return False
+    above = db.query(NewsArchive.id).filter(
+        NewsArchive.status == NewsStatus.draft.value,
+        NewsArchive.lang == news.lang,
+        NewsArchive.rank_score > news.rank_score,
+    ).limit(top).count()
+    return above < top
+
+
+def backfill_ranks() -> int:
+    """Черновики, сохранённые до появления ранжирования, получают lang и rank_score."""
+    from .scheduler import is_text_kazakh
+
+    db = SessionLocal()
+    try:
+        rows = db.query(NewsArchive).filter(
+            NewsArchive.status == NewsStatus.draft.value,
+            NewsArchive.rank_score.is_(None),
+        ).all()
+        for news in rows:
+            news.lang = "KZ" if is_text_kazakh(news.original_text) else "RU"
+            news.rank_score = rank_score(news.source_published_at or news.created_at,
+                                         news.topic_score, news.source_name)
+        db.commit()
+        if rows:
+            logger.info(f"🏅 Ranked {len(rows)} legacy drafts")
+        return len(rows)
+    finally:
+        db.close()
@@ -0,0 +1,159 @@
+"""
+Повторы для новостей, упавших на переписывании или публикации.
+
+Временные ошибки (LLM/Telegram/сеть/БД недоступны) → status=retry и next_attempt_at
+с экспоненциальной задержкой и jitter; постоянные (integrity, отказ Telegram) и
+исчерпанные попытки → status=error. error_class хранит класс ошибки, error_log — текст.
+"""
+import logging
+import random
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import func
+
+from .config import settings
+from .database import SessionLocal, NewsArchive, NewsStatus, PublishOutbox, OutboxStatus
+from .metrics import RETRIES_SCHEDULED, RETRY_GIVE_UPS, ITEM_FAILURES
+
+logger = logging.getLogger(__name__)
+
+# Классы ошибок
+LLM_UNAVAILABLE = "llm_unavailable"            # таймаут/5xx/429 или пустой ответ модели
+TELEGRAM_UNAVAILABLE = "telegram_unavailable"  # outbox исчерпал попытки на сетевых ошибках/flood control
+NETWORK = "network"
+DATABASE = "database"
+INTEGRITY = "integrity"                        # пост не прошёл проверку — повтор даст то же самое
+TELEGRAM_REJECTED = "telegram_rejected"        # BadRequest/Forbidden
+UNKNOWN = "unknown"
+
+TRANSIENT = {LLM_UNAVAILABLE, TELEGRAM_UNAVAILABLE, NETWORK, DATABASE}
+
+# По имени класса исключения: SDK (groq, google.genai, telegram) здесь не импортируем
+_TRANSIENT_NAMES = ("Timeout", "TimedOut", "Connect", "Connection", "NetworkError", "RetryAfter",
+                    "RateLimit", "ServiceUnavailable", "InternalServerError", "ServerError")
+_TRANSIENT_STATUSES = {408, 429, 500, 502, 503, 504}
+# Код ответа в тексте ошибки — только рядом с "Error code"/"status"/"HTTP", а не любые три цифры
+_STATUS_IN_MESSAGE = re.compile(r"(?:error code|status(?: code)?|http)\s*[:=]?\s*(\d{3})\b", re.IGNORECASE)
+_TRANSIENT_WORDS = re.compile(r"\b(?:UNAVAILABLE|RESOURCE_EXHAUSTED|overloaded)\b")
+
+
+def classify(exc: BaseException) -> str:
+    name = type(exc).__name__
+    if name in ("BadRequest", "Forbidden"):
+        return TELEGRAM_REJECTED
+    if name in ("OperationalError", "InterfaceError", "DisconnectionError"):
+        return DATABASE
+    if any(marker in name for marker in _TRANSIENT_NAMES):
+        return NETWORK
+    # SDK со статусом ответа (groq APIStatusError, google.genai APIError): решает сам код
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    if isinstance(status, int):
+        return NETWORK if status in _TRANSIENT_STATUSES else UNKNOWN
+    message = str(exc)
+    match = _STATUS_IN_MESSAGE.search(message)
+    if match:
+        return NETWORK if int(match.group(1)) in _TRANSIENT_STATUSES else UNKNOWN
+    if _TRANSIENT_WORDS.search(message):
+        return NETWORK
+    return UNKNOWN
+
+
+def _backoff(attempts: int) -> timedelta:
+    delay = min(settings.NEWS_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), settings.NEWS_RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def record_failure(news: NewsArchive, error_class: str, message: str) -> bool:
+    """
+    Фиксирует неудачу на новости (без commit — коммитит вызывающий).
+    Возвращает True, если назначен повтор.
+    """
+    news.attempts = (news.attempts or 0) + 1
+    news.error_class = error_class
+    news.error_log = f"[{error_class}] attempt {news.attempts}: {message}"[:2000]
+
+    if error_class in TRANSIENT and news.attempts < settings.NEWS_RETRY_MAX_ATTEMPTS:
+        delay = _backoff(news.attempts)
+        news.status = NewsStatus.retry.value
+        news.next_attempt_at = datetime.utcnow() + delay
+        RETRIES_SCHEDULED.labels(error_class).inc()
+        logger.warning(f"🔁 News {news.id}: {error_class}, попытка {news.attempts}, "
+                       f"повтор через {delay.total_seconds() / 60:.0f} мин")
+        return True
+
+    news.status = NewsStatus.error.value
+    news.next_attempt_at = None
+    if error_class in TRANSIENT:
+        RETRY_GIVE_UPS.labels(error_class).inc()
+        logger.error(f"🛑 News {news.id}: {error_class}, попытки исчерпаны ({news.attempts})")
+    else:
+        ITEM_FAILURES.labels(error_class).inc()
+    return False
+
+
+def next_due_retry(db) -> Optional[NewsArchive]:
+    """Самый давно ждущий повтор, у которого подошёл срок (частичный индекс ix_news_archive_retry_due)."""
+    return db.query(NewsArchive).filter(
+        NewsArchive.status == NewsStatus.retry.value,
+        NewsArchive.next_attempt_at <= datetime.utcnow(),
+    ).order_by(NewsArchive.next_attempt_at).first()
+
+
+def requeue_publish(db, news: NewsArchive) -> bool:
+    """
+    Повтор публикации: упавшие записи outbox этой новости снова становятся pending.
+    False — записей нет (новость упала раньше, на переписывании): её нужно переписать заново.
+    """
+    rows = db.query(PublishOutbox).filter(
+        PublishOutbox.news_id == news.id,
+        PublishOutbox.status == OutboxStatus.failed.value,
+    ).all()
+    if not rows:
+        return False
+    now = datetime.utcnow()
+    for row in rows:
+        row.status = OutboxStatus.pending.value
+        row.attempts = 0
+        row.claimed_by = None
+        row.next_attempt_at = now
+    news.status = NewsStatus.queued.value
+    news.queued_at = now
+    db.commit()
+    logger.info(f"🔁 News {news.id}: {len(rows)} outbox rows requeued")
+    return True
+
+
+def retry_report(days: int = 7) -> Dict:
+    """Сколько новостей ждёт повтора, сколько сдались и по каким классам ошибок."""
+    db = SessionLocal()
+    try:
+        since = datetime.utcnow() - timedelta(days=days)
+        now = datetime.utcnow()
+        waiting = db.query(NewsArchive.error_class, func.count(NewsArchive.id)).filter(
+            NewsArchive.status == NewsStatus.retry.value,
+        ).group_by(NewsArchive.error_class).all()
+        due = db.query(func.count(NewsArchive.id)).filter(
+            NewsArchive.status == NewsStatus.retry.value,
+            NewsArchive.next_attempt_at <= now,
+        ).scalar() or 0
+        failed = db.query(NewsArchive.error_class, func.count(NewsArchive.id)).filter(
+            NewsArchive.status == NewsStatus.error.value,
+            NewsArchive.created_at >= since,
+        ).group_by(NewsArchive.error_class).all()
+        recovered = db.query(func.count(NewsArchive.id)).filter(
+            NewsArchive.status == NewsStatus.published.value,
+            NewsArchive.attempts > 0,
+            NewsArchive.published_at >= since,
+        ).scalar() or 0
+        return {
+            "days": days,
+            "waiting": {cls or UNKNOWN: n for cls, n in waiting},
+            "due_now": due,
+            "recovered_after_retry": recovered,
+            "failed": {cls or UNKNOWN: n for cls, n in failed},
+            "gave_up_transient": sum(n for cls, n in failed if cls in TRANSIENT),
+        }
+    finally:
+        db.close()
@@ -0,0 +1,266 @@
+"""
+Пакетная перегенерация архива: прогоняет исходный текст архивных новостей (у двуязычных —
+версию языка публикации) через текущие промпты rewriter.rewrite и складывает результат
+в rewrite_variants под версией промптов.
+news_archive.rewritten_text не трогается — варианты сравниваются рядом с опубликованным.
+
+    python -m app.rewrite_batch --limit 300                 # версия = rewriter.prompt_version()
+    python -m app.rewrite_batch --version groq-scout-v2 --concurrency 4 --per-minute 30
+    python -m app.rewrite_batch --report                    # сводка по всем версиям
+
+Каждая новость коммитится сразу, поэтому прерванный прогон (Ctrl+C, падение) при повторном
+запуске с той же версией продолжает с того места: готовые пропускаются, упавшие повторяются.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from .config import settings
+from .database import SessionLocal, NewsArchive, NewsStatus, RewriteVariant, init_db
+from .rewriter import rewriter, prompt_version
+from .scheduler import story_variant
+
+logger = logging.getLogger(__name__)
+
+# Провайдер ответил ошибкой (чаще всего 429) — весь прогон притормаживает на столько секунд
+ERROR_PAUSE_SECONDS = 30
+
+
+@lru_cache(maxsize=4)
+def _parse_prices(raw: str) -> Dict[str, Tuple[float, float]]:
+    prices = {}
+    for pair in raw.split(","):
+        provider, _, value = pair.partition(":")
+        prompt, _, completion = value.partition("/")
+        try:
+            prices[provider.strip()] = (float(prompt), float(completion or 0))
+        except ValueError:
+            continue
+    return prices
+
+
+def usage_cost(usage: Dict[str, int]) -> float:
+    """Стоимость вызова в $ по LLM_PRICES; usage — из rewriter.rewrite_with_usage."""
+    prices = _parse_prices(settings.LLM_PRICES)
+    cost = 0.0
+    for key, tokens in usage.items():
+        provider, _, kind = key.partition(":")
+        if provider in prices and kind:
+            cost += tokens * prices[provider][0 if kind == "prompt" else 1] / 1_000_000
+    return cost
+
+
+class _Pacer:
+    """Общий темп для всех воркеров: не чаще per_minute стартов в минуту, пауза после ошибки провайдера."""
+
+    def __init__(self, per_minute: int):
+        self.interval = 60 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def back_off(self, seconds: float) -> None:
+        self._next = max(self._next, time.monotonic() + seconds)
+
+
+def pending_ids(version: str, statuses: Optional[List[str]], limit: Optional[int]) -> List[int]:
+    """Новости без успешного варианта этой версии, по возрастанию id."""
+    db = SessionLocal()
+    try:
+        done = select(RewriteVariant.news_id).where(
+            RewriteVariant.prompt_version == version,
+            RewriteVariant.error.is_(None),
+        )
+        query = db.query(NewsArchive.id).filter(~NewsArchive.id.in_(done))
+        if statuses:
+            query = query.filter(NewsArchive.status.in_(statuses))
+        query = query.order_by(NewsArchive.id)
+        if limit:
+            query = query.limit(limit)
+        return [row[0] for row in query.all()]
+    finally:
+        db.close()
+
+
+def _save(news_id: int, version: str, provider: str, text: str, error: Optional[str],
+          seconds: float, usage: Dict[str, int]) -> float:
+    cost = usage_cost(usage)
+    db = SessionLocal()
+    try:
+        row = db.query(RewriteVariant).filter(
+            RewriteVariant.news_id == news_id,
+            RewriteVariant.prompt_version == version,
+        ).first() or RewriteVariant(news_id=news_id, prompt_version=version)
+        row.provider = provider
+        row.rewritten_text = text or None
+        row.error = error
+        row.seconds = seconds
+        row.prompt_tokens = sum(n for k, n in usage.items() if k.endswith(":prompt"))
+        row.completion_tokens = sum(n for k, n in usage.items() if k.endswith(":completion"))
+        row.cost_usd = cost
+        db.add(row)
+        db.commit()
+    finally:
+        db.close()
+    return cost
+
+
+class BatchRun:
+    def __init__(self, version: str, concurrency: int, per_minute: int):
+        self.version = version
+        self.concurrency = max(concurrency, 1)
+        self.pacer = _Pacer(per_minute)
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.cost = 0.0
+        self.tokens: Dict[str, int] = {}
+        self.latencies: List[float] = []
+        self.started = time.perf_counter()
+
+    async def _one(self, news_id: int) -> None:
+        db = SessionLocal()
+        try:
+            news = db.get(NewsArchive, news_id)
+            # Та же языковая версия, что переписывал process_news_task (для двуязычных — KZ или RU)
+            source = (story_variant(news, news.lang)[0] or news.title or "") if news else ""
+        finally:
+            db.close()
+        if not source:
+            return
+
+        await self.pacer.wait()
+        provider = "gemini" if rewriter._is_kazakh(source) else "groq"
+        started = time.perf_counter()
+        text, usage = await rewriter.rewrite_with_usage(source)
+        seconds = time.perf_counter() - started
+
+        # rewriter глотает ошибки LLM и отдаёт обрезанный оригинал — такой вариант не засчитываем
+        error = None
+        if usage.get("errors") or not text:
+            error = f"llm errors: {usage.get('errors', 0)}"
+            self.pacer.back_off(ERROR_PAUSE_SECONDS)
+        self.cost += await asyncio.to_thread(_save, news_id, self.version, provider, text, error, seconds, usage)
+
+        for key, n in usage.items():
+            self.tokens[key] = self.tokens.get(key, 0) + n
+        if error:
+            self.failed += 1
+        else:
+            self.done += 1
+            self.latencies.append(seconds)
+        finished = self.done + self.failed
+        if finished % 10 == 0 or finished == self.total:
+            print(f"  {finished}/{self.total}  ok={self.done} failed={self.failed}  ${self.cost:.4f}", flush=True)
+
+    async def run(self, ids: List[int]) -> None:
+        self.total = len(ids)
+        queue: asyncio.Queue = asyncio.Queue()
+        for news_id in ids:
+            queue.put_nowait(news_id)
+
+        async def worker():
+            while True:
+                try:
+                    news_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    await self._one(news_id)
+                except Exception as e:
+                    self.failed += 1
+                    logger.error(f"Rewrite batch: news {news_id} failed: {e}")
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    def summary(self) -> Dict:
+        elapsed = time.perf_counter() - self.started
+        latencies = sorted(self.latencies)
+        finished = self.done + self.failed
+        return {
+            "version": self.version,
+            "items": {"planned": self.total, "ok": self.done, "failed": self.failed},
+            "elapsed_seconds": round(elapsed, 1),
+            "items_per_minute": round(finished / elapsed * 60, 2) if elapsed else 0,
+            "latency_p50": round(latencies[len(latencies) // 2], 2) if latencies else None,
+            "latency_p95": round(latencies[int(len(latencies) * 0.95)], 2) if latencies else None,
+            "tokens": {k: v for k, v in self.tokens.items() if k != "errors"},
+            "cost_usd": round(self.cost, 4),
+            "cost_per_1000_usd": round(self.cost / finished * 1000, 2) if finished else None,
+        }
+
+
+def report() -> List[Dict]:
+    """Сводка по всем версиям в rewrite_variants."""
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            RewriteVariant.prompt_version,
+            func.count(RewriteVariant.id),
+            func.count(RewriteVariant.error),
+            func.avg(RewriteVariant.seconds),
+            func.sum(RewriteVariant.prompt_tokens),
+            func.sum(RewriteVariant.completion_tokens),
+            func.sum(RewriteVariant.cost_usd),
+            func.max(RewriteVariant.created_at),
+        ).group_by(RewriteVariant.prompt_version).all()
+        return [
+            {
+                "version": version,
+                "ok": total - errors,
+                "failed": errors,
+                "avg_seconds": round(avg or 0, 2),
+                "prompt_tokens": prompt or 0,
+                "completion_tokens": completion or 0,
+                "cost_usd": round(cost or 0, 4),
+                "last_run": last.isoformat() if last else None,
+            }
+            for version, total, errors, avg, prompt, completion, cost, last in rows
+        ]
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import json
+
+    parser = argparse.ArgumentParser(description="Перегенерация rewritten_text архива под текущие промпты")
+    parser.add_argument("--version", default=None, help="метка версии (по умолчанию отпечаток промптов и моделей)")
+    parser.add_argument("--status", default=NewsStatus.published.value,
+                        help="статусы новостей через запятую или all")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=settings.REWRITE_BATCH_CONCURRENCY)
+    parser.add_argument("--per-minute", type=int, default=settings.REWRITE_BATCH_PER_MINUTE)
+    parser.add_argument("--report", action="store_true", help="только сводка по уже сделанным версиям")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    init_db()
+    if args.report:
+        print(json.dumps(report(), ensure_ascii=False, indent=2))
+        raise SystemExit(0)
+
+    version = args.version or prompt_version()
+    statuses = None if args.status == "all" else [s.strip() for s in args.status.split(",")]
+    ids = pending_ids(version, statuses, args.limit)
+    print(f"version {version}: {len(ids)} items to rewrite "
+          f"(concurrency {args.concurrency}, {args.per_minute or '∞'}/min)")
+
+    batch = BatchRun(version, args.concurrency, args.per_minute)
+    try:
+        asyncio.run(batch.run(ids))
+    except KeyboardInterrupt:
+        print("interrupted — rerun with the same --version to resume")
+    print(json.dumps(batch.summary(), ensure_ascii=False, indent=2))
@@ -1,10 +1,12 @@
 import logging
 import re
 import asyncio
-from google import genai
-from google.genai import types
-from groq import AsyncGroq # Не забудь добавить groq в requirements.txt
+import hashlib
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
 from .config import settings
+from .metrics import LLM_SECONDS, LLM_TOKENS, LLM_ERRORS
 
 logger = logging.getLogger(__name__)
 
@@ -13,19 +15,93 @@ MODEL_KZ = "gemini-2.5-flash"
 MODEL_RU_GROQ = "meta-llama/llama-4-scout-17b-16e-instruct" # Топовая и быстрая модель на Groq
 MAX_TG_CAPTION_LEN = 800
 
+# --- ПРОМПТЫ ---
+# Любая правка промпта или модели меняет prompt_version(): по ней rewrite_batch.py
+# раскладывает перегенерированные тексты архива
+PROMPT_KZ = (
+    "Сен — Telegram-арнаның қатал әрі кәсіби редакторысың.\n"
+    "МАҚСАТ: Берілген жаңалықтың түйін ақпаратын алып, тек нақты фактілер мен сандарды ғана қалдырып, қазақ тіліндегі қысқаша пост дайындау.\n\n"
+    f"ҚАТАҢ ШЕКТЕУ: Мәтіннің жалпы көлемі {MAX_TG_CAPTION_LEN} символдан аспауы тиіс!\n\n"
+    "ЕРЕЖЕЛЕР:\n"
+    "1. Мәтін міндетті түрде тақырыптан басталуы керек. Заголовок выдели жирным шрифтом. Markdown ҚОЛДАНБА.\n"
+    "2. Ешқандай кіріспе сөз жазба. Сәлемдесусіз, тек дайын мәтінді қайтар.\n"
+    "3. Адам аттарын, қызметтерін және сандарды түпнұсқадан дәл көшір, ойыңнан қоспа.\n"
+    "4. Сөйлемдер қысқа, нақты, ресми бірақ оқуға жеңіл болсын.\n"
+    "5. Мәтіннің ең соңында тақырыпқа сай 2-3 #хэштег қою міндетті."
+    "6. Мәтінде 2-3 эмодзи қолдансаң болады."
+)
+
+PROMPT_RU_JOURNALIST = (
+    "Ты — топовый новостной корреспондент. Подготовь фактологическую справку для поста на основе новости государственного органа Республики Казахстан.\n"
+    "СТРОГИЕ ПРАВИЛА ТОЧНОСТИ:\n"
+    "1. Имена и Должности: Переноси их СЛОВО В СЛОВО. Запрещено сокращать, упрощать или менять регалии. "
+    "Если в тексте указано «Исполняющий обязанности заместителя руководителя», так и пиши. Не выдумывай должности.\n"
+    "2. Факты: Не добавляй информацию, которой нет в исходном тексте.\n"
+    "\n"
+    "СТИЛЬ ПОДАЧИ:\n"
+    "- Изложи суть новости понятно, просто и интересно, избегая «паркетного» стиля и канцеляризмов.\n"
+    "- Сфокусируйся на главном: Что случилось? Где? Кто? Почему это важно для граждан и Республики Казахстан?"
+)
+
+PROMPT_RU_EDITOR = (
+    "Ты — Выпускающий Редактор казахстанского Telegram-канала.\n"
+    f"ОГРАНИЧЕНИЕ: Весь текст до {MAX_TG_CAPTION_LEN} символов.\n"
+    "1. Начинай сразу с заголовка <b>...</b>.\n"
+    "2. Текст разбей на 2 абзаца. Используй только HTML (<b>, <i>).\n"
+    "3. В конце 2-3 хэштега."
+)
+
+
+def prompt_version() -> str:
+    """Короткий отпечаток промптов и моделей."""
+    digest = hashlib.sha256("\x00".join(
+        (MODEL_KZ, MODEL_RU_GROQ, PROMPT_KZ, PROMPT_RU_JOURNALIST, PROMPT_RU_EDITOR)
+    ).encode("utf-8")).hexdigest()
+    return digest[:10]
+
+
+# Расход текущей задачи: {"gemini:prompt": n, "groq:completion": n, ..., "errors": n}.
+# Задаётся только в rewrite_with_usage; в обычном цикле публикации — None
+_usage: ContextVar[Optional[Dict[str, int]]] = ContextVar("rewrite_usage", default=None)
+
+
+def _track(key: str, amount: int) -> None:
+    usage = _usage.get()
+    if usage is not None:
+        usage[key] = usage.get(key, 0) + amount
+
+
 class GeminiRewriter:
+    """
+    Клиенты Gemini и Groq (и сами SDK) создаются при первом запросе, а не при импорте:
+    импорт модуля не требует ключей и не тянет google.genai/groq.
+    """
+
     def __init__(self):
-        # Инициализация Gemini
-        if settings.GEMINI_API_KEY:
-            self.gemini_client = genai.Client(api_key=settings.GEMINI_API_KEY)
-        else:
-            logger.error("CRITICAL: GEMINI_API_KEY is missing!")
+        self._gemini_client = None
+        self._groq_client = None
 
-        # Инициализация Groq
-        if settings.GROQ_API_KEY:
-            self.groq_client = AsyncGroq(api_key=settings.GROQ_API_KEY)
-        else:
-            logger.error("CRITICAL: GROQ_API_KEY is missing!")
+    @property
+    def gemini_client(self):
+        if self._gemini_client is None:
+            if not settings.GEMINI_API_KEY:
+                logger.error("CRITICAL: GEMINI_API_KEY is missing!")
+                return None
+            from google import genai
+            from google.genai import types
+            http_options = types.HttpOptions(base_url=settings.GEMINI_BASE_URL) if settings.GEMINI_BASE_URL else None
+            self._gemini_client = genai.Client(api_key=settings.GEMINI_API_KEY, http_options=http_options)
+        return self._gemini_client
+
+    @property
+    def groq_client(self):
+        if self._groq_client is None:
+            if not settings.GROQ_API_KEY:
+                logger.error("CRITICAL: GROQ_API_KEY is missing!")
+                return None
+            from groq import AsyncGroq
+            self._groq_client = AsyncGroq(api_key=settings.GROQ_API_KEY, base_url=settings.GROQ_BASE_URL or None)
+        return self._groq_client
 
     def _is_kazakh(self, text: str) -> bool:
         kz_chars = r'[әіңғүұқөһӘІҢҒҮҰҚӨҺ]'
@@ -39,33 +115,41 @@ class GeminiRewriter:
         else:
             return await self._process_ru_pipeline(text)
 
+    async def rewrite_with_usage(self, text: str) -> Tuple[str, Dict[str, int]]:
+        """rewrite() плюс токены и число ошибок LLM именно этого вызова (для пакетной перегенерации)."""
+        usage: Dict[str, int] = {}
+        token = _usage.set(usage)
+        try:
+            return await self.rewrite(text), usage
+        finally:
+            _usage.reset(token)
+
     # --- КАЗАХСКИЙ (GEMINI 2.5 FLASH) ---
     async def _process_kz(self, text: str) -> str:
         logger.info(f"🇰🇿 KZ Pipeline: {MODEL_KZ}")
-        system_prompt = (
-            "Сен — Telegram-арнаның қатал әрі кәсіби редакторысың.\n"
-            "МАҚСАТ: Берілген жаңалықтың түйін ақпаратын алып, тек нақты фактілер мен сандарды ғана қалдырып, қазақ тіліндегі қысқаша пост дайындау.\n\n"
-            f"ҚАТАҢ ШЕКТЕУ: Мәтіннің жалпы көлемі {MAX_TG_CAPTION_LEN} символдан аспауы тиіс!\n\n"
-            "ЕРЕЖЕЛЕР:\n"
-            "1. Мәтін міндетті түрде тақырыптан басталуы керек. Заголовок выдели жирным шрифтом. Markdown ҚОЛДАНБА.\n"
-            "2. Ешқандай кіріспе сөз жазба. Сәлемдесусіз, тек дайын мәтінді қайтар.\n"
-            "3. Адам аттарын, қызметтерін және сандарды түпнұсқадан дәл көшір, ойыңнан қоспа.\n"
-            "4. Сөйлемдер қысқа, нақты, ресми бірақ оқуға жеңіл болсын.\n"
-            "5. Мәтіннің ең соңында тақырыпқа сай 2-3 #хэштег қою міндетті."
-            "6. Мәтінде 2-3 эмодзи қолдансаң болады."
-        )
+        started = time.perf_counter()
         try:
+            from google.genai import types
             response = await asyncio.to_thread(
                 self.gemini_client.models.generate_content,
                 model=MODEL_KZ,
                 contents=text,
                 config=types.GenerateContentConfig(
-                    system_instruction=system_prompt,
+                    system_instruction=PROMPT_KZ,
                     temperature=0.3
                 )
             )
+            LLM_SECONDS.labels("gemini").observe(time.perf_counter() - started)
+            usage = getattr(response, "usage_metadata", None)
+            if usage:
+                LLM_TOKENS.labels("gemini", "prompt").inc(usage.prompt_token_count or 0)
+                LLM_TOKENS.labels("gemini", "completion").inc(usage.candidates_token_count or 0)
+                _track("gemini:prompt", usage.prompt_token_count or 0)
+                _track("gemini:completion", usage.candidates_token_count or 0)
             return self._clean_output(response.text)
         except Exception as e:
+            LLM_ERRORS.labels("gemini").inc()
+            _track("errors", 1)
             logger.error(f"Gemini KZ Error: {e}")
             return text[:MAX_TG_CAPTION_LEN]
 
@@ -76,38 +160,23 @@ class GeminiRewriter:
         # Шаг 1: Журналист (Подготовка фактов без галлюцинаций)
         draft = await self._run_groq_agent(
             text,
-            prompt=(
-                "Ты — топовый новостной корреспондент. Подготовь фактологическую справку для поста на основе новости государственного органа Республики Казахстан.\n"
-                "СТРОГИЕ ПРАВИЛА ТОЧНОСТИ:\n"
-                "1. Имена и Должности: Переноси их СЛОВО В СЛОВО. Запрещено сокращать, упрощать или менять регалии. "
-                "Если в тексте указано «Исполняющий обязанности заместителя руководителя», так и пиши. Не выдумывай должности.\n"
-                "2. Факты: Не добавляй информацию, которой нет в исходном тексте.\n"
-                "\n"
-                "СТИЛЬ ПОДАЧИ:\n"
-                "- Изложи суть новости понятно, просто и интересно, избегая «паркетного» стиля и канцеляризмов.\n"
-                "- Сфокусируйся на главном: Что случилось? Где? Кто? Почему это важно для граждан и Республики Казахстан?"
-            )
+            prompt=PROMPT_RU_JOURNALIST
         )
         if not draft: return text[:MAX_TG_CAPTION_LEN]
 
         # На Groq лимиты мягче, 2-3 секунды хватит за глаза
-        await asyncio.sleep(2)
+        await asyncio.sleep(settings.GROQ_STEP_DELAY_SECONDS)
 
         # Шаг 2: Редактор (Groq)
         final_text = await self._run_groq_agent(
             draft,
-            prompt=(
-                "Ты — Выпускающий Редактор казахстанского Telegram-канала.\n"
-                f"ОГРАНИЧЕНИЕ: Весь текст до {MAX_TG_CAPTION_LEN} символов.\n"
-                "1. Начинай сразу с заголовка <b>...</b>.\n"
-                "2. Текст разбей на 2 абзаца. Используй только HTML (<b>, <i>).\n"
-                "3. В конце 2-3 хэштега."
-            )
+            prompt=PROMPT_RU_EDITOR
         )
         return self._clean_output(final_text)
 
     async def _run_groq_agent(self, content: str, prompt: str) -> str:
         """Метод для работы с Groq API"""
+        started = time.perf_counter()
         try:
             completion = await self.groq_client.chat.completions.create(
                 model=MODEL_RU_GROQ,
@@ -118,8 +187,16 @@ class GeminiRewriter:
                 temperature=0.3,
                 max_tokens=1000
             )
+            LLM_SECONDS.labels("groq").observe(time.perf_counter() - started)
+            if completion.usage:
+                LLM_TOKENS.labels("groq", "prompt").inc(completion.usage.prompt_tokens or 0)
+                LLM_TOKENS.labels("groq", "completion").inc(completion.usage.completion_tokens or 0)
+                _track("groq:prompt", completion.usage.prompt_tokens or 0)
+                _track("groq:completion", completion.usage.completion_tokens or 0)
             return completion.choices[0].message.content
         except Exception as e:
+            LLM_ERRORS.labels("groq").inc()
+            _track("errors", 1)
             logger.error(f"Groq Agent Error: {e}")
             return None
 
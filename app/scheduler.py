@@ -2,17 +2,30 @@ import asyncio
 import html
 import logging
 import re
+import time as time_module
 from datetime import datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
 from difflib import SequenceMatcher
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-import requests
+from sqlalchemy import and_, func, or_
 import pytz 
 
 from .database import SessionLocal, NewsArchive, NewsStatus
-from .scraper import scraper
+from .scraper import scraper, thin_text
+from .items import NewsItem, LANG_BOTH
 from .rewriter import rewriter
 from .publisher import publisher
+from .images import prepare_image
+from .cpu import map_chunked, fuzzy_duplicate_flags
+from .topics import topic_scores
+from .ranking import next_draft, rank_score
+from .retries import INTEGRITY, LLM_UNAVAILABLE, classify, next_due_retry, record_failure, requeue_publish
+from .sharding import heartbeat, is_coordinator, my_sources
+from .polling import poller
+from .metrics import (
+    DEDUP_REJECTED, DRAFT_BACKLOG, DRAFTS_ADDED, ITEMS_SCRAPED, PROCESS_CYCLE_SECONDS, SCRAPE_CYCLE_SECONDS,
+)
+from .outbox import enqueue_or_skip, publish_outbox_task, reconcile_outbox
 from .config import settings
 
 logger = logging.getLogger(__name__)
@@ -61,40 +74,156 @@ def is_post_integrity_ok(final_text: str, source_url: str) -> bool:
 
     return True
 
+def build_post_text(rewritten: str, source_url: str) -> str:
+    """Финальный текст поста: переписанный текст + дисклеймер + ссылка на источник."""
+    safe_url = html.escape(source_url, quote=True)
+    disclaimer = "\n\n<i>⚠️ Сообщение создано ИИ. Проверяйте информацию по ссылке ниже.</i>"
+    source_link = f"\n<a href=\"{safe_url}\">🌐 Түпнұсқа / Источник</a>"
+    return f"{rewritten}{disclaimer}{source_link}"
+
+def is_working_hours() -> bool:
+    now_kz = datetime.now(TIMEZONE).time()
+    return WORK_START <= now_kz <= WORK_END
+
+def rotation_next(history: List[str]) -> str:
+    """Чередование 2 RU / 1 KZ. history — языки последних постов, новые первыми."""
+    if history and history[0] == "KZ":
+        return "RU"
+    if len(history) >= 2 and history[0] == "RU" and history[1] == "RU":
+        return "KZ"
+    return "RU"
+
+def recent_published_langs(db: Session, limit: int = 3) -> List[str]:
+    last_posts = db.query(NewsArchive).filter(
+        NewsArchive.status == NewsStatus.published.value
+    ).order_by(NewsArchive.published_at.desc()).limit(limit).all()
+    return [p.lang or ("KZ" if is_text_kazakh(p.rewritten_text or p.title) else "RU") for p in last_posts]
+
+def known_story(db: Session, item: NewsItem) -> bool:
+    """Уже в архиве: та же ссылка (на любом языке) или та же новость gov.kz по id."""
+    urls = {item.source_url, item.source_url_kz}
+    # Старые записи без gov_id узнаём по ссылке на другую языковую версию
+    for url in list(urls):
+        if url and "?lang=" in url:
+            base = url.rsplit("?lang=", 1)[0]
+            urls.update((f"{base}?lang=ru", f"{base}?lang=kk"))
+    condition = NewsArchive.source_url.in_([url for url in urls if url])
+    if item.gov_id:
+        condition = or_(condition, and_(NewsArchive.gov_id == item.gov_id,
+                                        NewsArchive.source_name == item.source_name))
+    return db.query(NewsArchive.id).filter(condition).first() is not None
+
+def story_variant(news: NewsArchive, lang: Optional[str] = None) -> Tuple[str, str, str]:
+    """
+    Исходный текст, ссылка и язык поста. У двуязычной истории (LANG_BOTH) версию выбирает
+    lang из ротации — переписывается и публикуется только она, вторая остаётся в архиве.
+    """
+    if news.lang == LANG_BOTH:
+        if lang == "KZ" and news.original_text_kz:
+            return news.original_text_kz, news.source_url_kz or news.source_url, "KZ"
+        return news.original_text, news.source_url, "RU"
+    # Ротация уже выбрала KZ-версию двуязычной истории
+    if news.lang == "KZ" and news.source_url_kz:
+        return news.original_text_kz or news.original_text, news.source_url_kz, "KZ"
+    post_lang = news.lang or ("KZ" if is_text_kazakh(news.original_text) else "RU")
+    return news.original_text, news.source_url, post_lang
+
 # --- ЗАДАЧИ ---
 
-async def scrape_news_task():
-    """Сбор новостей: сначала заголовки, потом проверка БД, потом мясо (enrich)."""
+async def scrape_news_task(sources: Optional[List[Dict]] = None) -> Dict[str, int]:
+    """
+    Сбор новостей: сначала заголовки, потом проверка БД, потом мясо (enrich).
+    sources — какие источники опросить (по умолчанию весь шард реплики).
+    Возвращает число новых черновиков по каждому источнику.
+    """
     db = SessionLocal()
+    added_by_source: Dict[str, int] = {}
+    cycle_started = time_module.perf_counter()
     try:
         logger.info("🚀 Starting scraping cycle (Async Mode)...")
-        # 1. Получаем список с текстом
-        raw_items = await scraper.scrape_async() 
+        # 1. Получаем список с текстом — только по своему шарду источников
+        shard = my_sources(scraper.direct_sources) if sources is None else sources
+        if not shard:
+            logger.info("Shard is empty: sources are owned by other replicas.")
+            return added_by_source
+        raw_items = await scraper.scrape_async(shard) 
         if not raw_items:
             logger.warning("No news found from direct sources.")
-            return
+            return added_by_source
+        ITEMS_SCRAPED.inc(len(raw_items))
 
         # 2. Подготовка к проверке дублей
         check_date = datetime.utcnow() - timedelta(days=3)
         recent_titles = [r[0] for r in db.query(NewsArchive.title).filter(NewsArchive.created_at >= check_date).all()]
         
         added = 0
+        added_titles = []
         cutoff = datetime.utcnow() - timedelta(days=settings.NEWS_MAX_AGE_DAYS)
 
-        for item in raw_items:
-            if added >= 10: break 
-
-            title = item.get("title", "")
-            url = item.get("source_url", "")
+        # SequenceMatcher по всем заголовкам разом — в пуле процессов, а не в event loop
+        dup_flags = await map_chunked(
+            fuzzy_duplicate_flags, [item.title for item in raw_items], recent_titles
+        )
+        # Тематический скор — один проход автомата по заголовку и тексту
+        scores = await map_chunked(
+            topic_scores, [(item.title, item.original_text) for item in raw_items],
+            settings.TOPIC_KEYWORDS,
+        )
+
+        # Список разбираем с конца через pop: как только до новости дошла очередь и она
+        # отброшена, на её текст больше никто не ссылается
+        pending = list(zip(raw_items, dup_flags, scores))
+        pending.reverse()
+        del raw_items
+
+        candidates = []
+        while pending:
+            item, is_dup, score = pending.pop()
+            if len(candidates) >= 10: break
+
+            # 3.0 Не по теме — не тратим на неё ни БД, ни LLM. Пустой текст из API тему
+            # ещё не показал: такие досудим после enrich
+            if score < settings.TOPIC_MIN_SCORE and not thin_text(item):
+                DEDUP_REJECTED.labels("off_topic").inc()
+                continue
 
             # 3. БЫСТРЫЙ ФИЛЬТР: Проверка в БД по URL и заголовку
-            if db.query(NewsArchive).filter(NewsArchive.source_url == url).first():
+            if known_story(db, item):
+                DEDUP_REJECTED.labels("url").inc()
+                continue
+            if is_dup or is_fuzzy_duplicate(item.title, added_titles):
+                DEDUP_REJECTED.labels("fuzzy_title").inc()
+                continue
+            # Дата уже есть из API и старая — страницу качать незачем
+            if item.published_at and item.published_at.replace(tzinfo=None) < cutoff:
+                DEDUP_REJECTED.labels("too_old").inc()
                 continue
-            if is_fuzzy_duplicate(title, recent_titles):
+            added_titles.append(item.title)
+            candidates.append(item)
+        del pending
+
+        # 4. Мясо: страницы-оригиналы только для новых новостей, которым API чего-то не дал
+        candidates = await scraper.enrich_many(candidates)
+        # Скор — по полному тексту: от него зависят и порог, и rank_score
+        scores = await map_chunked(
+            topic_scores, [(item.title, item.original_text) for item in candidates],
+            settings.TOPIC_KEYWORDS,
+        )
+        pending = list(zip(candidates, scores))
+        pending.reverse()
+        del candidates
+
+        while pending:
+            item, score = pending.pop()
+            title = item.title
+            url = item.source_url
+
+            if score < settings.TOPIC_MIN_SCORE:
+                DEDUP_REJECTED.labels("off_topic").inc()
                 continue
 
             # 5. ФИЛЬТР ПО ДАТЕ (ИСПРАВЛЕНО НА item)
-            pub = item.get("published_at")
+            pub = item.published_at
             if not pub: 
                 pub = datetime.utcnow() 
             
@@ -103,25 +232,44 @@ async def scrape_news_task():
             
             if pub < cutoff:
                 logger.info(f"⏭ Skip: Too old ({pub.strftime('%Y-%m-%d')})")
+                DEDUP_REJECTED.labels("too_old").inc()
                 continue
 
             # 6. СОХРАНЕНИЕ В БД (ИСПРАВЛЕНО НА item)
-            original_content = item.get("original_text")
+            original_content = item.original_text
             if not original_content or len(original_content) < 50:
                  original_content = title # Страховка, если текст всё же пустой
 
+            # Картинку качаем и проверяем сейчас, а не в момент публикации
+            image_url = item.image_url
+            image_hash = await asyncio.to_thread(prepare_image, image_url)
+            if image_url and not image_hash:
+                image_url = None  # битая/огромная картинка — публикуем без фото, а не падаем
+
             db.add(NewsArchive(
                 title=title[:490],
                 original_text=original_content,
-                source_name=item.get("source_name"),
+                source_name=item.source_name,
                 source_url=url,
                 source_published_at=pub,
-                image_url=item.get("image_url"),
+                image_url=image_url,
+                image_hash=image_hash,
+                fetched_at=item.fetched_at,
+                topic_score=score,
+                lang=LANG_BOTH if item.lang == LANG_BOTH else ("KZ" if is_text_kazakh(original_content) else "RU"),
+                rank_score=rank_score(pub, score, item.source_name),
+                gov_id=item.gov_id,
+                title_kz=item.title_kz[:490] if item.title_kz else None,
+                original_text_kz=item.original_text_kz or None,
+                source_url_kz=item.source_url_kz,
                 status=NewsStatus.draft.value
             ))
             added += 1
-            recent_titles.append(title)
+            added_by_source[item.source_name] = added_by_source.get(item.source_name, 0) + 1
             db.commit()
+            item.release_body()
+            original_content = None
+            DRAFTS_ADDED.inc()
 
         logger.info(f"✅ Cycle finished. Added {added} new drafts.")
         
@@ -129,119 +277,134 @@ async def scrape_news_task():
         logger.error(f"Scrape Error: {e}", exc_info=True)
     finally:
         db.close()        
+        SCRAPE_CYCLE_SECONDS.observe(time_module.perf_counter() - cycle_started)
+    return added_by_source
 
-async def process_news_task():
-    """Публикация: Режим работы 07-21, Чередование 2 RU / 1 KZ."""
+async def poll_due_sources():
+    """Тик адаптивного опроса: скрапим только источники, у которых подошёл срок."""
+    due = poller.due(my_sources(scraper.direct_sources))
+    if not due:
+        return
+    for source in due:
+        poller.mark_polled(source["name"])
+    logger.info(f"⏰ Due sources: {[s['name'] for s in due]}")
+    added = await scrape_news_task(due)
+    for source in due:
+        poller.record_result(source["name"], added.get(source["name"], 0))
+
+async def process_news_task(lang: Optional[str] = None):
+    """
+    Публикация: Режим работы 07-21, Чередование 2 RU / 1 KZ.
+    lang задаёт слот дневного плана (planner.py): рабочее время и чередование
+    уже учтены при планировании, здесь их не перепроверяем.
+    """
     
+    # Выбор и переписывание черновика ведёт одна реплика (координатор)
+    if not is_coordinator():
+        return
+
     # 1. Проверка рабочего времени (Астана)
-    now_kz = datetime.now(TIMEZONE).time()
-    if not (WORK_START <= now_kz <= WORK_END):
+    if lang is None and not is_working_hours():
+        now_kz = datetime.now(TIMEZONE).time()
         logger.info(f"😴 Zzz... Time is {now_kz.strftime('%H:%M')}. Working hours: 07:00-21:00.")
         return
 
     db = SessionLocal()
+    cycle_started = time_module.perf_counter()
     try:
         logger.info("Starting processing cycle...")
 
         # 2. Определение очереди (2 RU -> 1 KZ)
-        last_posts = db.query(NewsArchive).filter(
-            NewsArchive.status == NewsStatus.published.value
-        ).order_by(NewsArchive.published_at.desc()).limit(3).all()
-
-        target_lang = "RU" 
-        
-        if last_posts:
-            p1 = last_posts[0] 
-            p1_is_kz = is_text_kazakh(p1.rewritten_text or p1.title)
-            
-            if p1_is_kz:
-                target_lang = "RU"
-                logger.info("Rotation: Last was KZ -> Next RU")
-            else:
-                if len(last_posts) >= 2:
-                    p2 = last_posts[1]
-                    p2_is_kz = is_text_kazakh(p2.rewritten_text or p2.title)
-                    if not p2_is_kz: 
-                        target_lang = "KZ"
-                        logger.info("Rotation: Last 2 were RU -> Next KZ")
-                    else:
-                        target_lang = "RU" 
-                else:
-                    target_lang = "RU"
-
-        # 3. Поиск подходящего черновика
-        drafts = db.query(NewsArchive).filter(NewsArchive.status == NewsStatus.draft.value).all()
-        if not drafts:
+        target_lang = lang or rotation_next(recent_published_langs(db))
+        logger.info(f"Rotation: Next {target_lang}")
+
+        # 3. Самый ценный черновик нужного языка (свежесть, источник, тема — ranking.py)
+        DRAFT_BACKLOG.set(db.query(func.count(NewsArchive.id)).filter(
+            NewsArchive.status == NewsStatus.draft.value).scalar() or 0)
+        # Созревший повтор идёт раньше новых черновиков
+        selected = next_due_retry(db)
+        if selected is not None:
+            logger.info(f"🔁 Retrying news {selected.id} (attempt {selected.attempts + 1}, {selected.error_class})")
+            if requeue_publish(db, selected):
+                asyncio.create_task(publish_outbox_task())
+                return
+        else:
+            selected = next_draft(db, target_lang)
+        if not selected:
             logger.info("No drafts.")
             return
 
-        selected = None
-        for d in drafts:
-            draft_is_kz = is_text_kazakh(d.original_text)
-            if target_lang == "KZ" and draft_is_kz:
-                selected = d
-                break
-            if target_lang == "RU" and not draft_is_kz:
-                selected = d
-                break
-        
-        if not selected:
-            selected = drafts[0]
-            logger.info(f"Fallback: No {target_lang} drafts. Taking available.")
-
         # 4. Обработка
         try:
             selected = db.merge(selected)
             logger.info(f"Processing: {selected.title}...")
 
-            rewritten = await rewriter.rewrite(selected.original_text)
-            
+            # Черновик мог быть уже переписан конвейером (pipeline.py) — не тратим LLM повторно
+            # Двуязычная история: переписываем одну версию — ту, что нужна ротации
+            source_text, post_url, post_lang = story_variant(selected, target_lang)
+            selected.lang = post_lang
+            rewritten = selected.rewritten_text
             if not rewritten:
-                selected.status = NewsStatus.error.value
+                selected.rewrite_started_at = datetime.utcnow()
+                rewritten, usage = await rewriter.rewrite_with_usage(source_text)
+                selected.rewrite_finished_at = datetime.utcnow()
+                # rewriter глотает ошибки провайдера и отдаёт обрезанный оригинал —
+                # это временная недоступность LLM, а не плохой текст для integrity check
+                if usage.get("errors"):
+                    record_failure(selected, LLM_UNAVAILABLE, f"LLM errors: {usage['errors']}")
+                    db.commit()
+                    return
+
+            if not rewritten:
+                # Пустой ответ — модель не ответила (исходный текст не пуст): временная ошибка
+                record_failure(selected, LLM_UNAVAILABLE, "Empty rewrite")
                 db.commit()
                 return
 
-            safe_url = html.escape(selected.source_url, quote=True)
-            disclaimer = "\n\n<i>⚠️ Сообщение создано ИИ. Проверяйте информацию по ссылке ниже.</i>"
-            source_link = f"\n<a href=\"{safe_url}\">🌐 Түпнұсқа / Источник</a>"
-            final_text = f"{rewritten}{disclaimer}{source_link}"
+            final_text = build_post_text(rewritten, post_url)
 
-            if not is_post_integrity_ok(final_text, selected.source_url):
+            if not is_post_integrity_ok(final_text, post_url):
                 logger.warning(f"⚠️ Rejected by Integrity Check: {selected.id}")
-                selected.status = NewsStatus.error.value
+                record_failure(selected, INTEGRITY, "Rejected by integrity check")
                 db.commit()
                 return
 
-            post_id = await publisher.publish(final_text, selected.image_url)
-            
-            if post_id:
-                selected.telegram_post_id = str(post_id)
-                selected.status = NewsStatus.published.value
-                selected.published_at = datetime.utcnow()
-                selected.rewritten_text = rewritten
-                db.commit()
-                logger.info(f"✅ Published: {post_id}")
+            # Отправку делает воркер outbox: здесь только фиксируем пост в одной транзакции
+            selected.rewritten_text = rewritten
+            if enqueue_or_skip(db, selected, final_text, selected.image_url, publisher.target_chats(post_lang)):
+                logger.info(f"📤 Queued for publishing: {selected.id}")
+                asyncio.create_task(publish_outbox_task())
             
         except Exception as e:
             logger.error(f"Processing Error: {e}")
-            selected.status = NewsStatus.error.value
+            db.rollback()
+            record_failure(selected, classify(e), f"{type(e).__name__}: {e}")
             db.commit()
 
     except Exception as e:
         logger.error(f"Task Error: {e}")
     finally:
         db.close()
+        PROCESS_CYCLE_SECONDS.observe(time_module.perf_counter() - cycle_started)
 
 def start_scheduler():
     from apscheduler.schedulers.asyncio import AsyncIOScheduler
     scheduler = AsyncIOScheduler()
-    scheduler.add_job(scrape_news_task, 'interval', minutes=settings.SCRAPE_INTERVAL_MINUTES)
-    scheduler.add_job(process_news_task, 'interval', minutes=settings.PUBLISH_INTERVAL_MINUTES)
-    
-    def ping():
-        try: requests.get("http://127.0.0.1:8000/health", timeout=5)
-        except: pass
-    scheduler.add_job(ping, 'interval', minutes=4)
-    
+    if settings.PIPELINE_ENABLED:
+        from .pipeline import pipeline
+        pipeline.start()
+    elif settings.ADAPTIVE_POLLING:
+        scheduler.add_job(poll_due_sources, 'interval', minutes=1, max_instances=1)
+    else:
+        scheduler.add_job(scrape_news_task, 'interval', minutes=settings.SCRAPE_INTERVAL_MINUTES)
+    if settings.PUBLISH_PLAN_ENABLED:
+        from .planner import planner
+        planner.attach(scheduler)
+    else:
+        scheduler.add_job(process_news_task, 'interval', minutes=settings.PUBLISH_INTERVAL_MINUTES)
+    scheduler.add_job(heartbeat, 'interval', seconds=settings.SHARD_HEARTBEAT_SECONDS)
+    scheduler.add_job(publish_outbox_task, 'interval', seconds=settings.OUTBOX_POLL_SECONDS)
+    scheduler.add_job(reconcile_outbox, 'interval', seconds=settings.OUTBOX_CLAIM_TIMEOUT_SECONDS)
+
     scheduler.start()
     return scheduler
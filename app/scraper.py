@@ -1,3 +1,5 @@
+import asyncio
+import importlib.util
 import requests
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta, timezone
@@ -7,12 +9,20 @@ import re
 import time
 from typing import List, Dict, Optional, Tuple
 
-# Playwright — только для gov.kz (получение токенов)
-try:
-    from playwright.async_api import async_playwright
-    PLAYWRIGHT_AVAILABLE = True
-except ImportError:
-    PLAYWRIGHT_AVAILABLE = False
+from .config import settings
+from .cpu import map_chunked
+from .items import NewsItem, LANG_BOTH
+from .dates import extract_published_at
+from .corpus import RecordedResponse, get_corpus, api_key, page_key
+from .source_health import breakers
+from .metrics import (
+    TOKEN_HARVEST_SECONDS, TOKEN_HARVEST_FAILURES, SOURCE_API_SECONDS, SOURCE_API_ERRORS, SOURCE_SKIPPED,
+    ENRICH_PAGES, ENRICH_BYTES,
+)
+
+# Playwright — только для gov.kz (получение токенов). Проверяем наличие без импорта:
+# сам пакет грузится только когда действительно нужен браузер
+PLAYWRIGHT_AVAILABLE = importlib.util.find_spec("playwright") is not None
 
 # Отключаем надоедливые предупреждения о SSL
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -180,11 +190,23 @@ async def _fetch_gov_kz_tokens() -> Optional[Dict]:
     которые браузер передаёт в API gov.kz.
     Возвращает словарь с заголовками для requests.
     """
+    # Replay из корпуса: токены никто не проверяет
+    if settings.SCRAPER_MODE == "replay":
+        return {"hash": "replay", "token": "replay", "user-agent": "Mozilla/5.0", "obtained_at": time.time()}
+
+    # Заданы статические токены (бенчмарк/стенд) — браузер не нужен
+    if settings.GOV_KZ_STATIC_TOKENS:
+        token_hash, _, token = settings.GOV_KZ_STATIC_TOKENS.partition(":")
+        return {"hash": token_hash, "token": token, "user-agent": "Mozilla/5.0", "obtained_at": time.time()}
+
     if not PLAYWRIGHT_AVAILABLE:
         logger.error("Playwright не установлен. Добавь в requirements.txt: playwright")
         return None
 
+    from playwright.async_api import async_playwright
+
     tokens = {}
+    started = time.perf_counter()
     try:
         async with async_playwright() as p:
             browser = await p.chromium.launch(
@@ -228,24 +250,233 @@ async def _fetch_gov_kz_tokens() -> Optional[Dict]:
 
     except Exception as e:
         logger.error(f"Ошибка получения токенов gov.kz: {e}")
+        TOKEN_HARVEST_FAILURES.inc()
         return None
 
+    TOKEN_HARVEST_SECONDS.observe(time.perf_counter() - started)
+    if not tokens:
+        TOKEN_HARVEST_FAILURES.inc()
     return tokens if tokens else None
 
 
+def _parse_gov_kz_item(config: Dict, item: Dict) -> Optional[NewsItem]:
+    name = config.get("name", "Unknown")
+    project = config.get("project")
+    base_url = config.get("base_url", "https://www.gov.kz")
+
+    title = item.get("name", "").strip() or item.get("title", "").strip()
+    slug = item.get("id") or item.get("slug", "")
+    
+    if not title or not slug:
+        return None
+
+    lang = item.get("_lang", "ru")
+    link = f"{base_url}/memleket/entities/{project}/press/news/details/{slug}?lang={lang}"
+
+    # === КЛЮЧЕВОЕ ИЗМЕНЕНИЕ: ДОСТАЕМ ТЕКСТ ИЗ JSON ===
+    # В gov.kz текст обычно лежит в 'body' в формате HTML
+    raw_body = item.get("body", "") or item.get("content", "") or ""
+    
+    # Очищаем от HTML тегов
+    soup = BeautifulSoup(raw_body, "html.parser")
+    clean_text = soup.get_text(separator="\n").strip()
+
+    # Добываем картинку (если есть в API)
+    image_url = None
+    images = item.get("images", [])
+    if isinstance(images, list) and images:
+        img_path = images[0].get("url") or images[0].get("file", {}).get("url")
+        if img_path:
+            image_url = f"{base_url}{img_path}" if img_path.startswith("/") else img_path
+
+    # Дата из API (формат ISO)
+    pub_date = None
+    date_str = item.get("created_date") or item.get("published_at")
+    if date_str:
+        try:
+            # Убираем миллисекунды Z и парсим
+            clean_date_str = date_str.split(".")[0].replace("Z", "")
+            pub_date = datetime.strptime(clean_date_str, "%Y-%m-%dT%H:%M:%S")
+        except Exception:
+            pass
+
+    return NewsItem(
+        title=title,
+        source_name=name,
+        source_url=link,
+        original_text=clean_text if len(clean_text) > 50 else title, # Если текст слишком короткий, страхуемся
+        image_url=image_url,
+        published_at=pub_date,
+        fetched_at=item.get("_fetched_at"),
+        gov_id=str(slug),
+        lang="KZ" if lang == "kk" else "RU",
+    )
+
+
+def parse_gov_kz_items(jobs: List[Tuple[Dict, Dict]]) -> List[NewsItem]:
+    """
+    CPU-часть: превращает сырые JSON-элементы API в новости (BeautifulSoup по body).
+    Чистая функция без сети и глобального состояния — её можно гонять в пуле
+    процессов (см. cpu.py) пачками [(config источника, элемент API), ...].
+    """
+    news = []
+    for config, item in jobs:
+        parsed = _parse_gov_kz_item(config, item)
+        if parsed:
+            news.append(parsed)
+    return news
+
+
+# ========== РАЗБОР СТРАНИЦЫ НОВОСТИ ==========
+# Всё нужное (meta в <head>, дата и абзацы статьи) стоит в начале страницы
+_PAGE_END = re.compile(rb"</(?:article|main)>", re.IGNORECASE)
+
+
+def _page_complete(buf: bytes, scanned: int) -> bool:
+    """Пришли ли уже </head> и конец блока статьи; ищем только в новой части буфера."""
+    head = buf.find(b"</head>")
+    if head < 0:
+        return False
+    return _PAGE_END.search(buf, max(head, scanned - 16)) is not None
+
+
+def thin_text(item: NewsItem) -> bool:
+    """API не дал текста — тематику по такой новости судить рано, текст будет со страницы."""
+    text = item.original_text
+    return not text or len(text) < 50 or text == item.title
+
+
+def needs_enrichment(item: NewsItem) -> bool:
+    """API уже дал текст, картинку и дату — страницу качать незачем."""
+    return thin_text(item) or not item.image_url or not item.published_at
+
+
+def parse_detail_page(html: bytes, title: str) -> Tuple[str, Optional[str], Optional[datetime]]:
+    """Текст (абзацы длиннее 50 символов), картинка (og:image или первый <img>) и дата со страницы."""
+    if not html:
+        return "", None, None
+    soup = BeautifulSoup(html, "html.parser")
+
+    paragraphs = (p.get_text() for p in soup.find_all("p"))
+    full_text = "\n".join(text for text in paragraphs if len(text) > 50)
+
+    image_url = None
+    og = soup.find("meta", property="og:image")
+    if og and og.get("content"):
+        image_url = og.get("content")
+    if not image_url:
+        img = soup.find("img")
+        if img and img.get("src"):
+            image_url = img.get("src")
+
+    return full_text or title, image_url, extract_published_at(soup.get_text())
+
+
+def parse_detail_pages(jobs: List[Tuple[bytes, str]]) -> List[Tuple[str, Optional[str], Optional[datetime]]]:
+    """Пачка parse_detail_page для map_chunked: [(html, title), ...]."""
+    return [parse_detail_page(html, title) for html, title in jobs]
+
+
+def gov_kz_langs() -> List[str]:
+    return [lang.strip() for lang in settings.GOV_KZ_LANGS.split(",") if lang.strip()] or ["ru"]
+
+
+def pair_languages(news: List[NewsItem]) -> List[NewsItem]:
+    """
+    Склеивает RU и KZ версии одной новости gov.kz (тот же источник и id) в одну историю:
+    RU — основной текст и ссылка, KZ — в *_kz, lang = LANG_BOTH. Дальше история проходит
+    дедуп, хранение и переписывание один раз; язык поста выбирает ротация.
+    Новость только на одном языке остаётся как есть.
+    """
+    groups: Dict[Tuple[str, str], List[NewsItem]] = {}
+    stories = []
+    for item in news:
+        if not item.gov_id:
+            stories.append(item)
+            continue
+        key = (item.source_name, item.gov_id)
+        if key not in groups:
+            groups[key] = []
+            stories.append(key)
+        groups[key].append(item)
+
+    paired = []
+    for story in stories:
+        if isinstance(story, NewsItem):
+            paired.append(story)
+            continue
+        variants = groups[story]
+        ru = next((v for v in variants if v.lang == "RU"), None)
+        kz = next((v for v in variants if v.lang == "KZ"), None)
+        if ru is None or kz is None:
+            paired.append(variants[0])
+            continue
+        # Нет перевода — gov.kz отдаёт тот же текст в обеих лентах: это одна версия, а не две
+        if kz.original_text != ru.original_text:
+            ru.title_kz = kz.title
+            ru.original_text_kz = kz.original_text
+            ru.source_url_kz = kz.source_url
+            ru.lang = LANG_BOTH
+        ru.image_url = ru.image_url or kz.image_url
+        ru.published_at = ru.published_at or kz.published_at
+        paired.append(ru)
+    return paired
+
+
+# Сколько живут токены gov.kz (батчевый режим берёт свежие на каждые 5 источников)
+GOV_KZ_TOKEN_TTL_SECONDS = 60
+
+
+def _http_get(key: str, url: str, headers: Dict):
+    """
+    GET с учётом SCRAPER_MODE: live — requests; record — requests + запись в корпус;
+    replay — ответ из корпуса (незаписанный запрос выглядит как 404).
+    """
+    mode = settings.SCRAPER_MODE
+    if mode == "replay":
+        return get_corpus().replay(key) or RecordedResponse(404, b"")
+    resp = requests.get(url, headers=headers, timeout=15, verify=False)
+    if mode == "record":
+        try:
+            get_corpus().record(key, resp.status_code, resp.content)
+        except Exception as e:
+            logger.warning(f"Не удалось записать {key} в корпус: {e}")
+    return resp
+
+
+def _polite_sleep(seconds: float) -> None:
+    """Паузы нужны только живому gov.kz; replay идёт без них."""
+    if settings.SCRAPER_MODE != "replay":
+        time.sleep(seconds)
+
+
 class NewsScraper:
     def __init__(self, direct_sources: List[Dict] = None):
         self.direct_sources = direct_sources or DIRECT_SCRAPE_SOURCES
+        self._tokens: Optional[Dict] = None
+        self._tokens_lock = asyncio.Lock()
+        self._client = None  # httpx.AsyncClient для страниц новостей, см. _get_client
+
+    async def get_tokens(self, max_age: float = GOV_KZ_TOKEN_TTL_SECONDS) -> Optional[Dict]:
+        """
+        Общие токены для потоковых воркеров (pipeline.py): Playwright запускается,
+        только если кэш старше max_age, и одновременно не более одного раза.
+        """
+        async with self._tokens_lock:
+            if self._tokens and time.time() - self._tokens.get("obtained_at", 0) < max_age:
+                return self._tokens
+            self._tokens = await _fetch_gov_kz_tokens()
+            return self._tokens
 
     # ========== ASYNC МЕТОД ДЛЯ ИНТЕГРАЦИИ С FASTAPI ==========
-    async def scrape_async(self) -> List[Dict]:
+    async def scrape_async(self, sources: Optional[List[Dict]] = None) -> List[NewsItem]:
         """
         Async-версия scrape() для интеграции с FastAPI.
-        Возвращает список новостей БЕЗ full_text и даты.
-        Это будет добавлено позже через enrich_news_with_content().
+        Текст, картинка и дата — из JSON API; чего не хватает, дозаполняет enrich_many().
+        sources — подмножество источников (шард этой реплики); по умолчанию все.
         """
         all_news = []
-        gov_sources = [s for s in self.direct_sources if s.get("gov_kz")]
+        gov_sources = [s for s in (self.direct_sources if sources is None else sources) if s.get("gov_kz")]
 
         if gov_sources:
             gov_news = await self._scrape_all_gov_kz_batched(gov_sources)
@@ -254,12 +485,12 @@ class NewsScraper:
         logger.info(f"📊 Собрано новостей (без full_text): {len(all_news)}")
         return all_news
 
-    async def _scrape_all_gov_kz_batched(self, sources: List[Dict]) -> List[Dict]:
+    async def _scrape_all_gov_kz_batched(self, sources: List[Dict]) -> List[NewsItem]:
         """
         Обрабатывает gov.kz источники батчами по 5 штук.
         Для каждого батча получаются СВЕЖИЕ токены через Playwright.
         """
-        all_news = []
+        raw_jobs = []
         batch_size = 5
         
         total_batches = (len(sources) + batch_size - 1) // batch_size
@@ -286,25 +517,35 @@ class NewsScraper:
 
             for source in batch:
                 try:
-                    news = self._scrape_gov_kz_source(source, tokens)
-                    all_news.extend(news)
-                    time.sleep(0.7)
+                    for lang in gov_kz_langs():
+                        raw_jobs.extend((source, item) for item in self._fetch_gov_kz_items(source, tokens, lang))
+                        _polite_sleep(0.7)
                 except Exception as e:
                     logger.error(f"❌ Ошибка обработки {source['name']}: {e}")
                     continue
 
             if batch_num < total_batches:
                 logger.info(f"⏸️  Пауза 3 сек перед следующим батчем...")
-                time.sleep(3)
+                _polite_sleep(3)
 
+        # Сеть — в батчах, разбор HTML — одной пачкой (в пуле процессов, если она большая)
+        all_news = pair_languages(await map_chunked(parse_gov_kz_items, raw_jobs))
         logger.info(f"✅ Все батчи обработаны. Собрано новостей: {len(all_news)}")
         return all_news
 
-    def _scrape_gov_kz_source(self, config: Dict, tokens: Dict) -> List[Dict]:
+    def _scrape_gov_kz_source(self, config: Dict, tokens: Dict) -> List[NewsItem]:
         """
         Парсит ТОЛЬКО ТОП-3 новости из gov.kz источника через API.
         Теперь СРАЗУ вытаскивает полный текст из JSON-ответа!
         """
+        raw_items = [item for lang in gov_kz_langs() for item in self._fetch_gov_kz_items(config, tokens, lang)]
+        news = pair_languages(parse_gov_kz_items([(config, item) for item in raw_items]))
+        if raw_items:
+            logger.info(f"✅ {config.get('name', 'Unknown')}: собрано {len(news)} новостей с ТЕКСТОМ")
+        return news
+
+    def _fetch_gov_kz_items(self, config: Dict, tokens: Dict, lang: str = "ru") -> List[Dict]:
+        """Только сетевая часть: сырые JSON-элементы топ-3 новостей источника в ленте языка lang."""
         name = config.get("name", "Unknown")
         project = config.get("project")
         base_url = config.get("base_url", "https://www.gov.kz")
@@ -315,30 +556,42 @@ class NewsScraper:
 
         # Запрашиваем 20, но берём только топ-3
         api_url = (
-            f"https://www.gov.kz/api/v1/public/content-manager/news"
+            f"{settings.GOV_KZ_API_URL}"
             f"?sort-by=created_date:DESC&projects=eq:{project}&page=1&size=20"
         )
 
         headers = {
             "accept": "application/json",
-            "accept-language": "ru",
+            "accept-language": lang,  # язык ленты gov.kz выбирает по этому заголовку
             "user-agent": tokens.get("user-agent", "Mozilla/5.0"),
-            "referer": f"{base_url}/memleket/entities/{project}/press/news?lang=ru",
+            "referer": f"{base_url}/memleket/entities/{project}/press/news?lang={lang}",
             "hash": tokens["hash"],
             "token": tokens["token"],
             "origin": base_url,
         }
 
-        news = []
+        # Источник падал подряд — не тратим на него 15-секундный таймаут, ждём пробного запроса
+        if not breakers.allow(name):
+            logger.info(f"⏭ {name}: breaker открыт, пропускаем")
+            SOURCE_SKIPPED.labels(name).inc()
+            return []
+
+        started = time.perf_counter()
         try:
-            logger.info(f"API запрос: {name}...")
-            resp = requests.get(api_url, headers=headers, timeout=15, verify=False)
+            logger.info(f"API запрос: {name} ({lang})...")
+            resp = _http_get(api_key(project, lang), api_url, headers)
             
             if resp.status_code != 200:
                 logger.error(f"API {name} вернул код {resp.status_code}")
+                # 4xx — обычно протухшие токены, источник тут ни при чём
+                breakers.record_failure(name, time.perf_counter() - started, f"HTTP {resp.status_code}",
+                                        trip=resp.status_code >= 500)
+                SOURCE_API_ERRORS.labels(name, f"http_{resp.status_code // 100}xx").inc()
                 return []
             
             data = resp.json()
+            breakers.record_success(name, time.perf_counter() - started)
+            SOURCE_API_SECONDS.labels(name).observe(time.perf_counter() - started)
 
             items = []
             if isinstance(data, list):
@@ -350,181 +603,108 @@ class NewsScraper:
                 logger.warning(f"{name}: API вернул пустой список")
                 return []
 
-            items = items[:3]
             logger.info(f"{name}: Берём топ-3")
-
-            for item in items:
-                if not isinstance(item, dict):
-                    continue
-
-                title = item.get("name", "").strip() or item.get("title", "").strip()
-                slug = item.get("id") or item.get("slug", "")
-                
-                if not title or not slug:
-                    continue
-
-                link = f"{base_url}/memleket/entities/{project}/press/news/details/{slug}?lang=ru"
-
-                # === КЛЮЧЕВОЕ ИЗМЕНЕНИЕ: ДОСТАЕМ ТЕКСТ ИЗ JSON ===
-                # В gov.kz текст обычно лежит в 'body' в формате HTML
-                raw_body = item.get("body", "") or item.get("content", "") or ""
-                
-                # Очищаем от HTML тегов
-                soup = BeautifulSoup(raw_body, "html.parser")
-                clean_text = soup.get_text(separator="\n").strip()
-
-                # Добываем картинку (если есть в API)
-                image_url = None
-                images = item.get("images", [])
-                if isinstance(images, list) and images:
-                    img_path = images[0].get("url") or images[0].get("file", {}).get("url")
-                    if img_path:
-                        image_url = f"https://www.gov.kz{img_path}" if img_path.startswith("/") else img_path
-
-                # Дата из API (формат ISO)
-                pub_date = None
-                date_str = item.get("created_date") or item.get("published_at")
-                if date_str:
-                    try:
-                        # Убираем миллисекунды Z и парсим
-                        clean_date_str = date_str.split(".")[0].replace("Z", "")
-                        pub_date = datetime.strptime(clean_date_str, "%Y-%m-%dT%H:%M:%S")
-                    except Exception:
-                        pass
-
-                news.append({
-                    "title": title,
-                    "source_name": name,
-                    "source_url": link,
-                    "original_text": clean_text if len(clean_text) > 50 else title, # Если текст слишком короткий, страхуемся
-                    "image_url": image_url,
-                    "published_at": pub_date,
-                })
-
-            logger.info(f"✅ {name}: собрано {len(news)} новостей с ТЕКСТОМ")
+            fetched_at = datetime.utcnow()
+            top = [item for item in items[:3] if isinstance(item, dict)]
+            for item in top:
+                item["_fetched_at"] = fetched_at  # для таймлайна новости (trace.py)
+                item["_lang"] = lang
+            return top
 
         except Exception as e:
             logger.error(f"Ошибка API {name}: {e}")
+            breakers.record_failure(name, time.perf_counter() - started, f"{type(e).__name__}: {e}")
+            SOURCE_API_ERRORS.labels(name, type(e).__name__).inc()
+            return []
 
-        return news      
-       
+    # ========== ОБОГАЩЕНИЕ ДАННЫМИ СО СТРАНИЦЫ НОВОСТИ ==========
+    def _get_client(self):
+        """Один пул соединений на все страницы (httpx грузится только при первом обогащении)."""
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                headers={"User-Agent": "Mozilla/5.0"},
+                timeout=settings.ENRICH_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_connections=settings.ENRICH_CONCURRENCY,
+                                    max_keepalive_connections=settings.ENRICH_CONCURRENCY),
+                follow_redirects=True,
+                verify=False,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
-    # ========== НОВАЯ ФУНКЦИЯ: ОБОГАЩЕНИЕ ДАННЫМИ ==========
-    def enrich_news_with_content(self, news_item: Dict) -> Dict:
+    async def _fetch_page(self, url: str) -> Optional[bytes]:
         """
-        Для ОДНОЙ новости (которая прошла проверку БД):
-        1. Парсит полный текст и картинку со страницы
-        2. Ищет дату в видимом тексте через regex
-        3. Если дата не найдена — присваивает datetime.now()
-        
-        Используй эту функцию ПОСЛЕ проверки "есть ли title в БД".
+        Начало страницы: читаем поток, пока не пришли <head> и закрытый блок статьи
+        (или ENRICH_MAX_BYTES), остальное — комментарии, подвал, скрипты — не качаем.
         """
-        url = news_item.get("source_url")
-        if not url:
-            logger.error("enrich_news_with_content: нет source_url")
-            return news_item
+        key = page_key(url)
+        if settings.SCRAPER_MODE == "replay":
+            resp = get_corpus().replay(key)
+            return resp.content if resp and resp.status_code == 200 else None
 
-        try:
-            headers = {"User-Agent": "Mozilla/5.0"}
-            response = requests.get(url, headers=headers, timeout=15, verify=False)
-            
-            if response.status_code != 200:
-                logger.warning(f"Не удалось загрузить страницу: {url} (код {response.status_code})")
-                # Присваиваем текущую дату если страница недоступна
-                news_item["published_at"] = datetime.now()
-                return news_item
-                
-            soup = BeautifulSoup(response.content, "html.parser")
-
-            # 1. Собираем полный текст
-            paragraphs = soup.find_all("p")
-            full_text = "\n".join([p.get_text() for p in paragraphs if len(p.get_text()) > 50])
-            news_item["original_text"] = full_text if full_text else news_item["title"]
-
-            # 2. Ищем картинку
-            image_url = None
-            og = soup.find("meta", property="og:image")
-            if og and og.get("content"):
-                image_url = og.get("content")
-            if not image_url:
-                img = soup.find("img")
-                if img and img.get("src"):
-                    image_url = img.get("src")
-            news_item["image_url"] = image_url
-
-            # 3. КРИТИЧЕСКИ ВАЖНО: ищем дату в ВИДИМОМ ТЕКСТЕ
-            page_text = soup.get_text()
-            published_at = self._extract_date_from_text(page_text)
-            
-            if published_at:
-                logger.info(f"✅ Дата найдена в тексте: {published_at.strftime('%Y-%m-%d')} для [{news_item['title'][:50]}...]")
-            else:
-                # Если дата не найдена — присваиваем текущую
-                published_at = datetime.now()
-                logger.warning(f"⚠️ Дата не найдена, присваиваем текущую для [{news_item['title'][:50]}...]")
-            
-            news_item["published_at"] = published_at
-
-        except Exception as e:
-            logger.error(f"Ошибка обогащения данными для {url}: {e}")
-            # В случае ошибки присваиваем текущую дату
-            news_item["published_at"] = datetime.now()
-
-        return news_item
+        buf = bytearray()
+        async with self._get_client().stream("GET", url) as resp:
+            if resp.status_code != 200:
+                logger.warning(f"Не удалось загрузить страницу: {url} (код {resp.status_code})")
+                return None
+            async for chunk in resp.aiter_bytes():
+                scanned = len(buf)
+                buf += chunk
+                if len(buf) >= settings.ENRICH_MAX_BYTES or _page_complete(buf, scanned):
+                    break
+        content = bytes(buf)
+        ENRICH_BYTES.inc(len(content))
+        if settings.SCRAPER_MODE == "record":
+            try:
+                get_corpus().record(key, 200, content)
+            except Exception as e:
+                logger.warning(f"Не удалось записать {key} в корпус: {e}")
+        return content
 
-    # ========== ПАРСИНГ ДАТ ИЗ ТЕКСТА ==========
-    def _extract_date_from_text(self, text: str) -> Optional[datetime]:
+    async def enrich_many(self, items: List[NewsItem]) -> List[NewsItem]:
         """
-        Улучшенный поиск даты. Ловит форматы:
-        - "16 февраля 2026 19:16"
-        - "16 февраля, 2026"
-        - "16.02.2026 / 19:16"
+        Дозаполняет новости со страниц-оригиналов: текст, картинку и дату — только то,
+        чего не дал JSON API. Новости, у которых всё есть, страницу не качают вовсе.
+        Страницы грузятся параллельно (не больше ENRICH_CONCURRENCY), разбор — одной
+        пачкой через map_chunked. Если дата так и не нашлась — datetime.utcnow().
         """
-        if not text: return None
-        
-        # Ищем в первых 3500 символах (начало страницы)
-        search_area = text[:5000]
+        todo = [item for item in items if item.source_url and needs_enrichment(item)]
+        ENRICH_PAGES.labels("skipped").inc(len(items) - len(todo))
+        if not todo:
+            return items
 
-        months_ru = {
-            "января": 1, "февраля": 2, "марта": 3, "апреля": 4, "мая": 5, "июня": 6,
-            "июля": 7, "августа": 8, "сентября": 9, "октября": 10, "ноября": 11, "декабря": 12
-        }
+        semaphore = asyncio.Semaphore(settings.ENRICH_CONCURRENCY)
 
-        # 1. Текстовый формат: "16 февраля 2026"
-        # Добавил [,\s]+ чтобы ловить запятые и любые пробелы
-        # Добавил (?:г\.|года)? чтобы год с буквой "г" не ломал поиск
-        pattern1 = r"(\d{1,2})[,\s]+(января|февраля|марта|апреля|мая|июня|июля|августа|сентября|октября|ноября|декабря)[,\s]+(\d{4})"
-        
-        match = re.search(pattern1, search_area, re.IGNORECASE)
-        if match:
-            try:
-                day = int(match.group(1))
-                month = months_ru[match.group(2).lower()]
-                year = int(match.group(3))
-                return datetime(year, month, day)
-            except Exception: pass
-
-        # 2. Цифровой формат: "16.02.2026" или "16/02/2026" или "16-02-2026"
-        pattern2 = r"(\d{1,2})[\.\-\/](\d{1,2})[\.\-\/](\d{4})"
-        match = re.search(pattern2, search_area)
-        if match:
-            try:
-                # Пробуем ДД.ММ.ГГГГ
-                d, m, y = int(match.group(1)), int(match.group(2)), int(match.group(3))
-                if d > 31: # Значит это формат ГГГГ.ММ.ДД
-                    return datetime(d, m, y)
-                return datetime(y, m, d)
-            except Exception: pass
-
-        # 3. ISO формат: "2026-02-16"
-        pattern3 = r"(\d{4})-(\d{2})-(\d{2})"
-        match = re.search(pattern3, search_area)
-        if match:
-            try:
-                return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
-            except Exception: pass
-
-        return None
+        async def fetch(item: NewsItem) -> Optional[bytes]:
+            async with semaphore:
+                try:
+                    return await self._fetch_page(item.source_url)
+                except Exception as e:
+                    logger.error(f"Ошибка обогащения данными для {item.source_url}: {e}")
+                    return None
+
+        pages = await asyncio.gather(*(fetch(item) for item in todo))
+        parsed = await map_chunked(parse_detail_pages, [(page or b"", item.title) for item, page in zip(todo, pages)])
+
+        for item, page, (text, image_url, published_at) in zip(todo, pages, parsed):
+            ENRICH_PAGES.labels("fetched" if page is not None else "failed").inc()
+            if thin_text(item):
+                item.original_text = text or item.title
+            if not item.image_url:
+                item.image_url = image_url
+            if not item.published_at:
+                if published_at:
+                    logger.info(f"✅ Дата найдена в тексте: {published_at.strftime('%Y-%m-%d')} для [{item.title[:50]}...]")
+                else:
+                    published_at = datetime.utcnow()
+                    logger.warning(f"⚠️ Дата не найдена, присваиваем текущую для [{item.title[:50]}...]")
+                item.published_at = published_at
+        return items
 
 
 scraper = NewsScraper()
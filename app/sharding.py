@@ -0,0 +1,95 @@
+import hashlib
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from .database import SessionLocal, ScraperLease
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Уникальный идентификатор процесса: ключ lease реплики и claimed_by в outbox
+INSTANCE_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+# Последний известный состав живых реплик (обновляется на каждом heartbeat)
+_live_instances: List[str] = [INSTANCE_ID]
+
+
+def heartbeat() -> List[str]:
+    """
+    Продлевает lease этой реплики, удаляет просроченные и запоминает состав живых.
+    Упавшая реплика пропадает из списка максимум через SHARD_LEASE_SECONDS —
+    её источники на следующем цикле разойдутся по остальным.
+    """
+    global _live_instances
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        expires = now + timedelta(seconds=settings.SHARD_LEASE_SECONDS)
+        lease = db.get(ScraperLease, INSTANCE_ID)
+        if lease is None:
+            db.add(ScraperLease(instance_id=INSTANCE_ID, started_at=now, heartbeat_at=now, expires_at=expires))
+            logger.info(f"🪪 Lease зарегистрирован: {INSTANCE_ID}")
+        else:
+            lease.heartbeat_at = now
+            lease.expires_at = expires
+        db.query(ScraperLease).filter(ScraperLease.expires_at < now).delete(synchronize_session=False)
+        db.commit()
+
+        live = sorted(r[0] for r in db.query(ScraperLease.instance_id).filter(ScraperLease.expires_at >= now).all())
+        if live != _live_instances:
+            logger.info(f"🔀 Состав реплик изменился: {live}")
+        _live_instances = live or [INSTANCE_ID]
+    except Exception as e:
+        db.rollback()
+        # БД недоступна — работаем со старым составом, а не с пустым
+        logger.error(f"Lease heartbeat error: {e}")
+    finally:
+        db.close()
+    return _live_instances
+
+
+def release() -> None:
+    """Снимает lease при штатной остановке — шард перераспределится сразу."""
+    db = SessionLocal()
+    try:
+        db.query(ScraperLease).filter(ScraperLease.instance_id == INSTANCE_ID).delete(synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Lease release error: {e}")
+    finally:
+        db.close()
+
+
+def _owner(key: str, instances: List[str]) -> str:
+    # Rendezvous hashing: при уходе/приходе реплики переезжают только её источники
+    return max(instances, key=lambda inst: hashlib.md5(f"{inst}|{key}".encode()).digest())
+
+
+def source_key(source: Dict) -> str:
+    return source.get("project") or source.get("url") or source.get("name", "")
+
+
+def my_sources(sources: List[Dict]) -> List[Dict]:
+    """Источники, которые должна скрапить именно эта реплика."""
+    instances = _live_instances if INSTANCE_ID in _live_instances else _live_instances + [INSTANCE_ID]
+    return [s for s in sources if _owner(source_key(s), instances) == INSTANCE_ID]
+
+
+def is_coordinator() -> bool:
+    """
+    Одна реплика из живых (первая по id) ведёт то, что нельзя делить:
+    выбор черновика и переписывание в process_news_task.
+    """
+    return not _live_instances or _live_instances[0] == INSTANCE_ID
+
+
+def status() -> Dict:
+    return {
+        "instance_id": INSTANCE_ID,
+        "live_instances": list(_live_instances),
+        "coordinator": is_coordinator(),
+    }
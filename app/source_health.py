@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Сколько последних запросов держим для процента успеха и перцентилей
+WINDOW = 50
+
+
+class SourceHealth:
+    __slots__ = ("name", "samples", "total_ok", "total_fail", "consecutive_failures",
+                 "last_ok_at", "last_error", "last_error_at", "state", "opened_at", "probe_in_flight")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.samples = deque(maxlen=WINDOW)  # (ok, latency_sec)
+        self.total_ok = 0
+        self.total_fail = 0
+        self.consecutive_failures = 0
+        self.last_ok_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[datetime] = None
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def snapshot(self) -> Dict:
+        latencies = sorted(lat for _, lat in self.samples)
+        ok = sum(1 for good, _ in self.samples if good)
+
+        def pct(p: float) -> Optional[int]:
+            if not latencies:
+                return None
+            return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000)
+
+        return {
+            "source": self.name,
+            "state": self.state,
+            "success_rate": round(ok / len(self.samples), 3) if self.samples else None,
+            "latency_p50_ms": pct(0.5),
+            "latency_p95_ms": pct(0.95),
+            "latency_p99_ms": pct(0.99),
+            "requests": self.total_ok + self.total_fail,
+            "consecutive_failures": self.consecutive_failures,
+            "last_ok_at": self.last_ok_at.isoformat() if self.last_ok_at else None,
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at.isoformat() if self.last_error_at else None,
+        }
+
+
+class SourceBreakers:
+    """
+    Circuit breaker на каждый источник. После SOURCE_BREAKER_THRESHOLD ошибок подряд
+    источник пропускается SOURCE_BREAKER_COOLDOWN_SECONDS, затем пропускаем ровно
+    один пробный запрос (half-open): успех — закрываем, ошибка — снова открываем.
+    Вызывается из потоков (requests в to_thread), поэтому под lock.
+    """
+
+    def __init__(self):
+        self._sources: Dict[str, SourceHealth] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str) -> SourceHealth:
+        if name not in self._sources:
+            self._sources[name] = SourceHealth(name)
+        return self._sources[name]
+
+    def allow(self, name: str) -> bool:
+        with self._lock:
+            h = self._get(name)
+            if h.state == CLOSED:
+                return True
+            if h.state == OPEN and time.monotonic() - h.opened_at >= settings.SOURCE_BREAKER_COOLDOWN_SECONDS:
+                h.state = HALF_OPEN
+                h.probe_in_flight = False
+            if h.state == HALF_OPEN and not h.probe_in_flight:
+                h.probe_in_flight = True
+                logger.info(f"🩺 {name}: пробный запрос (half-open)")
+                return True
+            return False
+
+    def record_success(self, name: str, latency: float) -> None:
+        with self._lock:
+            h = self._get(name)
+            h.samples.append((True, latency))
+            h.total_ok += 1
+            h.consecutive_failures = 0
+            h.last_ok_at = datetime.utcnow()
+            if h.state != CLOSED:
+                logger.info(f"✅ {name}: источник снова отвечает, breaker закрыт")
+            h.state = CLOSED
+            h.probe_in_flight = False
+
+    def record_failure(self, name: str, latency: float, error: str, trip: bool = True) -> None:
+        """trip=False — ошибка учитывается в статистике, но не открывает breaker (например, 4xx из-за токенов)."""
+        with self._lock:
+            h = self._get(name)
+            h.samples.append((False, latency))
+            h.total_fail += 1
+            h.last_error = error
+            h.last_error_at = datetime.utcnow()
+            if not trip:
+                # Пробный запрос half-open не доказал, что источник здоров, — снова открываем,
+                # иначе probe_in_flight так и останется True и источник не опросится никогда
+                if h.state == HALF_OPEN:
+                    h.state = OPEN
+                    h.opened_at = time.monotonic()
+                    h.probe_in_flight = False
+                return
+            h.consecutive_failures += 1
+            if h.state == HALF_OPEN or h.consecutive_failures >= settings.SOURCE_BREAKER_THRESHOLD:
+                if h.state != OPEN:
+                    logger.warning(f"🔌 {name}: breaker открыт на {settings.SOURCE_BREAKER_COOLDOWN_SECONDS} сек ({error})")
+                h.state = OPEN
+                h.opened_at = time.monotonic()
+                h.probe_in_flight = False
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return sorted((h.snapshot() for h in self._sources.values()), key=lambda r: r["source"])
+
+
+breakers = SourceBreakers()
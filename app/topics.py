@@ -0,0 +1,79 @@
+"""
+Тематический скоринг новостей по TOPIC_KEYWORDS: автомат Ахо–Корасик по основам слов.
+Один линейный проход по заголовку и тексту, время не зависит от числа ключевых слов.
+"""
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+# Совпадение в заголовке весит больше, чем в тексте
+TITLE_WEIGHT = 3
+# Одна и та же основа в тексте засчитывается не больше N раз — повторы не раздувают скор
+BODY_HITS_PER_STEM = 3
+
+
+class KeywordAutomaton:
+    """Ахо–Корасик: goto-переходы по символам, fail-ссылки, выходы уже слиты по fail-цепочке."""
+
+    def __init__(self, keywords: Sequence[str]):
+        self.keywords = [k for k in dict.fromkeys(k.strip().lower() for k in keywords) if k]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        for idx, word in enumerate(self.keywords):
+            state = 0
+            for ch in word:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                    self._goto[state][ch] = nxt
+                state = nxt
+            self._out[state] += (idx,)
+
+        # BFS: fail-ссылка узла — самый длинный собственный суффикс, который тоже есть в боре
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def count(self, text: str) -> Dict[int, int]:
+        """Сколько раз встретилась каждая основа (индекс в self.keywords)."""
+        goto, fail, out = self._goto, self._fail, self._out
+        hits: Dict[int, int] = {}
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for idx in out[state]:
+                    hits[idx] = hits.get(idx, 0) + 1
+        return hits
+
+
+@lru_cache(maxsize=4)
+def get_automaton(keywords: str) -> KeywordAutomaton:
+    """Автомат строится один раз на строку TOPIC_KEYWORDS (и один раз в каждом процессе пула)."""
+    return KeywordAutomaton(keywords.split(","))
+
+
+def topic_score(automaton: KeywordAutomaton, title: str, body: str) -> int:
+    title_hits = automaton.count(title or "")
+    body_hits = automaton.count(body or "")
+    return (TITLE_WEIGHT * sum(title_hits.values())
+            + sum(min(n, BODY_HITS_PER_STEM) for n in body_hits.values()))
+
+
+def topic_scores(items: Sequence[Tuple[str, str]], keywords: str) -> List[int]:
+    """Пачкой [(заголовок, текст), ...] — чтобы гонять через cpu.map_chunked."""
+    automaton = get_automaton(keywords)
+    return [topic_score(automaton, title, body) for title, body in items]
@@ -0,0 +1,132 @@
+"""
+Таймлайн новости: от публикации на сайте источника до поста в Telegram.
+
+    python -m app.trace --days 7 --slowest 20
+"""
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from .database import SessionLocal, NewsArchive, NewsStatus
+
+# (стадия, начало, конец) — колонки NewsArchive
+STAGES = [
+    ("poll", "source_published_at", "fetched_at"),           # ждали, пока опросим источник
+    ("persist", "fetched_at", "created_at"),                  # enrich/dedup/картинка
+    ("draft_wait", "created_at", "rewrite_started_at"),       # лежали черновиком
+    ("rewrite", "rewrite_started_at", "rewrite_finished_at"), # LLM
+    ("queue_wait", "rewrite_finished_at", "queued_at"),       # integrity check, ожидание слота
+    ("publish", "queued_at", "published_at"),                 # outbox + Telegram
+]
+
+
+def _seconds(start: Optional[datetime], end: Optional[datetime]) -> Optional[float]:
+    if not start or not end:
+        return None
+    return max((end - start).total_seconds(), 0.0)
+
+
+def item_timeline(news: NewsArchive) -> Dict:
+    stages = {name: _seconds(getattr(news, a), getattr(news, b)) for name, a, b in STAGES}
+    known = {k: v for k, v in stages.items() if v is not None}
+    return {
+        "id": news.id,
+        "title": (news.title or "")[:120],
+        "source": news.source_name,
+        "status": news.status,
+        "timestamps": {col: (getattr(news, col).isoformat() if getattr(news, col) else None)
+                       for col in ["source_published_at", "fetched_at", "created_at", "rewrite_started_at",
+                                   "rewrite_finished_at", "queued_at", "published_at"]},
+        "stages_sec": stages,
+        "end_to_end_sec": _seconds(news.source_published_at, news.published_at),
+        "slowest_stage": max(known, key=known.get) if known else None,
+    }
+
+
+def _percentiles(values: List[float]) -> Dict:
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+
+    def pct(p: float) -> float:
+        return round(values[min(int(len(values) * p), len(values) - 1)] / 60, 1)
+
+    return {"count": len(values), "p50_min": pct(0.5), "p90_min": pct(0.9), "p99_min": pct(0.99),
+            "max_min": round(values[-1] / 60, 1)}
+
+
+def freshness_report(days: int = 7, slowest: int = 10) -> Dict:
+    """Перцентили свежести (публикация на сайте → пост) и вклад каждой стадии."""
+    db = SessionLocal()
+    try:
+        since = datetime.utcnow() - timedelta(days=days)
+        rows = db.query(NewsArchive).filter(
+            NewsArchive.status == NewsStatus.published.value,
+            NewsArchive.published_at >= since,
+        ).all()
+        timelines = [item_timeline(r) for r in rows]
+    finally:
+        db.close()
+
+    end_to_end = [t["end_to_end_sec"] for t in timelines if t["end_to_end_sec"] is not None]
+    per_stage = {
+        name: _percentiles([t["stages_sec"][name] for t in timelines if t["stages_sec"][name] is not None])
+        for name, _, _ in STAGES
+    }
+    bottlenecks = Counter(t["slowest_stage"] for t in timelines if t["slowest_stage"])
+    worst = sorted((t for t in timelines if t["end_to_end_sec"] is not None),
+                   key=lambda t: t["end_to_end_sec"], reverse=True)[:slowest]
+    return {
+        "days": days,
+        "published": len(timelines),
+        "end_to_end": _percentiles(end_to_end),
+        "stages": per_stage,
+        "slowest_stage_counts": dict(bottlenecks.most_common()),
+        "slowest_items": worst,
+    }
+
+
+def item_trace(news_id: int) -> Optional[Dict]:
+    db = SessionLocal()
+    try:
+        news = db.get(NewsArchive, news_id)
+        return item_timeline(news) if news else None
+    finally:
+        db.close()
+
+
+def _print_report(report: Dict) -> None:
+    e2e = report["end_to_end"]
+    print(f"Опубликовано за {report['days']} дн.: {report['published']}")
+    if e2e.get("count"):
+        print(f"Свежесть (сайт → пост), мин: p50={e2e['p50_min']} p90={e2e['p90_min']} "
+              f"p99={e2e['p99_min']} max={e2e['max_min']}")
+    print()
+    print(f"{'стадия':<12} {'n':>5} {'p50':>8} {'p90':>8} {'p99':>8} {'узкое место':>12}")
+    for name, _, _ in STAGES:
+        st = report["stages"][name]
+        if not st.get("count"):
+            print(f"{name:<12} {0:>5} {'-':>8} {'-':>8} {'-':>8} {report['slowest_stage_counts'].get(name, 0):>12}")
+            continue
+        print(f"{name:<12} {st['count']:>5} {st['p50_min']:>8} {st['p90_min']:>8} {st['p99_min']:>8} "
+              f"{report['slowest_stage_counts'].get(name, 0):>12}")
+    if report["slowest_items"]:
+        print("\nСамые медленные:")
+        for t in report["slowest_items"]:
+            print(f"  #{t['id']:<7} {t['end_to_end_sec'] / 60:>7.1f} мин  [{t['slowest_stage']}]  "
+                  f"{t['source']}: {t['title'][:60]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Отчёт о свежести публикаций по стадиям")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--slowest", type=int, default=10)
+    parser.add_argument("--item", type=int, help="Таймлайн одной новости по id")
+    args = parser.parse_args()
+
+    if args.item:
+        import json
+        print(json.dumps(item_trace(args.item), ensure_ascii=False, indent=2))
+    else:
+        _print_report(freshness_report(args.days, args.slowest))
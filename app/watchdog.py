@@ -0,0 +1,134 @@
+"""
+Сторож event loop: постоянно меряет, насколько loop опаздывает, и ловит блокирующие вызовы.
+
+- Проба в самом loop спит WATCHDOG_INTERVAL_MS и записывает опоздание пробуждения (lag).
+  Перцентили по последним WATCHDOG_WINDOW пробам — в /health, распределение — в /metrics.
+- Отдельный поток следит за пульсом пробы. Если loop молчит дольше WATCHDOG_BLOCK_THRESHOLD_MS,
+  он снимает стек потока loop прямо во время блокировки: видно, какой синхронный вызов
+  (requests, BeautifulSoup, запрос к БД) держит всех.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .config import settings
+from .metrics import LOOP_LAG_SECONDS, LOOP_BLOCKS
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних блокировок со стеками держим для /health
+RECENT_BLOCKS = 10
+STACK_FRAMES = 15
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(int(len(sorted_values) * q), len(sorted_values) - 1)]
+
+
+class LoopWatchdog:
+    def __init__(self):
+        self._samples: deque = deque()
+        self._blocks: deque = deque(maxlen=RECENT_BLOCKS)
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._beat = time.monotonic()
+        self._open_block: Optional[Dict] = None
+        self.blocks_total = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Вызывать из работающего loop (startup FastAPI)."""
+        if self.running:
+            return
+        self._samples = deque(maxlen=settings.WATCHDOG_WINDOW)
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+        self._thread = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"🐕 Loop watchdog: probe {settings.WATCHDOG_INTERVAL_MS} ms, "
+                    f"block threshold {settings.WATCHDOG_BLOCK_THRESHOLD_MS} ms")
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _probe(self) -> None:
+        loop = asyncio.get_running_loop()
+        interval = settings.WATCHDOG_INTERVAL_MS / 1000
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(loop.time() - expected, 0.0)
+            self._beat = time.monotonic()
+            self._samples.append(lag)
+            LOOP_LAG_SECONDS.observe(lag)
+            # Блокировка закончилась — дописываем её полную длительность
+            block = self._open_block
+            if block is not None:
+                block["duration_ms"] = round(lag * 1000)
+                self._open_block = None
+                logger.warning(f"🐢 Event loop был заблокирован {block['duration_ms']} ms "
+                               f"в {block['where']}")
+
+    def _monitor(self) -> None:
+        threshold = settings.WATCHDOG_BLOCK_THRESHOLD_MS / 1000
+        interval = settings.WATCHDOG_INTERVAL_MS / 1000
+        check = min(interval, threshold) / 2
+        while not self._stop.wait(check):
+            silent = time.monotonic() - self._beat - interval
+            if silent < threshold or self._open_block is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.format_stack(frame)[-STACK_FRAMES:]
+            block = {
+                "at": datetime.utcnow().isoformat(),
+                "duration_ms": None,  # дописывает проба, когда loop проснётся
+                "where": stack[-1].strip().splitlines()[0] if stack else "?",
+                "stack": "".join(stack),
+            }
+            self._open_block = block
+            self._blocks.append(block)
+            self.blocks_total += 1
+            LOOP_BLOCKS.inc()
+
+    def snapshot(self) -> Dict:
+        samples = sorted(self._samples)
+        lag = None
+        if samples:
+            lag = {
+                "samples": len(samples),
+                "p50_ms": round(_percentile(samples, 0.50) * 1000, 1),
+                "p95_ms": round(_percentile(samples, 0.95) * 1000, 1),
+                "p99_ms": round(_percentile(samples, 0.99) * 1000, 1),
+                "max_ms": round(samples[-1] * 1000, 1),
+            }
+        return {
+            "running": self.running,
+            "lag": lag,
+            "blocks_total": self.blocks_total,
+            "recent_blocks": list(self._blocks),
+        }
+
+
+watchdog = LoopWatchdog()
@@ -0,0 +1,140 @@
+"""
+Извлечение даты публикации (app/dates.py): точность на bench/data/dates.tsv и пропускная
+способность на тексте страниц. Для сравнения — прежний вариант из scraper.py.
+
+    python -m bench.dates
+    python -m bench.dates --pages 20000
+
+Точность считается дважды: совпал день и совпали день и время (Asia/Almaty).
+Худший случай по скорости — страница без даты: весь SEARCH_LIMIT просматривается до конца.
+"""
+import argparse
+import os
+import re
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from app.dates import extract_datetime, SEARCH_LIMIT
+
+CORPUS = os.path.join(os.path.dirname(__file__), "data", "dates.tsv")
+
+
+def legacy_extract(text: str) -> Optional[datetime]:
+    """Как было в scraper._extract_date_from_text: три regex подряд, только русские месяцы, без времени."""
+    if not text:
+        return None
+    search_area = text[:5000]
+    months_ru = {
+        "января": 1, "февраля": 2, "марта": 3, "апреля": 4, "мая": 5, "июня": 6,
+        "июля": 7, "августа": 8, "сентября": 9, "октября": 10, "ноября": 11, "декабря": 12
+    }
+    pattern1 = r"(\d{1,2})[,\s]+(января|февраля|марта|апреля|мая|июня|июля|августа|сентября|октября|ноября|декабря)[,\s]+(\d{4})"
+    match = re.search(pattern1, search_area, re.IGNORECASE)
+    if match:
+        try:
+            return datetime(int(match.group(3)), months_ru[match.group(2).lower()], int(match.group(1)))
+        except Exception:
+            pass
+    match = re.search(r"(\d{1,2})[\.\-\/](\d{1,2})[\.\-\/](\d{4})", search_area)
+    if match:
+        try:
+            d, m, y = int(match.group(1)), int(match.group(2)), int(match.group(3))
+            return datetime(y, m, d)
+        except Exception:
+            pass
+    match = re.search(r"(\d{4})-(\d{2})-(\d{2})", search_area)
+    if match:
+        try:
+            return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except Exception:
+            pass
+    return None
+
+
+def load_corpus() -> List[Tuple[Optional[datetime], bool, str]]:
+    cases = []
+    with open(CORPUS, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            expected, text = line.rstrip("\n").split("\t", 1)
+            if expected == "-":
+                cases.append((None, False, text))
+            else:
+                cases.append((datetime.fromisoformat(expected), "T" in expected, text))
+    return cases
+
+
+def accuracy(name: str, extract, cases) -> List[Tuple]:
+    by_day = by_time = 0
+    misses = []
+    for expected, has_time, text in cases:
+        found = extract(text)
+        if found is not None and found.tzinfo:
+            found = found.replace(tzinfo=None)
+        if expected is None:
+            ok_day = ok_time = found is None
+        else:
+            ok_day = found is not None and found.date() == expected.date()
+            ok_time = ok_day and (not has_time or (found.hour, found.minute) == (expected.hour, expected.minute))
+        by_day += ok_day
+        by_time += ok_time
+        if not ok_time:
+            misses.append((expected, found, text[:60]))
+    n = len(cases)
+    print(f"{name:8s} day {by_day}/{n} ({by_day / n:.0%})   day+time {by_time}/{n} ({by_time / n:.0%})")
+    return misses
+
+
+def pages(n: int) -> List[str]:
+    """Тексты страниц ~SEARCH_LIMIT символов: дата в шапке, в середине и нет вовсе."""
+    filler = "Министерство сообщает о ходе реализации государственной программы. " * 80
+    texts = []
+    for i in range(n):
+        kind = i % 3
+        if kind == 0:
+            texts.append(f"Главная Новости {1 + i % 28} февраля 2026 19:16 " + filler)
+        elif kind == 1:
+            texts.append(filler[:2500] + f" {1 + i % 28} ақпан 2026 " + filler)
+        else:
+            texts.append(filler)
+    return texts
+
+
+def throughput(name: str, extract, texts: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for text in texts:
+            extract(text)
+        best = min(best, time.perf_counter() - t0)
+    print(f"{name:8s} {len(texts) / best:10.0f} pages/s   ({best / len(texts) * 1e6:.1f} µs/page)")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Date extraction accuracy and throughput")
+    parser.add_argument("--pages", type=int, default=6000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args()
+
+    cases = load_corpus()
+    print(f"accuracy on {len(cases)} cases ({CORPUS})")
+    legacy_misses = accuracy("legacy", legacy_extract, cases)
+    misses = accuracy("dates", extract_datetime, cases)
+    if args.show_misses:
+        for name, found_misses in (("legacy", legacy_misses), ("dates", misses)):
+            for expected, found, text in found_misses:
+                print(f"  {name} miss: expected {expected}, got {found}: {text!r}")
+
+    texts = pages(args.pages)
+    print(f"\nthroughput on {len(texts)} pages of ~{SEARCH_LIMIT} chars")
+    old = throughput("legacy", legacy_extract, texts, args.repeat)
+    new = throughput("dates", extract_datetime, texts, args.repeat)
+    print(f"speedup: x{old / new:.2f}")
+
+
+if __name__ == "__main__":
+    main()
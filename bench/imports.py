@@ -0,0 +1,83 @@
+"""
+Бюджет холодного старта: сколько стоит импорт каждого модуля app и его тяжёлых зависимостей.
+Импорт идёт в чистом процессе через `python -X importtime` и БЕЗ секретов в окружении —
+модули app не должны требовать их при импорте.
+
+    python -m bench.imports                       # app.main
+    python -m bench.imports --module app.scraper --top 30
+    python -m bench.imports --budget-ms 1500      # exit 1, если дороже
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+# Эти SDK должны грузиться только при первом использовании (см. rewriter/publisher/scraper)
+DEFERRED = ("google.genai", "groq", "playwright", "telegram")
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str):
+    env = {k: v for k, v in os.environ.items()
+           if k not in ("DATABASE_URL", "GEMINI_API_KEY", "GROQ_API_KEY", "TELEGRAM_BOT_TOKEN", "TELEGRAM_CHAT_ID")}
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env,
+                          cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    wall = time.perf_counter() - started
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+    return proc.returncode, wall, rows, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget per module")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    # Прогрев: первый запуск компилирует .pyc, его не считаем
+    measure(args.module)
+    code, wall, rows, errors = measure(args.module)
+    if code != 0:
+        print("\n".join(errors[-20:]))
+        print(f"\n❌ import {args.module} failed (exit {code})")
+        sys.exit(1)
+
+    total_ms = next((c for name, _, c, _ in rows if name == args.module), 0) / 1000
+    print(f"import {args.module}: {total_ms:.0f} ms cumulative, {wall * 1000:.0f} ms process wall\n")
+
+    print(f"{'app module':<28} {'self ms':>9} {'cumul ms':>9}")
+    for name, self_us, cumul_us, _ in sorted((r for r in rows if r[0].startswith("app")), key=lambda r: -r[2]):
+        print(f"{name:<28} {self_us / 1000:>9.1f} {cumul_us / 1000:>9.1f}")
+
+    # Верхний уровень сторонних пакетов — то, что тянется в холодный старт
+    print(f"\n{'third-party (top level)':<28} {'cumul ms':>9}")
+    top_level = {}
+    for name, _, cumul_us, _ in rows:
+        if name.startswith("app"):
+            continue
+        root = name.split(".")[0]
+        top_level[root] = max(top_level.get(root, 0), cumul_us)
+    for root, cumul_us in sorted(top_level.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{root:<28} {cumul_us / 1000:>9.1f}")
+
+    loaded = {name for name, _, _, _ in rows}
+    eager = [sdk for sdk in DEFERRED if sdk in loaded]
+    print(f"\nDeferred SDKs loaded at import: {eager or 'none'}")
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"\n❌ {total_ms:.0f} ms > budget {args.budget_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Память на новость и пик цикла скрапинга.
+
+    python -m bench.memory                 # footprint NewsItem vs dict + один цикл против заглушек
+    python -m bench.memory --items 20000 --no-cycle
+
+1) footprint: одни и те же строки упакованы в dict (как раньше) и в NewsItem (slots);
+   разница — чистая стоимость контейнера на элемент.
+2) cycle: scrape_news_task против bench/standins.py; пик Python-памяти (tracemalloc)
+   и пиковый RSS процесса.
+"""
+import argparse
+import asyncio
+import resource
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+
+from bench import standins
+from bench.run import PROJECTS, _configure_env
+
+
+def _measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return objects, after - before
+
+
+def footprint(n: int) -> None:
+    from app.items import NewsItem
+
+    corpus = standins.GovKzCorpus(["p"], per_project=min(n, 500))
+    raw = corpus.items["p"]
+    now = datetime.utcnow()
+    fields = [dict(title=r["title"], source_name="Bench", source_url=f"https://x/{i}",
+                   original_text=f"{r['body']}{i}", image_url=f"https://x/{i}.jpg",
+                   published_at=now, fetched_at=now)
+              for i, r in enumerate((raw * (n // len(raw) + 1))[:n])]
+    body_bytes = sum(sys.getsizeof(f["original_text"]) for f in fields) / n
+
+    _, dict_bytes = _measure(lambda: [dict(f) for f in fields])
+    _, item_bytes = _measure(lambda: [NewsItem(**f) for f in fields])
+
+    # Освобождение текстов: строки должны быть созданы под tracemalloc, иначе их не видно
+    tracemalloc.start()
+    items = [NewsItem(**{**f, "original_text": f"{f['original_text']}."}) for f in fields]
+    before = tracemalloc.get_traced_memory()[0]
+    for item in items:
+        item.release_body()
+    released = before - tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"{n} items")
+    print(f"  dict container:      {dict_bytes / n:8.0f} B/item")
+    print(f"  NewsItem container:  {item_bytes / n:8.0f} B/item")
+    print(f"  body (original_text):{body_bytes:8.0f} B/item")
+    print(f"  freed by release_body: {released / n:8.0f} B/item")
+
+
+def cycle(sources: int) -> None:
+    servers = standins.start_all(PROJECTS[:sources], 0.0, 0.0, 0.0)
+    with tempfile.TemporaryDirectory(prefix="govcontext-mem-") as workdir:
+        _configure_env(SimpleNamespace(cpu_workers=0), servers, workdir)
+
+        from app import scheduler
+        from app.database import init_db
+        from app.scraper import scraper
+
+        init_db()
+        gov_url = standins.url_of(servers["gov"])
+        scraper.direct_sources = [
+            {"name": f"Bench {p}", "url": f"{gov_url}/memleket/entities/{p}/press/news?lang=ru",
+             "base_url": gov_url, "gov_kz": True, "project": p}
+            for p in PROJECTS[:sources]
+        ]
+        tracemalloc.start()
+        added = asyncio.run(scheduler.scrape_news_task())
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"\nscrape cycle: {sum(added.values())} drafts from {sources} sources")
+    print(f"  Python peak:   {peak / 1024 / 1024:.2f} MB (retained after cycle: {current / 1024 / 1024:.2f} MB)")
+    print(f"  peak RSS:      {maxrss / 1024 if sys.platform != 'darwin' else maxrss / 1024 / 1024:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-item memory footprint and scrape-cycle peak")
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--sources", type=int, default=10)
+    parser.add_argument("--no-cycle", action="store_true")
+    args = parser.parse_args()
+
+    footprint(args.items)
+    if not args.no_cycle:
+        cycle(args.sources)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Бенчмарк разбора и извлечения на записанном корпусе (SCRAPER_MODE=replay): без сети,
+без Playwright, одинаковый вход от запуска к запуску.
+
+    SCRAPER_MODE=record ...                       # сначала записать корпус боевым скрапером
+    python -m bench.parse --corpus /tmp/govcontext-corpus --repeat 5
+"""
+import argparse
+import asyncio
+import os
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse/extract benchmark on a recorded gov.kz corpus")
+    parser.add_argument("--corpus", default=os.environ.get("SCRAPER_CORPUS_DIR", "/tmp/govcontext-corpus"))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ["SCRAPER_MODE"] = "replay"
+    os.environ["SCRAPER_CORPUS_DIR"] = args.corpus
+    for key in ("DATABASE_URL", "GEMINI_API_KEY", "TELEGRAM_BOT_TOKEN", "TELEGRAM_CHAT_ID"):
+        os.environ.setdefault(key, "sqlite://" if key == "DATABASE_URL" else "bench")
+
+    from app.corpus import get_corpus
+    from app.scraper import scraper, parse_gov_kz_items, pair_languages, DIRECT_SCRAPE_SOURCES
+    from app.items import NewsItem
+
+    corpus = get_corpus()
+    by_project = {s["project"]: s for s in DIRECT_SCRAPE_SOURCES if s.get("project")}
+    # api/<project> — лента ru, api/<project>?lang=kk — другие языки
+    feeds = [key[4:].partition("?lang=") for key in corpus.keys("api/")]
+    sources = [(by_project.get(project, {"name": project, "project": project, "gov_kz": True}), lang or "ru")
+               for project, _, lang in feeds]
+    pages = [key[5:] for key in corpus.keys("page/")]
+    print(f"corpus: {len(sources)} feeds, {len(pages)} pages")
+
+    tokens = {"hash": "replay", "token": "replay"}
+    api_times, parse_times, enrich_times, items = [], [], [], 0
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        jobs = [(s, item) for s, lang in sources for item in scraper._fetch_gov_kz_items(s, tokens, lang)]
+        t1 = time.perf_counter()
+        news = pair_languages(parse_gov_kz_items(jobs))
+        t2 = time.perf_counter()
+        asyncio.run(scraper.enrich_many([NewsItem(title=url, source_name="bench", source_url=url) for url in pages]))
+        t3 = time.perf_counter()
+        api_times.append(t1 - t0)
+        parse_times.append(t2 - t1)
+        enrich_times.append(t3 - t2)
+        items = len(news)
+
+    best = min(parse_times)
+    print(f"api replay:  {min(api_times) * 1000:8.1f} ms")
+    print(f"parse:       {best * 1000:8.1f} ms  ({items / best if best else 0:.0f} items/s, {items} items)")
+    if pages:
+        best = min(enrich_times)
+        print(f"enrich:      {best * 1000:8.1f} ms  ({len(pages) / best if best else 0:.0f} pages/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Офлайн-бенчмарк всего конвейера: настоящие NewsScraper / scrape_news_task / GeminiRewriter /
+TelegramPublisher против локальных заглушек (bench/standins.py) и SQLite.
+
+    python -m bench.run                          # прогон + сравнение с bench/baseline.json
+    python -m bench.run --save-baseline          # записать текущие цифры как baseline
+    python -m bench.run --llm-latency 1.5 --check  # упасть (exit 1), если хуже baseline > tolerance
+
+Сеть наружу не нужна: gov.kz, Groq, Gemini и Telegram отвечают с 127.0.0.1,
+токены gov.kz берутся из GOV_KZ_STATIC_TOKENS, Playwright не запускается.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench import standins
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+PROJECTS = ["economy", "minfin", "mfa", "enbek", "dsm", "edu", "sci", "transport", "mdai", "almaty",
+            "astana", "moa", "energo", "adilet", "emer", "mti", "mps", "mam", "tsm", "ecogeo"]
+
+
+def _pct(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def _configure_env(args, servers, workdir):
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "GEMINI_API_KEY": "bench",
+        "GROQ_API_KEY": "bench",
+        "TELEGRAM_BOT_TOKEN": "123456:bench",
+        "TELEGRAM_CHAT_ID": "-1001",
+        "GOV_KZ_API_URL": f"{standins.url_of(servers['gov'])}/api/v1/public/content-manager/news",
+        "GOV_KZ_STATIC_TOKENS": "bench:bench",
+        "GROQ_BASE_URL": standins.url_of(servers["llm"]),
+        "GEMINI_BASE_URL": standins.url_of(servers["llm"]),
+        "TELEGRAM_API_BASE_URL": standins.url_of(servers["telegram"]),
+        "GROQ_STEP_DELAY_SECONDS": "0",
+        "IMAGE_CACHE_DIR": os.path.join(workdir, "images"),
+        "PROFILE_DIR": os.path.join(workdir, "profiles"),
+        "CPU_WORKERS": str(args.cpu_workers),
+        "PIPELINE_ENABLED": "false",
+    })
+
+
+async def _run(args, gov_url):
+    # Импорт приложения — только после того, как окружение указывает на заглушки
+    from app import scheduler, outbox
+    from app.database import init_db, SessionLocal, NewsArchive, NewsStatus, PublishOutbox, OutboxStatus
+    from app.scraper import scraper
+    from app.publisher import publisher
+    from app.sharding import heartbeat
+    from app.trace import item_timeline
+    from app.cpu import shutdown_pool
+
+    init_db()
+    heartbeat()
+    await publisher.start()
+    scraper.direct_sources = [
+        {"name": f"Bench {p}", "url": f"{gov_url}/memleket/entities/{p}/press/news?lang=ru",
+         "base_url": gov_url, "gov_kz": True, "project": p}
+        for p in PROJECTS[:args.sources]
+    ]
+    # Бенчмарк не должен зависеть от того, который сейчас час в Алматы
+    scheduler.is_working_hours = lambda: True
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    # --- SCRAPE ---
+    cycle_times, scraped = [], 0
+    started = time.perf_counter()
+    for _ in range(args.max_cycles):
+        t0 = time.perf_counter()
+        added = await scheduler.scrape_news_task()
+        cycle_times.append(time.perf_counter() - t0)
+        scraped += sum(added.values())
+        if not added:
+            break
+    scrape_wall = time.perf_counter() - started
+    scrape_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+    if args.tracemalloc:
+        tracemalloc.reset_peak()
+
+    # --- REWRITE + PUBLISH ---
+    process_times = []
+    started = time.perf_counter()
+    for _ in range(args.publish):
+        t0 = time.perf_counter()
+        await scheduler.process_news_task()
+        process_times.append(time.perf_counter() - t0)
+    # Дожидаемся, пока outbox всё отправит
+    for _ in range(200):
+        db = SessionLocal()
+        try:
+            pending = db.query(PublishOutbox).filter(
+                PublishOutbox.status.in_([OutboxStatus.pending.value, OutboxStatus.claimed.value,
+                                          OutboxStatus.sending.value])).count()
+        finally:
+            db.close()
+        if not pending:
+            break
+        await outbox.publish_outbox_task()
+        await asyncio.sleep(0.05)
+    publish_wall = time.perf_counter() - started
+    publish_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+
+    db = SessionLocal()
+    try:
+        published = db.query(NewsArchive).filter(NewsArchive.status == NewsStatus.published.value).all()
+        timelines = [item_timeline(n) for n in published]
+    finally:
+        db.close()
+
+    await publisher.shutdown()
+    shutdown_pool()
+
+    stage = {}
+    for name in ("persist", "rewrite", "publish"):
+        values = [t["stages_sec"][name] for t in timelines if t["stages_sec"][name] is not None]
+        stage[f"{name}_p50_ms"] = round(_pct(values, 0.5) * 1000, 1) if values else None
+        stage[f"{name}_p95_ms"] = round(_pct(values, 0.95) * 1000, 1) if values else None
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result = {
+        "scrape_items": scraped,
+        "scrape_items_per_sec": round(scraped / scrape_wall, 2) if scrape_wall else None,
+        "scrape_cycle_p50_sec": round(_pct(cycle_times, 0.5), 3),
+        "published": len(published),
+        "publish_posts_per_sec": round(len(published) / publish_wall, 3) if publish_wall else None,
+        "process_cycle_p50_sec": round(_pct(process_times, 0.5), 3) if process_times else None,
+        **stage,
+        "peak_rss_mb": round(maxrss / 1024 if sys.platform != "darwin" else maxrss / 1024 / 1024, 1),
+    }
+    if args.tracemalloc:
+        result["scrape_py_peak_mb"] = round(scrape_peak / 1024 / 1024, 2)
+        result["publish_py_peak_mb"] = round(publish_peak / 1024 / 1024, 2)
+    return result
+
+
+def _compare(result, baseline, tolerance):
+    """Печатает сравнение; возвращает список метрик, ухудшившихся больше tolerance."""
+    regressions = []
+    print(f"\n{'metric':<26} {'baseline':>12} {'current':>12} {'change':>9}")
+    for key, current in result.items():
+        base = baseline.get(key)
+        if not isinstance(current, (int, float)) or not isinstance(base, (int, float)) or not base:
+            print(f"{key:<26} {str(base):>12} {str(current):>12}")
+            continue
+        change = (current - base) / base
+        higher_is_better = key.endswith("_per_sec")
+        worse = -change if higher_is_better else change
+        flag = "  ⚠" if worse > tolerance else ""
+        if worse > tolerance and key not in ("scrape_items", "published"):
+            regressions.append(key)
+        print(f"{key:<26} {base:>12} {current:>12} {change * 100:>+8.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark")
+    parser.add_argument("--sources", type=int, default=10)
+    parser.add_argument("--publish", type=int, default=10, help="сколько циклов process_news_task")
+    parser.add_argument("--max-cycles", type=int, default=10)
+    parser.add_argument("--gov-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--tg-latency", type=float, default=0.05)
+    parser.add_argument("--cpu-workers", type=int, default=0)
+    parser.add_argument("--tracemalloc", action="store_true", help="пик Python-памяти по фазам (медленнее)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit 1 при регрессии")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    servers = standins.start_all(PROJECTS[:args.sources], args.gov_latency, args.llm_latency, args.tg_latency)
+    with tempfile.TemporaryDirectory(prefix="govcontext-bench-") as workdir:
+        _configure_env(args, servers, workdir)
+        result = asyncio.run(_run(args, standins.url_of(servers["gov"])))
+    result["requests"] = {name: srv.requests for name, srv in servers.items()}
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({k: v for k, v in result.items() if k != "requests"}, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline} (run with --save-baseline first)")
+        if args.check:
+            sys.exit(1)
+        return
+    with open(args.baseline) as f:
+        regressions = _compare(result, json.load(f), args.tolerance)
+    if regressions and args.check:
+        print(f"\nRegressions: {regressions}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
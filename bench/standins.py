@@ -0,0 +1,208 @@
+"""
+Локальные заглушки внешних сервисов для бенчмарков: API gov.kz (+ страницы и картинки),
+Groq (OpenAI-совместимый chat/completions), Gemini generateContent и Telegram Bot API.
+Каждый сервер — ThreadingHTTPServer в фоновом потоке с настраиваемой задержкой ответа.
+"""
+import io
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+WORDS = (
+    "министр бюджет налог школа больница дорога тариф инвестиции экспорт зерно энергия "
+    "туризм аким студент грант колледж цифровизация транспорт вокзал аэропорт закон "
+    "реформа пенсия жильё ипотека экология лес вода газ нефть уголь спорт культура театр "
+    "музей наука университет врач вакцина фермер субсидия рынок валюта тенге инфляция"
+).split()
+
+KZ_WORDS = "министрлік білім ғылым мектеп денсаулық әкімдік жаңалық үкімет салық заң".split()
+
+
+def _title(rng: random.Random, kz: bool) -> str:
+    words = rng.sample(KZ_WORDS if kz else WORDS, 7)
+    return " ".join(words).capitalize() + f" №{rng.randint(100, 99999)}"
+
+
+def _body(rng: random.Random, kz: bool, paragraphs: int = 6) -> str:
+    pool = KZ_WORDS if kz else WORDS
+    return "".join(
+        "<p>" + " ".join(rng.choice(pool) for _ in range(45)).capitalize() + ".</p>"
+        for _ in range(paragraphs)
+    )
+
+
+def _jpeg() -> bytes:
+    try:
+        from PIL import Image
+    except ImportError:
+        return b""
+    buf = io.BytesIO()
+    Image.new("RGB", (1600, 900), (30, 90, 160)).save(buf, format="JPEG", quality=80)
+    return buf.getvalue()
+
+
+class GovKzCorpus:
+    """Сгенерированные новости по проектам: одинаковые между запусками при одном seed."""
+
+    def __init__(self, projects: List[str], per_project: int = 20, seed: int = 42, kz_share: float = 0.3):
+        rng = random.Random(seed)
+        now = datetime.utcnow()
+        self.items: Dict[str, List[Dict]] = {}
+        self.by_id: Dict[str, Dict] = {}
+        next_id = 100000
+        for project in projects:
+            items = []
+            for i in range(per_project):
+                kz = rng.random() < kz_share
+                next_id += 1
+                item = {
+                    "id": next_id,
+                    "title": _title(rng, kz),
+                    "body": _body(rng, kz),
+                    "created_date": (now - timedelta(minutes=10 * i + rng.randint(0, 9))).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                    "images": [{"url": f"/bench/img/{next_id % 7}.jpg"}],  # 7 общих картинок на всех
+                    "project": project,
+                }
+                items.append(item)
+                self.by_id[str(next_id)] = item
+            self.items[project] = items
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "bench-standin/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, payload, code: int = 200):
+        self._send(code, json.dumps(payload, ensure_ascii=False).encode())
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _delay(self):
+        srv = self.server
+        if srv.latency:
+            time.sleep(srv.latency * random.uniform(0.8, 1.2))
+        with srv.lock:
+            srv.requests += 1
+
+
+class GovKzHandler(_Handler):
+    def do_GET(self):
+        self._delay()
+        url = urlparse(self.path)
+        corpus: GovKzCorpus = self.server.corpus
+        if url.path.endswith("/content-manager/news"):
+            if not self.headers.get("hash") or not self.headers.get("token"):
+                return self._json({"error": "no token"}, 401)
+            project = parse_qs(url.query).get("projects", ["eq:"])[0].split(":", 1)[-1]
+            return self._json({"content": corpus.items.get(project, [])})
+        m = re.search(r"/press/news/details/(\d+)", url.path)
+        if m and m.group(1) in corpus.by_id:
+            item = corpus.by_id[m.group(1)]
+            created = datetime.strptime(item["created_date"][:19], "%Y-%m-%dT%H:%M:%S")
+            page = (
+                "<html><head><meta property=\"og:image\" content=\"/bench/img/1.jpg\">"
+                f"<title>{item['title']}</title></head><body><header>gov.kz</header>"
+                f"<div class=\"date\">{created.strftime('%d.%m.%Y')} / {created.strftime('%H:%M')}</div>"
+                f"<article><h1>{item['title']}</h1>{item['body']}</article>"
+                + "<footer>" + "<p>footer</p>" * 200 + "</footer></body></html>"
+            )
+            return self._send(200, page.encode(), "text/html; charset=utf-8")
+        if url.path.startswith("/bench/img/") and self.server.jpeg:
+            return self._send(200, self.server.jpeg, "image/jpeg")
+        self._json({"error": "not found"}, 404)
+
+
+class LlmHandler(_Handler):
+    """Groq: POST /openai/v1/chat/completions; Gemini: POST .../models/<m>:generateContent."""
+
+    def do_POST(self):
+        body = self._read_body()
+        self._delay()
+        text = "<b>Заголовок новости</b>\n" + ("Текст поста для канала. " * 20) + "\n#новости #казахстан"
+        prompt_tokens = max(len(body) // 4, 1)
+        if self.path.endswith("/chat/completions"):
+            return self._json({
+                "id": "bench", "object": "chat.completion", "created": int(time.time()), "model": "bench",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 180, "total_tokens": prompt_tokens + 180},
+            })
+        if ":generateContent" in self.path:
+            return self._json({
+                "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+                "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": 180,
+                                  "totalTokenCount": prompt_tokens + 180},
+            })
+        self._json({"error": "not found"}, 404)
+
+
+class TelegramHandler(_Handler):
+    def do_POST(self):
+        self._read_body()
+        self._delay()
+        method = self.path.rstrip("/").rsplit("/", 1)[-1]
+        srv = self.server
+        if method == "getMe":
+            return self._json({"ok": True, "result": {
+                "id": 1, "is_bot": True, "first_name": "bench", "username": "bench_bot",
+                "can_join_groups": False, "can_read_all_group_messages": False, "supports_inline_queries": False,
+            }})
+        if method in ("sendMessage", "sendPhoto"):
+            with srv.lock:
+                srv.message_id += 1
+                message_id = srv.message_id
+            result = {"message_id": message_id, "date": int(time.time()),
+                      "chat": {"id": -1001, "type": "channel", "title": "bench"}}
+            if method == "sendPhoto":
+                result["photo"] = [{"file_id": f"bench-file-{message_id}", "file_unique_id": f"u{message_id}",
+                                    "width": 1280, "height": 720}]
+                result["caption"] = "bench"
+            else:
+                result["text"] = "bench"
+            return self._json({"ok": True, "result": result})
+        self._json({"ok": True, "result": True})
+
+    do_GET = do_POST
+
+
+def serve(handler, latency: float = 0.0, **attrs) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.message_id = 0
+    for key, value in attrs.items():
+        setattr(server, key, value)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def url_of(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def start_all(projects: List[str], gov_latency: float, llm_latency: float, tg_latency: float,
+              per_project: int = 20, seed: int = 42) -> Dict[str, ThreadingHTTPServer]:
+    return {
+        "gov": serve(GovKzHandler, gov_latency, corpus=GovKzCorpus(projects, per_project, seed), jpeg=_jpeg()),
+        "llm": serve(LlmHandler, llm_latency),
+        "telegram": serve(TelegramHandler, tg_latency),
+    }